@@ -1,4 +1,7 @@
 import streamlit as st
+from utils.calculation_jobs import collect_calculation
+from utils.profiling import profile_page
+from utils.memory import use_frames
 
 st.set_page_config(
     page_title="EVM Calculator",
@@ -7,6 +10,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Home")
+use_frames('project_data', 'calculated_data')
+
 st.title("📊 EVM Calculator")
 st.write("**Earned Value Management Analysis Tool**")
 
@@ -64,6 +71,8 @@ st.divider()
 # Current Status
 st.header("📈 Current Status")
 
+job = collect_calculation()
+
 data_loaded = 'project_data' in st.session_state
 globals_set = 'global_values' in st.session_state
 calculated = 'calculated_data' in st.session_state
@@ -86,7 +95,9 @@ with col2:
         st.warning("○ Settings Not Configured")
 
 with col3:
-    if calculated:
+    if job is not None and job.is_running:
+        st.info(f"⏳ Calculating... {job.progress:.0%}")
+    elif calculated:
         st.success("✓ Results Available")
         st.info(f"Projects: {len(st.session_state.calculated_data)}")
     else:
@@ -158,4 +169,4 @@ with st.expander("ℹ️ About EVM", expanded=False):
 st.divider()
 
 # Footer
-st.caption("EVM Calculator © 2024 | Use the sidebar navigation to access different sections")
\ No newline at end of file
+st.caption("EVM Calculator © 2024 | Use the sidebar navigation to access different sections")
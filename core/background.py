@@ -0,0 +1,109 @@
+import threading
+import traceback
+import uuid
+
+import pandas as pd
+
+from core.diagnostics import EVMDiagnostics
+from core.evm_engine import NO_VALID_DATES_MESSAGE, calculate_evm, has_valid_dates, infer_date_formats
+from core.portfolio import latest_summary
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class CalculationJob:
+    """
+    Runs calculate_evm on a background thread, one chunk of rows at a time.
+
+    The EVM kernel is vectorized over rows and no row's metrics depend on
+    another row, so the input can be split into row chunks and the results
+    concatenated without changing any value. What does look across rows is
+    done once on the whole input before chunking: the format of each date
+    column is inferred once and passed to every chunk, and the input is
+    rejected only if no row at all has a valid date (a chunk without valid
+    dates just gives rows without metrics). The job records progress after
+    each chunk and checks for cancellation between chunks. It never touches
+    Streamlit, so it keeps running when the user switches pages; the page
+    that finds it finished collects the result.
+
+    Once every chunk is done, the job also builds the latest snapshot of
+    every project (``latest``, see latest_summary) from the whole result,
+    since a project's snapshots may span chunks.
+    """
+
+    def __init__(self, data, global_values, chunk_size=DEFAULT_CHUNK_SIZE, price_index=None, fx_rates=None,
+                 outputs=None):
+        self.id = uuid.uuid4().hex
+        self.data = data
+        self.global_values = dict(global_values)
+        self.price_index = price_index
+        self.fx_rates = fx_rates
+        # Metric columns to calculate (None: all)
+        self.outputs = list(outputs) if outputs is not None else None
+        # Currency of the results' money columns (None: as entered)
+        self.currency = fx_rates.reporting_currency if fx_rates is not None else None
+        self.chunk_size = max(1, int(chunk_size))
+        self.total_rows = len(data)
+        self.total_chunks = max(1, -(-self.total_rows // self.chunk_size))
+        self.chunks_done = 0
+        self.rows_done = 0
+        self.status = 'pending'  # pending, running, done, cancelled, failed
+        self.result = None
+        self.latest = None
+        self.error = None
+        self.error_traceback = None
+        self.diagnostics = None
+        self._cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='evm-calculation', daemon=True)
+
+    @property
+    def progress(self):
+        """Fraction of chunks completed, between 0 and 1."""
+        return self.chunks_done / self.total_chunks
+
+    @property
+    def is_running(self):
+        return self.status in ('pending', 'running')
+
+    def start(self):
+        self.status = 'running'
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Request cancellation; takes effect before the next chunk starts."""
+        self._cancel_event.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        results = []
+        diagnostics = []
+        try:
+            # One format per date column for the whole input, so every chunk parses alike
+            date_formats = infer_date_formats(self.data)
+            if not has_valid_dates(self.data, date_formats, self.chunk_size):
+                raise ValueError(NO_VALID_DATES_MESSAGE)
+            for start in range(0, max(self.total_rows, 1), self.chunk_size):
+                if self._cancel_event.is_set():
+                    self.status = 'cancelled'
+                    return
+                chunk = self.data.iloc[start:start + self.chunk_size]
+                result, diag = calculate_evm(
+                    chunk, self.global_values, return_diagnostics=True,
+                    price_index=self.price_index, fx_rates=self.fx_rates, outputs=self.outputs,
+                    date_formats=date_formats, require_valid_dates=False
+                )
+                results.append(result)
+                diagnostics.append(diag)
+                self.rows_done += len(chunk)
+                self.chunks_done += 1
+            self.diagnostics = EVMDiagnostics.merge(diagnostics)
+            self.result = pd.concat(results) if len(results) > 1 else results[0]
+            self.latest = latest_summary(self.result)
+            self.status = 'done'
+        except Exception as e:
+            self.error = e
+            self.error_traceback = traceback.format_exc()
+            self.status = 'failed'
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DAYS_PER_YEAR = 365.25
+
+
+def _dates(values):
+    values = np.asarray(values)
+    return values if values.dtype.kind == 'M' else values.astype('datetime64[ns]')
+
+
+@dataclass
+class WorkCalendar:
+    """
+    A named working calendar: working weekdays and holidays.
+
+    Args:
+        name: Name projects use to select the calendar.
+        weekmask: Working weekdays Monday to Sunday, as NumPy accepts them
+            ('1111100' or 'Mon Tue Wed Thu Fri').
+        holidays: Non-working dates.
+    """
+    name: str
+    weekmask: str = '1111100'
+    holidays: tuple = ()
+
+    def __post_init__(self):
+        # Raises ValueError for an invalid weekmask or holiday
+        self.busdaycalendar = np.busdaycalendar(weekmask=self.weekmask, holidays=list(self.holidays))
+
+    @property
+    def days_per_month(self):
+        """Average working days per month, from the working weekdays (holidays excluded)."""
+        return self.busdaycalendar.weekmask.sum() * DAYS_PER_YEAR / 7 / 12
+
+
+def build_calendars(settings):
+    """
+    WorkCalendars from the 'calendars' global value, a list of
+    {'name', 'weekmask', 'holidays'} dicts (JSON friendly). Returns None
+    when no calendars are configured.
+    """
+    if not settings:
+        return None
+    return [
+        WorkCalendar(
+            name=str(item['name']),
+            weekmask=item.get('weekmask') or '1111100',
+            holidays=tuple(item.get('holidays') or ()),
+        )
+        for item in settings
+    ]
+
+
+def calendar_codes(values, calendars):
+    """
+    Calendar of each row as a code into ``calendars``. Missing or unknown
+    names get the first calendar, the default.
+
+    Returns:
+        tuple: (codes array, number of rows that fell back to the default)
+    """
+    codes = pd.Index([c.name for c in calendars]).get_indexer(values.astype(str).str.strip())
+    unknown = codes < 0
+    return np.where(unknown, 0, codes), int((unknown & values.notna().to_numpy()).sum())
+
+
+def working_duration_months(start, end, calendars, codes):
+    """
+    Working days from start to end in each row's calendar, as months of
+    that calendar's average working days (see WorkCalendar.days_per_month).
+
+    Days are counted with one ``np.busday_count`` call per calendar; the
+    start day counts, the end day does not, like the calendar-day
+    durations. Missing dates give NaN and an end before the start gives a
+    negative duration.
+    """
+    start, end, codes = np.broadcast_arrays(_dates(start), _dates(end), np.asarray(codes))
+    result = np.full(start.shape, np.nan)
+    dated = ~np.isnat(start) & ~np.isnat(end)
+    for code, calendar in enumerate(calendars):
+        rows = dated & (codes == code)
+        if rows.any():
+            days = np.busday_count(
+                start[rows].astype('datetime64[D]'), end[rows].astype('datetime64[D]'),
+                busdaycal=calendar.busdaycalendar
+            )
+            result[rows] = days / calendar.days_per_month
+    return result
+
+
+def add_working_months(start, months, calendars, codes):
+    """
+    The date a number of working months after start in each row's
+    calendar, with one ``np.busday_offset`` call per calendar. A start on
+    a non-working day rolls forward to the next working day first.
+    Missing starts or durations give NaT.
+    """
+    start, months, codes = np.broadcast_arrays(_dates(start), np.asarray(months, dtype=float), np.asarray(codes))
+    result = np.full(start.shape, np.datetime64('NaT', 'ns'))
+    valid = ~np.isnat(start) & np.isfinite(months)
+    for code, calendar in enumerate(calendars):
+        rows = valid & (codes == code)
+        if rows.any():
+            days = np.floor(months[rows] * calendar.days_per_month).astype(np.int64)
+            result[rows] = np.busday_offset(
+                start[rows].astype('datetime64[D]'), days, roll='forward', busdaycal=calendar.busdaycalendar
+            ).astype('datetime64[ns]')
+    return result
+
@@ -0,0 +1,154 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+ISSUE_TYPES = {
+    'invalid_date': 'Date is missing or could not be parsed (treated as missing)',
+    'negative_duration': 'Duration is zero or negative (treated as missing)',
+    'missing_bac': 'Budget (BAC) is missing or not a number',
+    'ev_exceeds_ac': 'EV is greater than AC with non-negative inflation',
+    'missing_fx_rate': 'No exchange rate for the currency on or before the data date',
+}
+
+
+@dataclass
+class EVMDiagnostics:
+    """
+    Data issues found by calculate_evm.
+
+    Each issue is stored as an array of row index labels per (issue type,
+    column), built from a boolean mask over the whole frame, so collecting
+    diagnostics costs one vectorized comparison per check regardless of the
+    number of rows. Informational messages that are not tied to rows (for
+    example "using manual PV") are kept in ``notes``, and the date format
+    detected for each date column in ``date_formats``.
+    """
+    issues: dict = field(default_factory=dict)
+    notes: list = field(default_factory=list)
+    date_formats: dict = field(default_factory=dict)
+
+    def add(self, issue, mask, index, column=''):
+        """Record the rows of ``index`` where ``mask`` is True."""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            rows = np.asarray(index)[mask]
+            key = (issue, column)
+            if key in self.issues:
+                rows = np.concatenate([self.issues[key], rows])
+            self.issues[key] = rows
+
+    def note(self, message):
+        if message not in self.notes:
+            self.notes.append(message)
+
+    def record_date_format(self, column, info):
+        """Record how a date column was parsed (an info dict from parse_date_column)."""
+        if column not in self.date_formats:
+            self.date_formats[column] = dict(info)
+            return
+        # Chunks of one frame: add up the counts, keep every format seen
+        merged = self.date_formats[column]
+        for key in ('excel_serial', 'residual', 'invalid'):
+            merged[key] += info[key]
+        formats = [name for name in (merged['format'] or '').split(' / ') if name]
+        if info['format'] and info['format'] not in formats:
+            formats.append(info['format'])
+        merged['format'] = ' / '.join(formats) or None
+
+    def date_format_summary(self):
+        """One line per date column, e.g. 'data_date: EU, 12 values parsed slowly'."""
+        lines = []
+        for column, info in self.date_formats.items():
+            parts = [info['format'] or 'no text dates']
+            if info['excel_serial']:
+                parts.append(f"{info['excel_serial']:,} Excel serial numbers")
+            if info['residual']:
+                parts.append(f"{info['residual']:,} values parsed slowly")
+            lines.append(f"{column}: " + ', '.join(parts))
+        return lines
+
+    def counts(self):
+        """Number of affected rows per issue type."""
+        totals = {}
+        for (issue, _), rows in self.issues.items():
+            totals[issue] = totals.get(issue, 0) + len(rows)
+        return totals
+
+    def rows(self, issue, column=None):
+        """Row index labels for an issue type, optionally for one column only."""
+        arrays = [rows for (name, col), rows in self.issues.items()
+                  if name == issue and (column is None or col == column)]
+        return np.concatenate(arrays) if arrays else np.array([], dtype=object)
+
+    @property
+    def total(self):
+        return sum(len(rows) for rows in self.issues.values())
+
+    def __bool__(self):
+        return bool(self.issues)
+
+    def summary(self):
+        """One row per (issue, column) with its count and description."""
+        return pd.DataFrame(
+            [
+                {
+                    'issue': issue,
+                    'column': column,
+                    'count': len(rows),
+                    'description': ISSUE_TYPES.get(issue, issue),
+                }
+                for (issue, column), rows in self.issues.items()
+            ],
+            columns=['issue', 'column', 'count', 'description']
+        )
+
+    def to_frame(self, data=None, issues=None, columns=('project_id', 'project_name', 'data_date')):
+        """
+        Long-format issues table: one row per affected data row and issue.
+
+        Args:
+            data (pd.DataFrame, optional): The frame the diagnostics were
+                computed on; when given, identifying ``columns`` are joined in.
+            issues (list, optional): Restrict the table to these issue types.
+            columns (tuple): Identifying columns to join from ``data``.
+
+        Returns:
+            pd.DataFrame: Columns ``issue``, ``column``, ``row`` plus any
+            identifying columns found in ``data``.
+        """
+        keys = [key for key in self.issues if issues is None or key[0] in issues]
+        if not keys:
+            return pd.DataFrame(columns=['issue', 'column', 'row'])
+
+        lengths = [len(self.issues[key]) for key in keys]
+        table = pd.DataFrame({
+            'issue': pd.Categorical(np.repeat([key[0] for key in keys], lengths)),
+            'column': np.repeat([key[1] for key in keys], lengths),
+            'row': np.concatenate([self.issues[key] for key in keys]),
+        })
+
+        if data is not None:
+            identifying = [col for col in columns if col in data.columns]
+            if identifying and data.index.is_unique:
+                joined = data[identifying].reindex(table['row'].to_numpy())
+                for col in identifying:
+                    table[col] = joined[col].to_numpy()
+
+        return table
+
+    @classmethod
+    def merge(cls, diagnostics):
+        """Combine diagnostics computed on separate chunks of one frame."""
+        merged = cls()
+        for diag in diagnostics:
+            for key, rows in diag.issues.items():
+                if key in merged.issues:
+                    merged.issues[key] = np.concatenate([merged.issues[key], rows])
+                else:
+                    merged.issues[key] = rows
+            for message in diag.notes:
+                merged.note(message)
+            for column, info in diag.date_formats.items():
+                merged.record_date_format(column, info)
+        return merged
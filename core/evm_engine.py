@@ -1,12 +1,21 @@
 
 import pandas as pd
 import numpy as np
-from scipy.stats import beta as beta_dist
 from datetime import datetime, timedelta
+from core.diagnostics import EVMDiagnostics
+from core.calendars import build_calendars, calendar_codes, working_duration_months
+from core.kernels import DEFAULT_EAC_METHODS, compute_metrics, duration_months, scurve_fraction
+from models.project import ProjectBatch
+
+DATE_COLUMNS = ['plan_start_date', 'plan_finish_date', 'data_date']
+# Global values that configure the calculation instead of filling a column
+ENGINE_SETTINGS = ['eac_methods', 'calendars', 'calendar_column']
+# Money columns converted to the reporting currency before the EVM metrics
+MONEY_COLUMNS = ['bac', 'ac', 'manual_pv', 'manual_ev']
 
 def scurve_cdf(t, alpha, beta):
     """Cumulative distribution function for the s-curve."""
-    return beta_dist.cdf(t, alpha, beta)
+    return scurve_fraction(t, alpha, beta)
 
 def safe_convert_to_datetime(value):
     """
@@ -44,132 +53,343 @@ def safe_convert_to_datetime(value):
     except:
         return pd.NaT
 
-def convert_date_column(series):
+# Explicit formats tried when inferring a date column's format, in order of
+# preference when several fit the sample equally well. Month-first comes
+# before day-first for ambiguous values, as with the per-cell parser.
+DATE_FORMATS = [
+    ('ISO', 'ISO8601'),
+    ('US', '%m/%d/%Y'),
+    ('EU', '%d/%m/%Y'),
+    ('US (dashes)', '%m-%d-%Y'),
+    ('EU (dashes)', '%d-%m-%Y'),
+    ('EU (dots)', '%d.%m.%Y'),
+    ('Year first (slashes)', '%Y/%m/%d'),
+    ('US (2-digit year)', '%m/%d/%y'),
+    ('EU (2-digit year)', '%d/%m/%y'),
+    ('Day month name', '%d %b %Y'),
+    ('Day-month name', '%d-%b-%Y'),
+    ('Month name day', '%b %d, %Y'),
+    ('Full month name day', '%B %d, %Y'),
+]
+# CSV column names and their pythonic engine names
+COLUMN_MAPPING = {
+    'Project ID': 'project_id',
+    'Project Name': 'project_name',
+    'Department': 'department',
+    'Budget (BAC)': 'bac',
+    'Actual Cost (AC)': 'ac',
+    'Plan Start Date': 'plan_start_date',
+    'Plan Finish Date': 'plan_finish_date',
+    'Data Date': 'data_date',
+    'Earned Value (EV)': 'ev',
+    'Planned Value (PV)': 'pv',
+    'Manual EV': 'manual_ev',
+    'Manual PV': 'manual_pv',
+    'Curve': 'curve',
+    'Beta': 'beta',
+    'Alpha': 'alpha',
+    'Inflation Rate': 'inflation_rate'
+}
+EXCEL_SERIAL_RANGE = (1, 50000)
+EXCEL_EPOCH = np.datetime64('1899-12-30', 'us')
+MISSING_DATE_STRINGS = ['', 'nan', 'NaT', 'None', '<NA>']
+NO_VALID_DATES_MESSAGE = (
+    "No valid dates found in data. Please check your date columns. "
+    "Expected formats: YYYY-MM-DD, MM/DD/YYYY, or Excel serial numbers (1-50000)"
+)
+
+def _to_naive_datetimes(values, fmt=None):
     """
-    Convert a pandas Series to datetime, handling bad values gracefully.
+    pd.to_datetime with errors='coerce' as naive datetime64[ns] values.
+
+    Timezone-aware values are converted to UTC and their zone dropped, also
+    when a column mixes them with naive values or other zones (which
+    pd.to_datetime rejects unless told to convert to UTC).
+    """
+    try:
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    except ValueError:
+        # Mixed zones, or aware and naive values: read naive ones as UTC
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce', utc=True)
+    parsed = pd.Series(parsed)
+    if parsed.dt.tz is not None:
+        parsed = parsed.dt.tz_convert('UTC').dt.tz_localize(None)
+    return parsed.to_numpy(dtype='datetime64[ns]')
+
+def infer_date_format(values, sample_size=500):
     """
-    result = pd.Series(index=series.index, dtype='datetime64[ns]')
+    Picks the explicit format that parses the most of a sample of date strings.
 
-    for idx in series.index:
-        result[idx] = safe_convert_to_datetime(series[idx])
+    Args:
+        values (pd.Series): Non-missing, non-numeric date strings.
+        sample_size (int): Number of evenly spaced values to try.
 
-    return result
+    Returns:
+        tuple: (format name, format string), or (None, None) when no format
+        parses any of the sample.
+    """
+    if len(values) > sample_size:
+        values = values.iloc[np.linspace(0, len(values) - 1, sample_size).astype(int)]
+
+    best, best_count = (None, None), 0
+    for name, fmt in DATE_FORMATS:
+        count = (~np.isnat(_to_naive_datetimes(values, fmt))).sum()
+        if count > best_count:
+            best, best_count = (name, fmt), count
+            if count == len(values):
+                break
+    return best
+
+def _split_date_values(series):
+    """(stripped text, missing mask, numbers, numeric mask) of a column of date values."""
+    text = series.astype(str).str.strip()
+    missing = (series.isna() | text.isin(MISSING_DATE_STRINGS)).to_numpy()
+    numbers = pd.to_numeric(text.where(~missing), errors='coerce').to_numpy(dtype=float)
+    numeric = ~np.isnan(numbers) & ~missing
+    return text, missing, numbers, numeric
+
+def infer_date_formats(data, sample_size=500):
+    """
+    Picks the format of every text date column once for a whole input.
 
-def calculate_evm(data, global_values):
+    Callers that split one input into chunks or batches (CalculationJob,
+    the EVM service) pass the result to calculate_evm for every part, so an
+    ambiguous value such as '01/02/2024' parses to the same date in every
+    part, whatever values the part happens to contain.
+
+    Args:
+        data (pd.DataFrame or ProjectBatch): Input as given to calculate_evm
+            (CSV or engine column names).
+        sample_size (int): Number of evenly spaced values tried per column.
+
+    Returns:
+        dict: Engine date column name -> (format name, format string), as
+        returned by infer_date_format.
     """
-    Performs EVM calculations on the input data.
+    if isinstance(data, ProjectBatch):
+        # Batch dates are already datetime64, there is no text to infer from
+        return {}
+    formats = {}
+    for col in data.columns:
+        name = COLUMN_MAPPING.get(col, col)
+        if name not in DATE_COLUMNS or pd.api.types.is_datetime64_any_dtype(data[col]):
+            continue
+        text, missing, _, numeric = _split_date_values(data[col])
+        strings = ~missing & ~numeric
+        formats[name] = infer_date_format(text[strings], sample_size) if strings.any() else (None, None)
+    return formats
+
+def parse_date_column(series, sample_size=500, date_format=None):
+    """
+    Converts a column of date strings to datetime in a few vectorized passes.
+
+    Numbers in the Excel serial range become Excel dates. The remaining
+    values are parsed with ``date_format`` or, when it is not given, a
+    sample of them picks the dominant explicit format (ISO, US, EU, ...),
+    which then parses the whole column in one call. Only values that
+    format cannot read fall back to safe_convert_to_datetime one by one.
 
     Args:
-        data (pd.DataFrame): The input project data.
-        global_values (dict): The global values for the calculations.
+        date_format (tuple): (format name, format string) from
+            infer_date_formats, for a column that is parsed in parts.
 
     Returns:
-        pd.DataFrame: The data with the calculated EVM metrics.
+        tuple: (datetime Series, info dict with the chosen 'format' name, the
+        number of 'excel_serial' values, 'residual' values that needed the
+        slow parser, and 'invalid' values that stayed NaT)
     """
+    info = {'format': None, 'excel_serial': 0, 'residual': 0, 'invalid': 0}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        result = pd.to_datetime(series)
+        info['invalid'] = int(result.isna().sum())
+        return result, info
+
+    text, missing, numbers, numeric = _split_date_values(series)
+    result = np.full(len(series), np.datetime64('NaT', 'ns'))
+
+    # Excel serial dates (days since 1899-12-30); other numbers are invalid
+    serial = numeric & (numbers >= EXCEL_SERIAL_RANGE[0]) & (numbers <= EXCEL_SERIAL_RANGE[1])
+    if serial.any():
+        micros = np.round(numbers[serial] * 86400e6).astype('int64').astype('timedelta64[us]')
+        result[serial] = (EXCEL_EPOCH + micros).astype('datetime64[ns]')
+        info['excel_serial'] = int(serial.sum())
+
+    strings = ~missing & ~numeric
+    if strings.any():
+        values = text[strings]
+        name, fmt = date_format if date_format is not None else infer_date_format(values, sample_size)
+        parsed = np.full(len(values), np.datetime64('NaT', 'ns'))
+        if fmt is not None:
+            info['format'] = name
+            parsed = _to_naive_datetimes(values, fmt)
+
+        # Values the dominant format cannot read go through the slow parser
+        residual = np.isnat(parsed)
+        if residual.any():
+            info['residual'] = int(residual.sum())
+            parsed[residual] = _to_naive_datetimes(
+                pd.Series([safe_convert_to_datetime(value) for value in values.to_numpy()[residual]], dtype=object)
+            )
+        result[strings] = parsed
+
+    result = pd.Series(result, index=series.index)
+    info['invalid'] = int((result.isna() & ~missing).sum())
+    return result, info
+
+def has_valid_dates(data, date_formats=None, chunk_size=5000):
+    """
+    True if any row has a valid plan start, plan finish or data date.
+
+    Columns are parsed a slice at a time and the check stops at the first
+    valid date, so it costs one small slice for any real input. Callers
+    that calculate an input in parts run it once on the whole input and
+    pass ``require_valid_dates=False`` to calculate_evm.
+    """
+    if isinstance(data, ProjectBatch):
+        return any((~np.isnat(data.column(col))).any() for col in DATE_COLUMNS if col in data.columns)
+    if date_formats is None:
+        date_formats = infer_date_formats(data)
+    for col in data.columns:
+        name = COLUMN_MAPPING.get(col, col)
+        if name not in DATE_COLUMNS:
+            continue
+        for start in range(0, len(data), chunk_size):
+            values = data[col].iloc[start:start + chunk_size]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = parse_date_column(values.astype(str), date_format=date_formats.get(name))[0]
+            if values.notna().any():
+                return True
+    return False
+
+def convert_date_column(series):
+    """
+    Convert a pandas Series to datetime, handling bad values gracefully.
+    """
+    return parse_date_column(series)[0]
 
+def _normalize_frame(data, diagnostics, date_formats=None):
+    """
+    Brings a user-supplied DataFrame into the engine's layout: every column
+    as strings, pythonic column names, and parsed date columns (in the
+    formats of ``date_formats`` where given, see infer_date_formats).
+    """
     # CRITICAL FIX: Convert all columns to object/string dtype BEFORE copying
     # This prevents OutOfBoundsDatetime errors from datetime columns
     data_dict = {}
-    problematic_columns = []
 
     for col in data.columns:
         try:
-            # Check if this might be a date column with bad values
-            col_lower = str(col).lower()
-            if any(keyword in col_lower for keyword in ['date', 'start', 'finish']):
-                # This is likely a date column - check for problematic values
-                try:
-                    test_numeric = pd.to_numeric(data[col], errors='coerce')
-                    if test_numeric.notna().any():
-                        max_val = test_numeric.max()
-                        if max_val > 50000:
-                            problematic_columns.append({
-                                'column': col,
-                                'max_value': max_val,
-                                'count': (test_numeric > 50000).sum()
-                            })
-                except:
-                    pass
-
             # Convert each column to string/object to break any datetime dtype
             data_dict[col] = data[col].astype(str).values
         except Exception as e:
             # If conversion fails, use raw values
-            import warnings
-            warnings.warn(f"Could not convert column {col} to string: {e}")
+            diagnostics.note(f"Could not convert column {col} to string: {e}")
             try:
                 data_dict[col] = data[col].values
             except:
                 # Last resort - skip this column
                 pass
 
-    # Report problematic columns
-    if problematic_columns:
-        import warnings
-        for prob in problematic_columns:
-            warnings.warn(
-                f"Column '{prob['column']}' has {prob['count']} values > 50,000 "
-                f"(max: {prob['max_value']:.0f}). These are not valid dates and will be treated as missing."
-            )
-
     # Create fresh dataframe from dict (no datetime dtypes)
     data = pd.DataFrame(data_dict, index=data.index)
 
-    # Rename columns to be more pythonic
-    column_mapping = {
-        'Project ID': 'project_id',
-        'Project Name': 'project_name',
-        'Department': 'department',
-        'Budget (BAC)': 'bac',
-        'Actual Cost (AC)': 'ac',
-        'Plan Start Date': 'plan_start_date',
-        'Plan Finish Date': 'plan_finish_date',
-        'Data Date': 'data_date',
-        'Earned Value (EV)': 'ev',
-        'Planned Value (PV)': 'pv',
-        'Manual EV': 'manual_ev',
-        'Manual PV': 'manual_pv',
-        'Curve': 'curve',
-        'Beta': 'beta',
-        'Alpha': 'alpha',
-        'Inflation Rate': 'inflation_rate'
-    }
-
-    # Only rename columns that exist
-    existing_mappings = {k: v for k, v in column_mapping.items() if k in data.columns}
+    # Rename columns to be more pythonic (only those that exist)
+    existing_mappings = {k: v for k, v in COLUMN_MAPPING.items() if k in data.columns}
     data = data.rename(columns=existing_mappings)
 
     # Convert date columns safely
-    date_columns = ['plan_start_date', 'plan_finish_date', 'data_date']
-
-    for col in date_columns:
+    for col in DATE_COLUMNS:
         if col in data.columns:
-            # Use our safe converter
-            data[col] = convert_date_column(data[col])
-        else:
+            data[col], info = parse_date_column(data[col], date_format=(date_formats or {}).get(col))
+            diagnostics.record_date_format(col, info)
+
+    return data
+
+def calculate_evm(data, global_values, return_diagnostics=False, price_index=None, fx_rates=None,
+                  outputs=None, date_formats=None, require_valid_dates=True):
+    """
+    Performs EVM calculations on the input data.
+
+    Args:
+        data (pd.DataFrame or ProjectBatch): The input project data. A
+            batch must already hold datetime64 dates; only a DataFrame has
+            its text dates parsed.
+        global_values (dict): The global values for the calculations.
+        return_diagnostics (bool): Also return the EVMDiagnostics collected
+            while calculating (invalid dates, negative durations, missing
+            BAC, EV > AC).
+        price_index (PriceIndex): Optional monthly price index replacing the
+            constant inflation rate for the projects it covers.
+        fx_rates (FxRates): Optional exchange rates; money columns are
+            converted to its reporting currency at each row's data date.
+        outputs (list): Metric columns to add, or None for all. Only these
+            and the metrics they depend on are computed (see
+            core.kernels.METRIC_DEPENDENCIES).
+        date_formats (dict): Formats of the text date columns from
+            infer_date_formats, when ``data`` is one part of a larger input.
+            Inferred from ``data`` itself when omitted.
+        require_valid_dates (bool): Raise ValueError when no row has a
+            valid date. Callers that calculate an input in parts check the
+            whole input with has_valid_dates instead and pass False, so a
+            part without valid dates gives rows without metrics.
+
+    Returns:
+        pd.DataFrame: The data with the calculated EVM metrics, or a
+        (DataFrame, EVMDiagnostics) tuple if return_diagnostics is True.
+    """
+    diagnostics = EVMDiagnostics()
+
+    if isinstance(data, ProjectBatch):
+        # Typed batches already use the engine's column names and dtypes, so
+        # the string conversion, rename and date parsing passes are skipped
+        data = data.to_dataframe()
+        for col in DATE_COLUMNS:
+            if col in data.columns:
+                data[col], info = parse_date_column(data[col])
+                diagnostics.record_date_format(col, info)
+    else:
+        data = _normalize_frame(data, diagnostics, date_formats)
+
+    for col in DATE_COLUMNS:
+        if col not in data.columns:
             raise ValueError(f"Required date column '{col}' not found in data")
 
     # Validate that we have at least some valid dates
     valid_dates = 0
-    for col in date_columns:
-        valid_dates += data[col].notna().sum()
-
-    if valid_dates == 0:
-        raise ValueError(
-            "No valid dates found in data. Please check your date columns. "
-            "Expected formats: YYYY-MM-DD, MM/DD/YYYY, or Excel serial numbers (1-50000)"
-        )
-
-    # Duration and Value Metrics
-    data['actual_duration_months'] = (data['data_date'] - data['plan_start_date']).dt.days / 30.44
-    data['original_duration_months'] = (data['plan_finish_date'] - data['plan_start_date']).dt.days / 30.44
+    for col in DATE_COLUMNS:
+        invalid = data[col].isna().to_numpy()
+        diagnostics.add('invalid_date', invalid, data.index, col)
+        valid_dates += len(invalid) - invalid.sum()
+
+    if valid_dates == 0 and require_valid_dates:
+        raise ValueError(NO_VALID_DATES_MESSAGE)
+
+    # Duration and Value Metrics: calendar months, or working days when calendars are configured
+    start = data['plan_start_date'].to_numpy()
+    calendars = build_calendars(global_values.get('calendars'))
+    if calendars is None:
+        codes = 0
+        actual_duration = duration_months(start, data['data_date'].to_numpy())
+        original_duration = duration_months(start, data['plan_finish_date'].to_numpy())
+    else:
+        column = global_values.get('calendar_column')
+        if column and column in data.columns:
+            codes, unknown = calendar_codes(data[column], calendars)
+            if unknown:
+                diagnostics.note(f"{unknown} rows name an unknown calendar and use '{calendars[0].name}'")
+        else:
+            codes = np.zeros(len(data), dtype=np.int64)
+        actual_duration = working_duration_months(start, data['data_date'].to_numpy(), calendars, codes)
+        original_duration = working_duration_months(start, data['plan_finish_date'].to_numpy(), calendars, codes)
 
-    # Replace negative or zero durations with NaN
-    data.loc[data['actual_duration_months'] <= 0, 'actual_duration_months'] = np.nan
-    data.loc[data['original_duration_months'] <= 0, 'original_duration_months'] = np.nan
+    # Negative or zero durations are treated as missing by the kernel
+    diagnostics.add('negative_duration', actual_duration <= 0, data.index, 'actual_duration_months')
+    diagnostics.add('negative_duration', original_duration <= 0, data.index, 'original_duration_months')
 
     # Fill missing optional columns with global values
     for col, value in global_values.items():
+        if col in ENGINE_SETTINGS:
+            continue
         if col in data.columns:
             # Convert to numeric if it's a numeric global value
             if col in ['alpha', 'beta', 'inflation_rate']:
@@ -186,183 +406,72 @@ def calculate_evm(data, global_values):
         if col in data.columns:
             data[col] = pd.to_numeric(data[col], errors='coerce')
 
-    # Present Value Calculation
-    # Convert AC to constant dollars by adjusting for inflation over the actual duration
-    # This represents the "real" value of money spent, accounting for inflation
-    annual_inflation_rate = data['inflation_rate'] / 100
+    # Money in the reporting currency, one as-of rate lookup for all rows
+    if fx_rates is not None:
+        fx_rate = fx_rates.rates_for(data)
+        diagnostics.add('missing_fx_rate', np.isnan(fx_rate), data.index, fx_rates.match_column or '')
+        for col in MONEY_COLUMNS:
+            if col in data.columns:
+                data[col] = pd.to_numeric(data[col], errors='coerce') * fx_rate
+        data['fx_rate'] = fx_rate
 
-    # Calculate the total inflation factor over the actual duration
-    # If actual_duration is in months, convert to years for annual inflation
-    duration_years = data['actual_duration_months'] / 12
+    diagnostics.add('missing_bac', data['bac'].isna().to_numpy(), data.index, 'bac')
 
-    # Inflation factor: (1 + r)^t
-    # Present Value = AC / inflation_factor
-    # This gives us the value in "baseline" or "constant" dollars
-    inflation_factor = (1 + annual_inflation_rate) ** duration_years
-
-    # When inflation = 0: inflation_factor = 1, so PV = AC
-    # When inflation > 0: inflation_factor > 1, so PV < AC
-    data['present_value'] = data['ac'] / inflation_factor
-
-    # Handle edge cases
-    data['present_value'] = data['present_value'].fillna(data['ac'])
-
-    # Planned Value (PV)
-    # ALWAYS calculate PV from BAC and time unless use_manual_pv is explicitly enabled
+    # PV and EV are ALWAYS calculated unless the manual columns are explicitly enabled
+    manual_pv = None
     if global_values.get('use_manual_pv') and 'manual_pv' in data.columns:
-        data['pv'] = pd.to_numeric(data['manual_pv'], errors='coerce')
-        import warnings
-        warnings.warn("Using manual PV from 'manual_pv' column as per global settings")
-    else:
-        t = data['actual_duration_months'] / data['original_duration_months']
-        t = t.fillna(0).clip(0, 1)  # Ensure t is between 0 and 1
-
-        if global_values.get('curve') == 'linear':
-            data['pv'] = data['bac'] * t
-        else:  # s-curve
-            # Calculate s-curve for each row
-            pv_values = []
-            for idx in data.index:
-                try:
-                    alpha = data.loc[idx, 'alpha']
-                    beta = data.loc[idx, 'beta']
-                    bac = data.loc[idx, 'bac']
-                    t_val = t.loc[idx]
-
-                    if pd.notna(alpha) and pd.notna(beta) and pd.notna(bac) and pd.notna(t_val):
-                        pv_val = bac * scurve_cdf(t_val, alpha, beta)
-                        pv_values.append(pv_val)
-                    else:
-                        pv_values.append(np.nan)
-                except:
-                    pv_values.append(np.nan)
-
-            data['pv'] = pv_values
-
-    # Ensure PV is numeric
-    data['pv'] = pd.to_numeric(data['pv'], errors='coerce')
-
-    # Earned Value (EV)
-    # ALWAYS calculate EV from AC unless use_manual_ev is explicitly enabled
+        manual_pv = pd.to_numeric(data['manual_pv'], errors='coerce').to_numpy(dtype=float)
+        diagnostics.note("Using manual PV from 'manual_pv' column as per global settings")
+
+    manual_ev = None
     if global_values.get('use_manual_ev') and 'manual_ev' in data.columns:
-        data['ev'] = pd.to_numeric(data['manual_ev'], errors='coerce')
-        import warnings
-        warnings.warn("Using manual EV from 'manual_ev' column as per global settings")
-    else:
-        # EV is the present value of AC, discounted by inflation
-        # When inflation = 0, EV = AC
-        # When inflation > 0, EV < AC (discounted)
-        data['ev'] = data['present_value'].copy()
-
-        import warnings
-        warnings.warn(f"Calculating EV from AC. Sample: AC={data['ac'].iloc[0]:.2f}, inflation={data['inflation_rate'].iloc[0]:.2f}%, duration={data['actual_duration_months'].iloc[0]:.2f} months, EV={data['ev'].iloc[0]:.2f}")
-
-        # Debug: Check that EV <= AC when inflation >= 0
-        problematic_rows = data[(data['ev'] > data['ac']) & (data['inflation_rate'] >= 0)]
-        if len(problematic_rows) > 0:
-            max_diff = (problematic_rows['ev'] - problematic_rows['ac']).max()
-            warnings.warn(f"WARNING: Found {len(problematic_rows)} rows where EV > AC with non-negative inflation! Max difference: {max_diff:.2f}")
-            # Show sample for debugging
-            sample = problematic_rows[['ac', 'present_value', 'ev', 'inflation_rate', 'actual_duration_months']].head(3)
-            warnings.warn(f"Sample problematic rows:\n{sample}")
-
-    # Ensure EV is numeric
-    data['ev'] = pd.to_numeric(data['ev'], errors='coerce')
-
-    # EVM Core Metrics
-    data['percent_complete'] = np.where(data['bac'] > 0, (data['ev'] / data['bac']) * 100, np.nan)
-    data['cv'] = data['ev'] - data['ac']
-    data['sv'] = data['ev'] - data['pv']
-
-    # Performance Indices (avoid division by zero)
-    data['cpi'] = np.where(data['ac'] > 0, data['ev'] / data['ac'], np.nan)
-    data['spi'] = np.where(data['pv'] > 0, data['ev'] / data['pv'], np.nan)
-    data['tcpi'] = np.where(
-        (data['bac'] - data['ac']) > 0,
-        (data['bac'] - data['ev']) / (data['bac'] - data['ac']),
-        np.nan
+        manual_ev = pd.to_numeric(data['manual_ev'], errors='coerce').to_numpy(dtype=float)
+        diagnostics.note("Using manual EV from 'manual_ev' column as per global settings")
+
+    index_codes = None
+    if price_index is not None:
+        index_codes = price_index.series_codes(data)
+        uncovered = int((index_codes < 0).sum())
+        if uncovered:
+            diagnostics.note(f"{uncovered} rows have no price index series and use the constant inflation rate")
+
+    metrics = compute_metrics(
+        bac=data['bac'].to_numpy(dtype=float),
+        ac=data['ac'].to_numpy(dtype=float),
+        start=start,
+        finish=data['plan_finish_date'].to_numpy(),
+        data_date=data['data_date'].to_numpy(),
+        curve=global_values.get('curve'),
+        alpha=data['alpha'].to_numpy(dtype=float) if 'alpha' in data.columns else np.nan,
+        beta=data['beta'].to_numpy(dtype=float) if 'beta' in data.columns else np.nan,
+        inflation_rate=data['inflation_rate'].to_numpy(dtype=float),
+        manual_pv=manual_pv,
+        manual_ev=manual_ev,
+        actual_duration=actual_duration,
+        original_duration=original_duration,
+        eac_methods=global_values.get('eac_methods', DEFAULT_EAC_METHODS),
+        price_index=price_index,
+        index_codes=index_codes,
+        calendars=calendars,
+        calendar_codes=codes,
+        outputs=outputs,
     )
 
-    # Forecasting
-    data['eac'] = np.where(data['cpi'] > 0, data['bac'] / data['cpi'], np.nan)
-    data['etc'] = data['eac'] - data['ac']
-    data['vac'] = data['bac'] - data['eac']
-
-    # Earned Schedule Metrics
-    if global_values.get('curve') == 'linear':
-        data['es'] = np.where(
-            data['bac'] > 0,
-            (data['ev'] / data['bac']) * data['original_duration_months'],
-            np.nan
-        )
-    else:  # s-curve (using approximation)
-        data['es'] = np.where(
-            data['bac'] > 0,
-            (data['ev'] / data['bac']) * data['original_duration_months'],
-            np.nan
+    if manual_ev is None and 'ev' in metrics:
+        # Sanity check: EV (discounted AC) <= AC whenever inflation >= 0
+        diagnostics.add(
+            'ev_exceeds_ac',
+            (metrics['ev'] > data['ac'].to_numpy()) & (data['inflation_rate'].to_numpy() >= 0),
+            data.index,
+            'ev'
         )
 
-    data['spie'] = np.where(
-        data['actual_duration_months'] > 0,
-        data['es'] / data['actual_duration_months'],
-        np.nan
-    )
-    data['tve'] = data['es'] - data['actual_duration_months']
-
-    data['ld'] = np.where(
-        data['spie'] > 0,
-        data['original_duration_months'] / data['spie'],
-        np.nan
-    )
-
-    # Cap likely duration at 2.5x original
-    data['ld'] = np.minimum(data['ld'], 2.5 * data['original_duration_months'])
-
-    # Calculate likely completion date
-    data['likely_completion'] = pd.NaT
-    for idx in data.index:
-        try:
-            start_date = data.loc[idx, 'plan_start_date']
-            ld = data.loc[idx, 'ld']
-            if pd.notna(start_date) and pd.notna(ld):
-                data.loc[idx, 'likely_completion'] = start_date + pd.Timedelta(days=ld * 30.44)
-        except:
-            pass
-
-    # Percentage Metrics
-    data['percent_budget_used'] = np.where(
-        data['bac'] > 0,
-        (data['ac'] / data['bac']) * 100,
-        np.nan
-    )
-    data['percent_time_used'] = np.where(
-        data['original_duration_months'] > 0,
-        (data['actual_duration_months'] / data['original_duration_months']) * 100,
-        np.nan
-    )
-
-    # Advanced Financial Metrics
-    # Calculate present value of BAC over original and likely durations
-    with np.errstate(invalid='ignore', divide='ignore'):
-        # Planned value: BAC adjusted for inflation over original duration
-        duration_years_planned = data['original_duration_months'] / 12
-        inflation_factor_planned = (1 + annual_inflation_rate) ** duration_years_planned
-        data['planned_value_project'] = data['bac'] / inflation_factor_planned
-
-        # Likely value: BAC adjusted for inflation over likely duration
-        duration_years_likely = data['ld'] / 12
-        inflation_factor_likely = (1 + annual_inflation_rate) ** duration_years_likely
-        data['likely_value_project'] = data['bac'] / inflation_factor_likely
-
-    data['percent_present_value_project'] = np.where(
-        data['bac'] > 0,
-        (data['planned_value_project'] / data['bac']) * 100,
-        np.nan
-    )
-    data['percent_likely_value_project'] = np.where(
-        data['bac'] > 0,
-        (data['likely_value_project'] / data['bac']) * 100,
-        np.nan
-    )
+    # Overwrite input columns such as pv/ev in place, then add the new
+    # metric columns in one concat instead of one by one
+    for col in [col for col in metrics if col in data.columns]:
+        data[col] = metrics.pop(col)
+    data = pd.concat([data, pd.DataFrame(metrics, index=data.index)], axis=1)
 
+    if return_diagnostics:
+        return data, diagnostics
     return data
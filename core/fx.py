@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from core.evm_engine import convert_date_column
+
+
+class FxRates:
+    """
+    Dated exchange rates into one reporting currency.
+
+    Rates are sorted once by currency and date into a single array of
+    (currency, day) keys, so converting any number of rows is one as-of
+    lookup: each row takes its currency's latest rate on or before its
+    data date. Values already in the reporting currency convert at 1.
+
+    Args:
+        dates: Date of each rate.
+        currencies: Currency code of each rate.
+        rates: Units of the reporting currency per unit of the currency.
+        reporting_currency (str): Currency all values are converted to.
+        match_column (str): Project data column with each project's currency.
+    """
+
+    def __init__(self, dates, currencies, rates, reporting_currency, match_column=None):
+        dates = np.asarray(dates).astype('datetime64[D]')
+        rates = np.asarray(rates, dtype=float)
+        currencies = pd.Series(currencies).astype(str).str.strip().str.upper().to_numpy()
+        valid = ~np.isnat(dates) & np.isfinite(rates) & (rates > 0)
+        if not valid.any():
+            raise ValueError("The FX table has no dated positive rates")
+
+        codes, keys = pd.factorize(currencies[valid])
+        days = dates[valid].astype(np.int64)
+        order = np.lexsort((days, codes))
+        self.keys = list(keys)
+        self.days = days[order]
+        self.rates = rates[valid][order]
+        self.codes = codes[order]
+        self.reporting_currency = str(reporting_currency).strip().upper()
+        self.match_column = match_column
+
+        self._base = int(self.days.min())
+        self._span = int(self.days.max()) - self._base + 2
+        self._sort_keys = self.codes * self._span + (self.days - self._base)
+        counts = np.bincount(self.codes, minlength=len(self.keys))
+        self._first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    @classmethod
+    def from_frame(cls, table, date_column, currency_column, rate_column, reporting_currency,
+                   inverse=False, match_column=None):
+        """
+        Builds FX rates from a table with one row per date and currency.
+
+        Args:
+            table (pd.DataFrame): The uploaded table.
+            inverse (bool): Rates are quoted as units of the currency per
+                unit of the reporting currency (e.g. USD/EUR = 1.08 for a
+                EUR reporting currency) and are inverted.
+        """
+        rates = pd.to_numeric(table[rate_column], errors='coerce').to_numpy(dtype=float)
+        if inverse:
+            with np.errstate(divide='ignore'):
+                rates = 1 / rates
+        return cls(
+            convert_date_column(table[date_column]).to_numpy(),
+            table[currency_column],
+            rates,
+            reporting_currency,
+            match_column=match_column,
+        )
+
+    def __len__(self):
+        return len(self.rates)
+
+    @property
+    def currencies(self):
+        return sorted(set(self.keys) | {self.reporting_currency})
+
+    def rate(self, currencies, dates):
+        """
+        As-of rate for each row (NaN where the currency is unknown or has no
+        rate on or before the date; missing currencies count as the
+        reporting currency).
+        """
+        currencies = pd.Series(currencies)
+        missing_currency = currencies.isna().to_numpy()
+        currencies = currencies.astype(str).str.strip().str.upper()
+        missing_currency = missing_currency | currencies.isin(['', 'NAN', 'NONE', '<NA>']).to_numpy()
+        currencies = currencies.to_numpy(dtype=object)
+        dates = np.asarray(dates).astype('datetime64[D]')
+        dates = np.broadcast_to(dates, currencies.shape)
+
+        codes = pd.Index(self.keys).get_indexer(currencies)
+        known = (codes >= 0) & ~np.isnat(dates)
+        safe_codes = np.where(known, codes, 0)
+        offsets = np.clip(np.where(known, dates.astype(np.int64), self._base) - self._base, -1, self._span - 1)
+        positions = np.searchsorted(self._sort_keys, safe_codes * self._span + offsets, side='right') - 1
+        # No rate on or before the date: the search landed before the currency's first rate
+        found = known & (positions >= self._first[safe_codes])
+
+        result = np.where(found, self.rates[np.clip(positions, 0, None)], np.nan)
+        home = (currencies == self.reporting_currency) | missing_currency
+        return np.where(home, 1.0, result)
+
+    def rates_for(self, data):
+        """
+        Rate of each project row, from its currency column and data date.
+
+        Raises:
+            ValueError: No currency column is set, or the data lacks it.
+        """
+        if self.match_column is None:
+            raise ValueError("Currency conversion needs the project data column with each project's currency")
+        if self.match_column not in data.columns:
+            raise ValueError(f"Currency column '{self.match_column}' is not in the project data")
+        return self.rate(data[self.match_column], data['data_date'].to_numpy())
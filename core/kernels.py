@@ -0,0 +1,364 @@
+import numpy as np
+from scipy.special import betainc
+
+from core.calendars import add_working_months, working_duration_months
+
+DAYS_PER_MONTH = 30.44
+LIKELY_DURATION_CAP = 2.5
+
+METRIC_COLUMNS = [
+    'actual_duration_months', 'original_duration_months',
+    'present_value', 'pv', 'ev',
+    'percent_complete', 'cv', 'sv', 'cpi', 'spi', 'tcpi',
+    'eac', 'etc', 'vac',
+    'es', 'spie', 'tve', 'ld', 'likely_completion',
+    'percent_budget_used', 'percent_time_used',
+    'planned_value_project', 'likely_value_project',
+    'percent_present_value_project', 'percent_likely_value_project',
+]
+
+# Forecast methods, by output column. The cost forecasts are alternatives
+# to eac = BAC / CPI; the IEAC(t) variants forecast the duration in months
+# with earned schedule, dividing the remaining schedule (PD - ES) by a
+# performance factor.
+EAC_METHODS = {
+    'eac_ac_remaining': 'AC + (BAC - EV)',
+    'eac_cpi_spi': 'AC + (BAC - EV) / (CPI x SPI)',
+    'eac_spie': 'AC + (BAC - EV) / SPIe',
+    'ieac_t': 'AT + (PD - ES)',
+    'ieac_t_spie': 'AT + (PD - ES) / SPIe',
+    'ieac_t_cpi_spie': 'AT + (PD - ES) / (CPI x SPIe)',
+}
+DEFAULT_EAC_METHODS = tuple(EAC_METHODS)
+COST_FORECASTS = ('eac_ac_remaining', 'eac_cpi_spi', 'eac_spie')
+FORECAST_CHECK_COLUMNS = ['tcpi_cpi_gap', 'bac_unattainable', 'eac_low', 'eac_high', 'optimistic_eacs']
+# TCPI above CPI by more than this means BAC is no longer achievable
+TCPI_TOLERANCE = 0.1
+
+# What each output is computed from besides the inputs, in computation
+# order. Callers can ask for a subset of outputs and only those and their
+# ancestors are computed. The forecast columns are computed together by
+# forecast_metrics.
+FORECAST_INPUTS = ('ev', 'cpi', 'spi', 'tcpi', 'eac', 'es', 'spie',
+                   'actual_duration_months', 'original_duration_months')
+METRIC_DEPENDENCIES = {
+    'actual_duration_months': (),
+    'original_duration_months': (),
+    'present_value': ('actual_duration_months',),
+    'pv': ('actual_duration_months', 'original_duration_months'),
+    'ev': ('present_value',),
+    'percent_complete': ('ev',),
+    'cv': ('ev',),
+    'sv': ('ev', 'pv'),
+    'cpi': ('ev',),
+    'spi': ('ev', 'pv'),
+    'tcpi': ('ev',),
+    'eac': ('cpi',),
+    'etc': ('eac',),
+    'vac': ('eac',),
+    'es': ('ev', 'original_duration_months'),
+    'spie': ('es', 'actual_duration_months'),
+    'tve': ('es', 'actual_duration_months'),
+    'ld': ('spie', 'original_duration_months'),
+    'likely_completion': ('ld',),
+    'percent_budget_used': (),
+    'percent_time_used': ('actual_duration_months', 'original_duration_months'),
+    'planned_value_project': ('original_duration_months',),
+    'likely_value_project': ('ld', 'likely_completion'),
+    'percent_present_value_project': ('planned_value_project',),
+    'percent_likely_value_project': ('likely_value_project',),
+    **{column: FORECAST_INPUTS for column in [*EAC_METHODS, *FORECAST_CHECK_COLUMNS]},
+}
+
+
+def as_datetime(values):
+    """Array of datetime64 values (any unit) from dates, strings or datetime64 input."""
+    values = np.asarray(values)
+    if values.dtype.kind != 'M':
+        values = values.astype('datetime64[ns]')
+    return values
+
+
+def as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def duration_months(start, end):
+    """
+    Whole days from start to end divided by the average month length.
+
+    Days are floored like pandas' ``Timedelta.days``; missing dates give NaN.
+    Zero and negative durations are returned as is.
+    """
+    days = np.floor((as_datetime(end) - as_datetime(start)) / np.timedelta64(1, 'D'))
+    return days / DAYS_PER_MONTH
+
+
+def scurve_fraction(t, alpha, beta):
+    """Beta-distribution CDF (regularized incomplete beta) used for s-curve PV."""
+    return betainc(alpha, beta, t)
+
+
+def required_metrics(outputs):
+    """
+    The given outputs and every metric they depend on (see
+    METRIC_DEPENDENCIES), in computation order.
+
+    Raises:
+        ValueError: For names that are not outputs of compute_metrics.
+    """
+    unknown = [name for name in outputs if name not in METRIC_DEPENDENCIES]
+    if unknown:
+        raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+
+    needed = set()
+    pending = list(outputs)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(METRIC_DEPENDENCIES[name])
+    return [name for name in METRIC_DEPENDENCIES if name in needed]
+
+
+def _divide(numerator, denominator, condition):
+    """numerator / denominator where condition holds, NaN elsewhere."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(condition, numerator / denominator, np.nan)
+
+
+def forecast_metrics(bac, ac, ev, cpi, spi, tcpi, eac, es, spie, actual_duration, original_duration,
+                     methods=DEFAULT_EAC_METHODS):
+    """
+    Forecasts by several EAC methods and composite TCPI checks.
+
+    Works on the arrays compute_metrics has already produced, so each extra
+    method is a few array operations. The remaining work (BAC - EV) and
+    remaining schedule (PD - ES) are computed once and shared by all methods.
+
+    Checks:
+        tcpi_cpi_gap: TCPI - CPI, the efficiency improvement needed to finish on BAC.
+        bac_unattainable: the gap exceeds TCPI_TOLERANCE.
+        eac_low, eac_high: range of the cost forecasts (eac and the selected methods).
+        optimistic_eacs: how many of those forecasts need a TCPI above CPI
+            by more than TCPI_TOLERANCE to be met.
+
+    Args:
+        methods: Keys of EAC_METHODS to compute.
+
+    Returns:
+        dict: One array per selected method, then the FORECAST_CHECK_COLUMNS.
+    """
+    unknown = [method for method in methods if method not in EAC_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown EAC method(s): {', '.join(unknown)}. Available: {', '.join(EAC_METHODS)}")
+
+    remaining_work = bac - ev
+    remaining_schedule = original_duration - es
+    formulas = {
+        'eac_ac_remaining': lambda: ac + remaining_work,
+        'eac_cpi_spi': lambda: ac + _divide(remaining_work, cpi * spi, (cpi * spi) > 0),
+        'eac_spie': lambda: ac + _divide(remaining_work, spie, spie > 0),
+        'ieac_t': lambda: actual_duration + remaining_schedule,
+        'ieac_t_spie': lambda: actual_duration + _divide(remaining_schedule, spie, spie > 0),
+        'ieac_t_cpi_spie': lambda: actual_duration + _divide(remaining_schedule, cpi * spie, (cpi * spie) > 0),
+    }
+    forecasts = {method: formulas[method]() for method in EAC_METHODS if method in methods}
+
+    # TCPI needed to finish on each cost forecast: remaining work / remaining funds
+    cost_forecasts = [eac] + [forecasts[method] for method in COST_FORECASTS if method in forecasts]
+    optimistic = np.zeros(np.broadcast(cpi, *cost_forecasts).shape, dtype=np.int64)
+    for forecast in cost_forecasts:
+        tcpi_to_forecast = _divide(remaining_work, forecast - ac, (forecast - ac) > 0)
+        optimistic += tcpi_to_forecast - cpi > TCPI_TOLERANCE
+    stacked = np.stack(np.broadcast_arrays(*cost_forecasts))
+    valid = np.isfinite(stacked)
+
+    forecasts['tcpi_cpi_gap'] = tcpi - cpi
+    forecasts['bac_unattainable'] = forecasts['tcpi_cpi_gap'] > TCPI_TOLERANCE
+    forecasts['eac_low'] = np.where(valid.any(axis=0), np.where(valid, stacked, np.inf).min(axis=0), np.nan)
+    forecasts['eac_high'] = np.where(valid.any(axis=0), np.where(valid, stacked, -np.inf).max(axis=0), np.nan)
+    forecasts['optimistic_eacs'] = optimistic
+    return forecasts
+
+
+def compute_metrics(bac, ac, start, finish, data_date, curve='s-curve', alpha=2.0, beta=2.0,
+                    inflation_rate=0.0, manual_pv=None, manual_ev=None,
+                    actual_duration=None, original_duration=None, eac_methods=DEFAULT_EAC_METHODS,
+                    price_index=None, index_codes=None, calendars=None, calendar_codes=0,
+                    outputs=None):
+    """
+    Computes all EVM metrics for arrays (or scalars) of project values.
+
+    This is the EVM math behind calculate_evm, without any DataFrame
+    overhead, so it can also be called directly for a single project. All
+    array arguments broadcast against each other, so a single global
+    ``alpha`` or ``inflation_rate`` can be combined with per-project BAC and
+    dates.
+
+    Args:
+        bac, ac: Budget at completion and actual cost.
+        start, finish, data_date: Plan start, plan finish and data dates
+            (datetime64 arrays, or anything NumPy can convert to them).
+        curve (str): 'linear' or any other value for the beta s-curve.
+        alpha, beta: S-curve shape parameters.
+        inflation_rate: Annual inflation rate in percent.
+        manual_pv, manual_ev: If given, used as PV / EV instead of the
+            calculated values.
+        actual_duration, original_duration: Precomputed durations in months
+            (zero or negative values are treated as missing). Calculated
+            from the dates when omitted.
+        eac_methods: Keys of EAC_METHODS to forecast with, besides BAC / CPI
+            (see forecast_metrics).
+        price_index (PriceIndex): Monthly price index used instead of the
+            constant inflation rate for present value and the inflation
+            adjusted BAC figures, for rows whose ``index_codes`` (from
+            PriceIndex.series_codes) name a series.
+        calendars (list of WorkCalendar): Working calendars. When given,
+            durations count working days (see working_duration_months) and
+            the likely completion date is offset in working days.
+        calendar_codes: Calendar of each row, as positions in ``calendars``.
+        outputs: Names of the metrics to return, or None for all. Only
+            these and the metrics they depend on (METRIC_DEPENDENCIES) are
+            computed. Forecast methods not in ``eac_methods`` are not
+            returned.
+
+    Returns:
+        dict: Metric name -> NumPy array, in METRIC_COLUMNS order, followed
+        by the selected forecasts and the FORECAST_CHECK_COLUMNS.
+    """
+    needed = set(METRIC_DEPENDENCIES if outputs is None else required_metrics(outputs))
+    metrics = {}
+
+    bac = as_float(bac)
+    ac = as_float(ac)
+    start = as_datetime(start)
+    inflation_rate = as_float(inflation_rate)
+
+    # Duration and Value Metrics
+    if actual_duration is None and 'actual_duration_months' in needed:
+        actual_duration = (duration_months(start, data_date) if calendars is None
+                           else working_duration_months(start, data_date, calendars, calendar_codes))
+    if original_duration is None and 'original_duration_months' in needed:
+        original_duration = (duration_months(start, finish) if calendars is None
+                             else working_duration_months(start, finish, calendars, calendar_codes))
+
+    # Replace negative or zero durations with NaN
+    if 'actual_duration_months' in needed:
+        actual_duration = as_float(actual_duration)
+        metrics['actual_duration_months'] = np.where(actual_duration > 0, actual_duration, np.nan)
+    if 'original_duration_months' in needed:
+        original_duration = as_float(original_duration)
+        metrics['original_duration_months'] = np.where(original_duration > 0, original_duration, np.nan)
+    actual_duration = metrics.get('actual_duration_months')
+    original_duration = metrics.get('original_duration_months')
+
+    # Present Value: AC in constant dollars, (1 + r)^years over the actual duration
+    annual_inflation_rate = inflation_rate / 100
+    def price_growth(end, months):
+        """Price growth from the plan start: the index where it applies, else the constant rate."""
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            constant = (1 + annual_inflation_rate) ** (months / 12)
+            if price_index is None:
+                return constant
+            indexed = price_index.factor(start, end, index_codes, inflation_rate)
+            return np.where(np.isnan(indexed) | np.isnan(months), constant, indexed)
+
+    if 'present_value' in needed:
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            inflation_factor = price_growth(data_date, actual_duration)
+            present_value = ac / inflation_factor
+        metrics['present_value'] = np.where(np.isnan(present_value), ac, present_value)
+
+    # Planned Value (PV)
+    if 'pv' in needed:
+        if manual_pv is not None:
+            metrics['pv'] = as_float(manual_pv)
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                t = actual_duration / original_duration
+            t = np.clip(np.nan_to_num(t, nan=0.0), 0, 1)
+            if curve == 'linear':
+                metrics['pv'] = bac * t
+            else:
+                metrics['pv'] = bac * scurve_fraction(t, as_float(alpha), as_float(beta))
+
+    # Earned Value (EV): present value of AC unless entered manually
+    if 'ev' in needed:
+        metrics['ev'] = as_float(manual_ev) if manual_ev is not None else metrics['present_value']
+    ev, pv = metrics.get('ev'), metrics.get('pv')
+
+    # EVM Core Metrics
+    if 'percent_complete' in needed:
+        metrics['percent_complete'] = _divide(ev, bac, bac > 0) * 100
+    if 'cv' in needed:
+        metrics['cv'] = ev - ac
+    if 'sv' in needed:
+        metrics['sv'] = ev - pv
+
+    # Performance Indices (avoid division by zero)
+    if 'cpi' in needed:
+        metrics['cpi'] = _divide(ev, ac, ac > 0)
+    if 'spi' in needed:
+        metrics['spi'] = _divide(ev, pv, pv > 0)
+    if 'tcpi' in needed:
+        metrics['tcpi'] = _divide(bac - ev, bac - ac, (bac - ac) > 0)
+
+    # Forecasting
+    if 'eac' in needed:
+        cpi = metrics['cpi']
+        metrics['eac'] = _divide(bac, cpi, cpi > 0)
+    if 'etc' in needed:
+        metrics['etc'] = metrics['eac'] - ac
+    if 'vac' in needed:
+        metrics['vac'] = bac - metrics['eac']
+
+    # Earned Schedule Metrics (linear approximation for both curve types)
+    if 'es' in needed:
+        metrics['es'] = _divide(ev, bac, bac > 0) * original_duration
+    if 'spie' in needed:
+        metrics['spie'] = _divide(metrics['es'], actual_duration, actual_duration > 0)
+    if 'tve' in needed:
+        metrics['tve'] = metrics['es'] - actual_duration
+    if 'ld' in needed:
+        spie = metrics['spie']
+        ld = _divide(original_duration, spie, spie > 0)
+        # Cap likely duration at 2.5x original
+        metrics['ld'] = np.minimum(ld, LIKELY_DURATION_CAP * original_duration)
+
+    # Likely completion date
+    if 'likely_completion' in needed:
+        if calendars is None:
+            offset = (metrics['ld'] * DAYS_PER_MONTH * 86400e9).astype('timedelta64[ns]')
+            metrics['likely_completion'] = start.astype('datetime64[ns]') + offset
+        else:
+            metrics['likely_completion'] = add_working_months(start, metrics['ld'], calendars, calendar_codes)
+
+    # Percentage Metrics
+    if 'percent_budget_used' in needed:
+        metrics['percent_budget_used'] = _divide(ac, bac, bac > 0) * 100
+    if 'percent_time_used' in needed:
+        metrics['percent_time_used'] = _divide(actual_duration, original_duration, original_duration > 0) * 100
+
+    # Advanced Financial Metrics: BAC adjusted for inflation over the
+    # original and likely durations
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        if 'planned_value_project' in needed:
+            metrics['planned_value_project'] = bac / price_growth(finish, original_duration)
+        if 'likely_value_project' in needed:
+            metrics['likely_value_project'] = bac / price_growth(metrics['likely_completion'], metrics['ld'])
+
+    if 'percent_present_value_project' in needed:
+        metrics['percent_present_value_project'] = _divide(metrics['planned_value_project'], bac, bac > 0) * 100
+    if 'percent_likely_value_project' in needed:
+        metrics['percent_likely_value_project'] = _divide(metrics['likely_value_project'], bac, bac > 0) * 100
+
+    if needed.intersection([*EAC_METHODS, *FORECAST_CHECK_COLUMNS]):
+        metrics.update(forecast_metrics(
+            bac, ac, ev, metrics['cpi'], metrics['spi'], metrics['tcpi'], metrics['eac'], metrics['es'],
+            metrics['spie'], actual_duration, original_duration, eac_methods
+        ))
+
+    if outputs is None:
+        return metrics
+    return {name: metrics[name] for name in METRIC_DEPENDENCIES if name in outputs and name in metrics}
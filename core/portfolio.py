@@ -0,0 +1,281 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+HEALTH_LEVELS = ['On Track', 'At Risk', 'Critical', 'No Data']
+CHANGE_STATUSES = ['New', 'Completed', 'Dropped', 'Continuing']
+# Metrics compared between two data dates; indices move in points, money in % of BAC
+INDEX_METRICS = ['cpi', 'spi']
+MONEY_METRICS = ['eac', 'vac']
+DIFF_METRICS = INDEX_METRICS + MONEY_METRICS + ['ev', 'ac', 'percent_complete']
+
+
+def latest_positions(project_ids, data_dates=None):
+    """
+    Row position of each project's latest snapshot, in order of first appearance.
+
+    One sort by (project, data date) and the last row of each project: a
+    later row wins among equal data dates, and a row without a data date
+    never wins over one with a data date.
+    """
+    codes, _ = pd.factorize(np.asarray(project_ids), use_na_sentinel=False)
+    if data_dates is None:
+        order = np.argsort(codes, kind='stable')
+    else:
+        # NaT as int64 is the smallest value, so it sorts first
+        days = np.asarray(data_dates).astype('datetime64[ns]').view(np.int64)
+        order = np.lexsort((days, codes))
+    ids = codes[order]
+    return order[np.append(ids[1:] != ids[:-1], True)] if len(ids) else order
+
+
+def latest_snapshots(data):
+    """One row per project: the snapshot with the latest data date."""
+    dates = data['data_date'].to_numpy() if 'data_date' in data.columns else None
+    return data.iloc[latest_positions(data['project_id'].to_numpy(), dates)]
+
+
+def latest_summary(data):
+    """
+    The latest snapshot of every project, keyed by project ID.
+
+    Built once when a calculation finishes (see CalculationJob) so that
+    KPI headers and portfolio views read it instead of rescanning the
+    history. The index holds the project IDs as text, so one project's
+    row is a hash lookup: ``summary.loc[project_id]``.
+
+    Args:
+        data (pd.DataFrame): Output of calculate_evm.
+
+    Returns:
+        pd.DataFrame: One row per project, all columns of calculate_evm.
+    """
+    latest = latest_snapshots(data)
+    return latest.set_axis(pd.Index(latest['project_id'].astype(str).to_numpy(dtype=object)))
+
+
+def classify_health(cpi, spi):
+    """
+    Vectorized project health from CPI and SPI.
+
+    Uses the thresholds of the Project Health Assessment on the Project
+    Analysis page (>= 1.0 good, >= 0.9 slightly off, below that significant)
+    and takes the worse of cost and schedule. Rows with neither index are
+    'No Data'.
+    """
+    cpi = np.asarray(cpi, dtype=float)
+    spi = np.asarray(spi, dtype=float)
+
+    def level(index):
+        return np.select([index >= 1.0, index >= 0.9, index < 0.9], [0, 1, 2], default=-1)
+
+    codes = np.maximum(level(cpi), level(spi))
+    codes = np.where(codes < 0, HEALTH_LEVELS.index('No Data'), codes)
+    return pd.Categorical.from_codes(codes, HEALTH_LEVELS)
+
+
+@dataclass
+class PortfolioAggregates:
+    """Portfolio-level tables computed once per calculation."""
+    latest: pd.DataFrame             # one row per project, with a 'health' column
+    department_health: pd.DataFrame  # project counts, departments x health
+    department_health_bac: pd.DataFrame  # total BAC, departments x health
+    departments: pd.DataFrame        # totals and budget-weighted indices per department
+
+
+def build_aggregates(latest):
+    """
+    Builds the portfolio aggregates from the latest snapshot of every project.
+
+    Department indices are budget weighted: CPI = sum(EV) / sum(AC) and
+    SPI = sum(EV) / sum(PV) over each department's latest snapshots.
+
+    Args:
+        latest (pd.DataFrame): Output of latest_summary.
+
+    Returns:
+        PortfolioAggregates: The aggregates.
+    """
+    columns = [col for col in ['project_id', 'project_name', 'department', 'data_date',
+                               'bac', 'ac', 'ev', 'pv', 'cpi', 'spi', 'eac', 'vac']
+               if col in latest.columns]
+    latest = latest[columns].reset_index(drop=True)
+    if 'department' not in latest.columns:
+        latest['department'] = 'All'
+    latest['department'] = latest['department'].fillna('(none)').astype(str)
+    latest['health'] = classify_health(latest['cpi'], latest['spi'])
+
+    department_health = pd.crosstab(latest['department'], latest['health'], dropna=False)
+    department_health_bac = pd.crosstab(
+        latest['department'], latest['health'], values=latest['bac'], aggfunc='sum', dropna=False
+    ).fillna(0)
+
+    departments = latest.groupby('department', sort=True).agg(
+        projects=('project_id', 'size'),
+        bac=('bac', 'sum'),
+        ac=('ac', 'sum'),
+        ev=('ev', 'sum'),
+        pv=('pv', 'sum'),
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        departments['cpi'] = np.where(departments['ac'] > 0, departments['ev'] / departments['ac'], np.nan)
+        departments['spi'] = np.where(departments['pv'] > 0, departments['ev'] / departments['pv'], np.nan)
+
+    return PortfolioAggregates(
+        latest=latest,
+        department_health=department_health,
+        department_health_bac=department_health_bac,
+        departments=departments.reset_index(),
+    )
+
+
+def binned_scatter(x, y, bins=60, x_range=(0.0, 2.0), y_range=(0.0, 2.0),
+                   dense_threshold=10, max_points=5000):
+    """
+    Splits a scatter into dense bins and individually plotted points.
+
+    Points are binned on a fixed grid (values outside the ranges are clipped
+    to the edge bins). Bins holding more than ``dense_threshold`` points are
+    returned as a count grid for a heatmap; points in sparser bins, which are
+    the outliers worth seeing individually, are returned as row positions,
+    capped at ``max_points`` with an evenly spaced subsample. The size of the
+    result therefore depends on the bin grid and the caps, not on the number
+    of projects.
+
+    Args:
+        x, y (array-like): Point coordinates (NaN points are skipped).
+        bins (int): Number of bins per axis.
+        x_range, y_range (tuple): Axis ranges covered by the grid.
+        dense_threshold (int): Minimum bin count to aggregate a bin.
+        max_points (int): Maximum number of individual points.
+
+    Returns:
+        dict: 'points' (row positions), 'x_centers', 'y_centers',
+        'counts' (bins x bins, zero outside dense bins, indexed [y, x]) and
+        'n_binned' (points represented by the heatmap).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+
+    x_edges = np.linspace(x_range[0], x_range[1], bins + 1)
+    y_edges = np.linspace(y_range[0], y_range[1], bins + 1)
+    x_bin = np.clip(np.searchsorted(x_edges, x[valid], side='right') - 1, 0, bins - 1)
+    y_bin = np.clip(np.searchsorted(y_edges, y[valid], side='right') - 1, 0, bins - 1)
+
+    flat = y_bin * bins + x_bin
+    counts = np.bincount(flat, minlength=bins * bins)
+    dense = counts > dense_threshold
+
+    points = valid[~dense[flat]]
+    if len(points) > max_points:
+        points = points[np.linspace(0, len(points) - 1, max_points).astype(int)]
+
+    return {
+        'points': points,
+        'x_centers': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y_centers': (y_edges[:-1] + y_edges[1:]) / 2,
+        'counts': np.where(dense, counts, 0).reshape(bins, bins),
+        'n_binned': int(counts[dense].sum()),
+    }
+
+
+def snapshot_at(data, data_date):
+    """One row per project: its snapshot at exactly ``data_date`` (the last one if repeated)."""
+    rows = data[data['data_date'].to_numpy() == np.datetime64(pd.Timestamp(data_date))]
+    return rows.drop_duplicates('project_id', keep='last')
+
+
+def compare_periods(data, previous_date, current_date, index_threshold=0.05, money_threshold=5.0):
+    """
+    What changed for every project between two data dates.
+
+    The two snapshots are aligned by project ID with one hash pass
+    (``pd.factorize``) over both, and every change is a vectorized
+    difference, so 100k-project portfolios compare in well under a second.
+
+    Status is 'New' (only at the current date), 'Dropped' (only at the
+    previous date), 'Completed' (reached 100% complete since the previous
+    date) or 'Continuing'. Each metric gets ``<metric>_previous``,
+    ``<metric>_current`` and ``<metric>_change`` columns. The change score is
+    the largest change relative to its threshold: CPI/SPI change in points
+    against ``index_threshold``, and EAC/VAC change in percent of BAC
+    against ``money_threshold``. Rows are ranked with significant changes
+    (score >= 1, or a status other than 'Continuing') first, by score.
+
+    Args:
+        data (pd.DataFrame): Output of calculate_evm.
+        previous_date, current_date: Data dates to compare.
+        index_threshold (float): CPI/SPI change worth reporting.
+        money_threshold (float): EAC/VAC change worth reporting, in % of BAC.
+
+    Returns:
+        pd.DataFrame: One row per project present at either date.
+    """
+    columns = [col for col in ['project_id', 'project_name', 'department', 'data_date', 'bac'] + DIFF_METRICS
+               if col in data.columns]
+    data = data[columns]
+    previous = snapshot_at(data, previous_date)
+    current = snapshot_at(data, current_date)
+    # One hash pass over both snapshots' IDs: projects at the current date
+    # come first, then those only at the previous date
+    codes, ids = pd.factorize(np.concatenate([
+        current['project_id'].astype(str).to_numpy(dtype=object),
+        previous['project_id'].astype(str).to_numpy(dtype=object),
+    ]))
+    in_current = np.full(len(ids), -1)
+    in_current[codes[:len(current)]] = np.arange(len(current))
+    in_previous = np.full(len(ids), -1)
+    in_previous[codes[len(current):]] = np.arange(len(previous))
+
+    def aligned(frame, positions, column):
+        values = frame[column].to_numpy()
+        if values.dtype.kind not in 'fiub':
+            values = values.astype(object)
+        else:
+            values = values.astype(float)
+        taken = values[np.clip(positions, 0, None)] if len(values) else np.full(len(positions), np.nan)
+        return np.where(positions >= 0, taken, np.nan if values.dtype.kind == 'f' else None)
+
+    changes = {'project_id': ids}
+    for column in ['project_name', 'department']:
+        if column in data.columns:
+            changes[column] = np.where(in_current >= 0, aligned(current, in_current, column),
+                                       aligned(previous, in_previous, column))
+
+    new = in_previous < 0
+    status = np.where(new, 'New', np.where(in_current < 0, 'Dropped', 'Continuing'))
+    if 'percent_complete' in data.columns:
+        completed = ((aligned(current, in_current, 'percent_complete') >= 100)
+                     & ~(aligned(previous, in_previous, 'percent_complete') >= 100) & ~new)
+        status = np.where(completed, 'Completed', status)
+    changes['status'] = pd.Categorical(status, CHANGE_STATUSES)
+
+    bac = aligned(current, in_current, 'bac')
+    bac = np.where(np.isnan(bac), aligned(previous, in_previous, 'bac'), bac)
+    scores = []
+    for metric in [m for m in DIFF_METRICS if m in data.columns]:
+        before = aligned(previous, in_previous, metric)
+        after = aligned(current, in_current, metric)
+        change = after - before
+        changes[f'{metric}_previous'] = before
+        changes[f'{metric}_current'] = after
+        changes[f'{metric}_change'] = change
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if metric in INDEX_METRICS:
+                scores.append(np.abs(change) / index_threshold)
+            elif metric in MONEY_METRICS:
+                scores.append(np.abs(np.where(bac > 0, change / bac * 100, np.nan)) / money_threshold)
+
+    changes = pd.DataFrame(changes)
+    if scores:
+        stacked = np.vstack(scores)
+        finite = np.isfinite(stacked)
+        changes['change_score'] = np.where(finite.any(axis=0), np.where(finite, stacked, 0).max(axis=0), np.nan)
+    else:
+        changes['change_score'] = np.nan
+    changes['significant'] = (changes['change_score'] >= 1) | (changes['status'] != 'Continuing')
+
+    order = np.lexsort((-changes['change_score'].fillna(-1).to_numpy(), ~changes['significant'].to_numpy()))
+    return changes.iloc[order].reset_index(drop=True)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from core.evm_engine import convert_date_column
+from core.kernels import as_datetime
+
+
+class PriceIndex:
+    """
+    Monthly price index series for present value calculations.
+
+    Holds one or more series (for example one per currency or region), each
+    a monthly index level. Levels are stored as cumulative log factors once,
+    so the growth between any two dates is the difference of two looked-up
+    values. Looking up the factors of a million rows is one ``searchsorted``
+    over all series at once, whatever the mix of series and dates.
+
+    A date takes the level of the latest month on or before it. Beyond the
+    ends of a series the level is carried on at the row's constant
+    inflation rate.
+
+    Args:
+        months: Month of each level (anything NumPy converts to datetime64).
+        levels: Index level per month (any base, e.g. 100 = base month).
+        series: Series key per level, or None for a single series.
+        match_column: Project data column whose values select the series.
+    """
+
+    def __init__(self, months, levels, series=None, match_column=None):
+        months = as_datetime(months)
+        dated = ~np.isnat(months)
+        months = months.astype('datetime64[M]').astype(np.int64)
+        levels = np.asarray(levels, dtype=float)
+        if series is None:
+            codes, keys = np.zeros(len(months), dtype=np.int64), np.array([None], dtype=object)
+        else:
+            codes, keys = pd.factorize(pd.Series(series).astype(str))
+        valid = dated & np.isfinite(levels) & (levels > 0) & (codes >= 0)
+        if not valid.any():
+            raise ValueError("The price index has no months with a positive index level")
+        months, levels, codes = months[valid], levels[valid], codes[valid]
+        # Keys without any valid level are left out (their projects use the constant rate)
+        used, codes = np.unique(codes, return_inverse=True)
+        keys = np.asarray(keys, dtype=object)[used]
+
+        # Sorted by series, then month; one entry per month (the last one wins)
+        order = np.lexsort((months, codes))
+        months, levels, codes = months[order], levels[order], codes[order]
+        keep = np.append((codes[1:] != codes[:-1]) | (months[1:] != months[:-1]), True)
+        self.months, self.codes = months[keep], codes[keep]
+        self.log_levels = np.log(levels[keep])
+        self.keys = list(keys)
+        self.match_column = match_column
+
+        self._span = int(self.months.max() - self.months.min()) + 2
+        self._sort_keys = self.codes * self._span + (self.months - self.months.min())
+        counts = np.bincount(self.codes, minlength=len(self.keys))
+        self._first = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self._last = self._first + counts - 1
+
+    @classmethod
+    def from_frame(cls, table, date_column, value_column, series_column=None,
+                   rates=False, match_column=None):
+        """
+        Builds a price index from a table with one row per month (and series).
+
+        Args:
+            table (pd.DataFrame): The uploaded table.
+            date_column (str): Column with the month (any date in the month).
+            value_column (str): Column with index levels, or with annual
+                inflation rates in percent if ``rates`` is True.
+            series_column (str): Column with the series key (currency, region),
+                or None for one series for every project.
+            rates (bool): Treat values as annual rates for each month and
+                chain them into index levels.
+            match_column (str): Project data column matched against the series keys.
+        """
+        months = convert_date_column(table[date_column]).to_numpy()
+        values = pd.to_numeric(table[value_column], errors='coerce').to_numpy(dtype=float)
+        series = table[series_column].astype(str).to_numpy() if series_column else None
+
+        if rates:
+            frame = pd.DataFrame({'month': months, 'rate': values,
+                                  'series': series if series is not None else ''})
+            frame = frame.dropna(subset=['month', 'rate']).sort_values(['series', 'month'], kind='stable')
+            # Chain each series' monthly growth; a month's level is the growth of the months before it
+            growth = np.log1p(frame['rate'] / 100) / 12
+            frame['level'] = np.exp(growth.groupby(frame['series']).cumsum() - growth)
+            months, values = frame['month'].to_numpy(), frame['level'].to_numpy()
+            series = frame['series'].to_numpy() if series is not None else None
+
+        return cls(months, values, series=series, match_column=match_column)
+
+    def __len__(self):
+        return len(self.months)
+
+    def series_codes(self, data):
+        """
+        Series of each project row: a code per row, -1 where no series
+        applies (those rows keep the constant inflation rate).
+        """
+        if self.keys == [None]:
+            return np.zeros(len(data), dtype=np.int64)
+        if self.match_column is None or self.match_column not in data.columns:
+            return np.full(len(data), -1, dtype=np.int64)
+        return pd.Index(self.keys).get_indexer(data[self.match_column].astype(str))
+
+    def log_level(self, dates, codes, rate=0.0):
+        """Cumulative log index level at each date in each row's series (NaN for code -1 or missing dates)."""
+        dates = as_datetime(dates)
+        codes, dates, rate = np.broadcast_arrays(np.asarray(codes), dates, np.asarray(rate, dtype=float))
+        missing = np.isnat(dates) | (codes < 0)
+        months = dates.astype('datetime64[M]').astype(np.int64)
+        safe_codes = np.where(missing, 0, codes)
+
+        base = self.months.min()
+        target = safe_codes * self._span + np.clip(np.where(missing, base, months) - base, -1, self._span - 1)
+        positions = np.searchsorted(self._sort_keys, target, side='right') - 1
+        positions = np.clip(positions, self._first[safe_codes], self._last[safe_codes])
+
+        # Outside a series' months, carry the level on at the constant rate
+        found = self.months[positions]
+        outside = (months < self.months[self._first[safe_codes]]) | (months > self.months[self._last[safe_codes]])
+        with np.errstate(invalid='ignore'):
+            extension = np.where(outside, (months - found) / 12 * np.log1p(rate / 100), 0.0)
+        return np.where(missing, np.nan, self.log_levels[positions] + extension)
+
+    def factor(self, start, end, codes, rate=0.0):
+        """Price growth from start to end per row: index(end) / index(start)."""
+        return np.exp(self.log_level(end, codes, rate) - self.log_level(start, codes, rate))
@@ -0,0 +1,270 @@
+import ast
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from core.portfolio import latest_positions
+
+# Text columns with at most this many distinct values get one bitmap per value
+MAX_CATEGORIES = 1000
+# Value bitmaps kept per index, least recently used dropped first
+BITMAP_CACHE_SIZE = 64
+
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+
+
+class QueryIndex:
+    """
+    Indexes over calculated EVM results for fast filtering and top-N queries.
+
+    Numeric and date columns get a sorted index (the argsort order plus the
+    sorted values), so a range or equality condition is two binary searches.
+    Text columns are factorized once: low-cardinality columns such as
+    department get one boolean bitmap per value, and columns with many
+    values such as project_id get rows grouped by value. Indexes are built the first time a
+    column is queried and then reused, so build one QueryIndex per
+    calculation and keep it for the lifetime of those results. Value
+    bitmaps are cached for the BITMAP_CACHE_SIZE most recently queried
+    values only, so typing many different predicates does not grow it.
+
+    Queries use a small Python-like expression syntax, for example:
+
+        department == 'Engineering' and cpi < 0.9 and spi < 0.95 and latest
+        vac < 0 or (0.8 <= cpi <= 0.9 and department in ['IT', 'Ops'])
+        data_date >= '2024-06-30' and not latest
+
+    ``latest`` selects each project's row at its most recent data date.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._sorted = {}
+        self._categories = {}
+        self._bitmaps = OrderedDict()
+        self._postings = {}
+        self._latest = None
+
+    def __len__(self):
+        return len(self.data)
+
+    # Index building -------------------------------------------------------
+
+    def _is_text(self, column):
+        values = self.data[column]
+        return not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values))
+
+    def _codes(self, column):
+        """Factorized codes of a text column and a value -> code lookup."""
+        if column not in self._categories:
+            codes, uniques = pd.factorize(self.data[column])
+            self._categories[column] = (codes, {value: code for code, value in enumerate(uniques)})
+        return self._categories[column]
+
+    def _equals(self, column, value):
+        """Mask of a text column equal to value, from a bitmap or a postings list."""
+        key = (column, value)
+        if key in self._bitmaps:
+            self._bitmaps.move_to_end(key)
+            return self._bitmaps[key]
+
+        codes, lookup = self._codes(column)
+        code = lookup.get(value)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        if len(lookup) <= MAX_CATEGORIES:
+            self._bitmaps[key] = codes == code
+            while len(self._bitmaps) > BITMAP_CACHE_SIZE:
+                self._bitmaps.popitem(last=False)
+            return self._bitmaps[key]
+
+        # Many distinct values (e.g. project IDs): rows grouped by code
+        if column not in self._postings:
+            order = np.argsort(codes, kind='stable')
+            self._postings[column] = (order, codes[order])
+        order, sorted_codes = self._postings[column]
+        mask = np.zeros(len(self), dtype=bool)
+        mask[order[np.searchsorted(sorted_codes, code, 'left'):np.searchsorted(sorted_codes, code, 'right')]] = True
+        return mask
+
+    def sorted_index(self, column):
+        """(order, sorted values, number of non-missing values) for a column."""
+        if column not in self._sorted:
+            series = self.data[column]
+            valid = series.notna().to_numpy()
+            values = series.to_numpy()
+            positions = np.flatnonzero(valid)
+            order = positions[np.argsort(values[positions], kind='stable')]
+            self._sorted[column] = (order, values[order], len(positions))
+        return self._sorted[column]
+
+    def latest_mask(self):
+        """Rows holding each project's most recent data date."""
+        if self._latest is None:
+            data = self.data
+            mask = np.zeros(len(data), dtype=bool)
+            if len(data):
+                codes, _ = self._codes('project_id')
+                mask[latest_positions(codes, data['data_date'].to_numpy())] = True
+            self._latest = mask
+        return self._latest
+
+    # Conditions -----------------------------------------------------------
+
+    def _check_column(self, column):
+        if column not in self.data.columns:
+            raise ValueError(f"Unknown column '{column}'")
+
+    def _coerce(self, column, value):
+        """Converts a query constant to something comparable with the column."""
+        if pd.api.types.is_datetime64_any_dtype(self.data[column]):
+            try:
+                return np.datetime64(pd.Timestamp(value)).astype(self.data[column].dtype)
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"'{value}' is not a date for column '{column}'") from e
+        if pd.api.types.is_numeric_dtype(self.data[column]) and not isinstance(value, (int, float)):
+            raise ValueError(f"Column '{column}' is numeric, got {value!r}")
+        return value
+
+    def compare(self, column, op, value):
+        """Mask of rows where ``column op value`` holds (op is '<', '<=', '>', '>=', '==' or '!=')."""
+        self._check_column(column)
+
+        if op in ('==', '!=') and self._is_text(column):
+            mask = self._equals(column, value)
+            if op == '!=':
+                mask = ~mask & self.data[column].notna().to_numpy()
+            return mask
+
+        order, values, n_valid = self.sorted_index(column)
+        value = self._coerce(column, value)
+        try:
+            left = np.searchsorted(values, value, side='left')
+            right = np.searchsorted(values, value, side='right')
+        except TypeError as e:
+            raise ValueError(f"Cannot compare column '{column}' with {value!r}") from e
+
+        bounds = {
+            '<': (0, left), '<=': (0, right),
+            '>': (right, n_valid), '>=': (left, n_valid),
+            '==': (left, right), '!=': (left, right),
+        }
+        start, stop = bounds[op]
+        mask = np.zeros(len(self), dtype=bool)
+        mask[order[start:stop]] = True
+        if op == '!=':
+            mask = ~mask & self.data[column].notna().to_numpy()
+        return mask
+
+    def isin(self, column, values):
+        """Mask of rows whose column equals any of the values."""
+        mask = np.zeros(len(self), dtype=bool)
+        for value in values:
+            mask |= self.compare(column, '==', value)
+        return mask
+
+    # Expressions ----------------------------------------------------------
+
+    def evaluate(self, expression):
+        """
+        Mask of the rows matching a query expression (see the class docstring).
+
+        An empty expression matches every row. Raises ValueError for
+        anything outside the supported syntax.
+        """
+        if not expression or not expression.strip():
+            return np.ones(len(self), dtype=bool)
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid query: {e.msg}") from e
+        return self._evaluate(tree.body)
+
+    def _evaluate(self, node):
+        if isinstance(node, ast.BoolOp):
+            masks = [self._evaluate(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce(masks)
+
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self._evaluate(node.operand)
+
+        if isinstance(node, ast.Name):
+            if node.id == 'latest':
+                return self.latest_mask()
+            self._check_column(node.id)
+            if pd.api.types.is_bool_dtype(self.data[node.id]):
+                return self.data[node.id].to_numpy(dtype=bool)
+            raise ValueError(f"Column '{node.id}' needs a comparison")
+
+        if isinstance(node, ast.Compare):
+            # Chained comparisons (0.8 < cpi <= 1) are evaluated pairwise
+            mask = np.ones(len(self), dtype=bool)
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                mask &= self._comparison(left, op, right)
+                left = right
+            return mask
+
+        raise ValueError(f"Unsupported query syntax: {ast.unparse(node)}")
+
+    def _comparison(self, left, op, right):
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if not isinstance(left, ast.Name) or not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise ValueError("Use 'column in [value, ...]'")
+            mask = self.isin(left.id, [self._constant(item) for item in right.elts])
+            if isinstance(op, ast.NotIn):
+                mask = ~mask & self.data[left.id].notna().to_numpy()
+            return mask
+
+        if type(op) not in _FLIPPED:
+            raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+        if isinstance(left, ast.Name) and not isinstance(right, ast.Name):
+            column, value = left.id, self._constant(right)
+        elif isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+            column, value, op = right.id, self._constant(left), _FLIPPED[type(op)]()
+        else:
+            raise ValueError("Comparisons need one column and one value")
+
+        symbols = {ast.Lt: '<', ast.LtE: '<=', ast.Gt: '>', ast.GtE: '>=', ast.Eq: '==', ast.NotEq: '!='}
+        return self.compare(column, symbols[type(op)], value)
+
+    @staticmethod
+    def _constant(node):
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+            return -node.operand.value
+        if isinstance(node, ast.Constant):
+            return node.value
+        raise ValueError(f"Expected a value, got: {ast.unparse(node)}")
+
+    # Results --------------------------------------------------------------
+
+    def top(self, column, n, mask=None, largest=True):
+        """
+        Positions of the n rows with the largest (or smallest) values of a
+        column, optionally among the rows of a mask. Missing values are
+        never returned.
+        """
+        order, _, n_valid = self.sorted_index(column)
+        candidates = order[:n_valid]
+        if largest:
+            candidates = candidates[::-1]
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        return candidates[:n]
+
+    def query(self, expression='', order_by=None, n=None, largest=True):
+        """
+        Rows matching an expression, optionally the top n by a column.
+
+        Returns:
+            pd.DataFrame: Matching rows, in data order or in top-n order.
+        """
+        mask = self.evaluate(expression)
+        if order_by is not None:
+            positions = self.top(order_by, n if n is not None else len(self), mask, largest)
+        else:
+            positions = np.flatnonzero(mask)
+            if n is not None:
+                positions = positions[:n]
+        return self.data.iloc[positions]
@@ -0,0 +1,205 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from core.calendars import build_calendars, calendar_codes, working_duration_months
+from core.kernels import scurve_fraction
+
+
+@dataclass
+class TimePhasedCurves:
+    """
+    Monthly baseline PV curves for a portfolio, stored with ragged offsets.
+
+    All projects share one month grid (``months``). Project ``i`` covers the
+    grid months ``first_month[i]`` to ``first_month[i] + length - 1`` and its
+    PV values are ``values[offsets[i]:offsets[i + 1]]``, so short projects in
+    a long portfolio do not pay for the whole grid. Each value is the
+    cumulative PV at the end of that month.
+    """
+    project_ids: np.ndarray
+    months: np.ndarray       # datetime64[M], shared grid
+    first_month: np.ndarray  # grid position of each project's first month
+    offsets: np.ndarray      # len(project_ids) + 1 offsets into values
+    values: np.ndarray       # cumulative PV, all projects back to back
+    bac: np.ndarray
+
+    def __len__(self):
+        return len(self.project_ids)
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def curve(self, project_id):
+        """PV curve of one project as a Series indexed by month end."""
+        matches = np.flatnonzero(self.project_ids == project_id)
+        if len(matches) == 0:
+            raise KeyError(project_id)
+        i = matches[0]
+        grid = self.months[self.first_month[i]:self.first_month[i] + self.lengths[i]]
+        return pd.Series(
+            self.values[self.offsets[i]:self.offsets[i + 1]],
+            index=_month_ends(grid),
+            name='pv_baseline'
+        )
+
+    def to_dense(self):
+        """
+        (projects x months) array on the shared grid.
+
+        Months before a project starts are 0 and months after it finishes
+        hold its BAC, so columns can be summed into portfolio totals.
+        """
+        dense = np.zeros((len(self), len(self.months)))
+        after_finish = np.arange(len(self.months)) >= (self.first_month + self.lengths)[:, None]
+        dense[after_finish] = np.broadcast_to(self.bac[:, None], dense.shape)[after_finish]
+        rows, cols = self._positions()
+        dense[rows, cols] = self.values
+        return dense
+
+    def to_frame(self):
+        """Long format: one row per project and month."""
+        rows, cols = self._positions()
+        return pd.DataFrame({
+            'project_id': self.project_ids[rows],
+            'month': _month_ends(self.months[cols]),
+            'pv_baseline': self.values,
+        })
+
+    def _positions(self):
+        """Project row and grid column of every entry in ``values``."""
+        rows = np.repeat(np.arange(len(self)), self.lengths)
+        cols = self.first_month[rows] + (np.arange(len(self.values)) - self.offsets[rows])
+        return rows, cols
+
+
+def _month_ends(months):
+    """Last calendar day of each datetime64[M] month, as datetime64[ns]."""
+    return ((months + 1).astype('datetime64[D]') - 1).astype('datetime64[ns]')
+
+
+def baseline_curves(data, global_values):
+    """
+    Builds monthly PV baselines for every project in calculated EVM data.
+
+    The plan dates, BAC and curve parameters come from each project's latest
+    snapshot. PV at each month end uses the same curve as calculate_evm:
+    ``bac * t`` for a linear curve, or ``bac * beta CDF(t, alpha, beta)`` for
+    an s-curve, where ``t`` is the fraction of the planned duration elapsed,
+    counted in working days of each project's calendar when calendars are
+    configured. Manual PV only exists at data dates, so the curve is always
+    the modelled plan; join_history adds the PV used at each data date.
+    The whole portfolio is evaluated in one vectorized pass over the ragged
+    (project, month) positions.
+
+    Args:
+        data (pd.DataFrame): Output of calculate_evm.
+        global_values (dict): The global values used for the calculation.
+
+    Returns:
+        TimePhasedCurves: The baseline curves.
+    """
+    projects = data
+    if 'data_date' in projects.columns:
+        projects = projects.sort_values('data_date', kind='stable')
+    projects = projects.drop_duplicates('project_id', keep='last')
+
+    start = projects['plan_start_date'].to_numpy(dtype='datetime64[D]')
+    finish = projects['plan_finish_date'].to_numpy(dtype='datetime64[D]')
+    valid = ~np.isnat(start) & ~np.isnat(finish) & (finish > start)
+
+    projects = projects[valid]
+    start = start[valid]
+    finish = finish[valid]
+    bac = pd.to_numeric(projects['bac'], errors='coerce').to_numpy(dtype=float)
+
+    if len(projects) == 0:
+        empty_int = np.zeros(0, dtype=np.int64)
+        return TimePhasedCurves(
+            project_ids=np.zeros(0, dtype=object),
+            months=np.zeros(0, dtype='datetime64[M]'),
+            first_month=empty_int,
+            offsets=np.zeros(1, dtype=np.int64),
+            values=np.zeros(0),
+            bac=np.zeros(0),
+        )
+
+    start_month = start.astype('datetime64[M]')
+    finish_month = finish.astype('datetime64[M]')
+    grid_start = start_month.min()
+    months = np.arange(grid_start, finish_month.max() + 1)
+
+    first_month = (start_month - grid_start).astype(np.int64)
+    lengths = (finish_month - start_month).astype(np.int64) + 1
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    # Ragged positions: every (project, month) pair the project spans
+    rows = np.repeat(np.arange(len(projects)), lengths)
+    cols = first_month[rows] + (np.arange(offsets[-1]) - offsets[rows])
+    month_end = (months[cols] + 1).astype('datetime64[D]') - 1
+
+    calendars = build_calendars(global_values.get('calendars'))
+    if calendars is None:
+        elapsed = (month_end - start[rows]).astype(float)
+        duration = (finish - start).astype(float)[rows]
+    else:
+        column = global_values.get('calendar_column')
+        if column and column in projects.columns:
+            codes = calendar_codes(projects[column], calendars)[0]
+        else:
+            codes = np.zeros(len(projects), dtype=np.int64)
+        elapsed = working_duration_months(start[rows], month_end, calendars, codes[rows])
+        duration = working_duration_months(start, finish, calendars, codes)[rows]
+    # A plan without working days counts as finished, as in calculate_evm
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.nan_to_num(elapsed / duration, nan=0.0), 0, 1)
+
+    if global_values.get('curve') == 'linear':
+        fraction = t
+    else:
+        alpha = pd.to_numeric(projects['alpha'], errors='coerce').to_numpy(dtype=float)
+        beta = pd.to_numeric(projects['beta'], errors='coerce').to_numpy(dtype=float)
+        fraction = scurve_fraction(t, alpha[rows], beta[rows])
+
+    return TimePhasedCurves(
+        project_ids=projects['project_id'].astype(str).to_numpy(dtype=object),
+        months=months,
+        first_month=first_month,
+        offsets=offsets,
+        values=bac[rows] * fraction,
+        bac=bac,
+    )
+
+
+def join_history(curves, data):
+    """
+    Joins observed PV, EV and AC onto the monthly baseline.
+
+    Each snapshot is assigned to the month of its data date; when a project
+    has several snapshots in one month the latest one is used. Months
+    without a snapshot have NaN PV, EV and AC; snapshots dated outside a
+    project's planned months are not included. The observed PV is the one
+    calculate_evm used, so it differs from pv_baseline with manual PV.
+
+    Args:
+        curves (TimePhasedCurves): Output of baseline_curves.
+        data (pd.DataFrame): Output of calculate_evm.
+
+    Returns:
+        pd.DataFrame: project_id, month, pv_baseline, pv, ev, ac (PV and EV
+        only when the results include them)
+    """
+    columns = ['project_id', 'data_date'] + [col for col in ('pv', 'ev', 'ac') if col in data.columns]
+    observed = data[columns].dropna(subset=['data_date'])
+    observed = observed.assign(
+        project_id=observed['project_id'].astype(str),
+        month=_month_ends(observed['data_date'].to_numpy(dtype='datetime64[M]')),
+    )
+    observed = (
+        observed.sort_values('data_date', kind='stable')
+        .drop_duplicates(['project_id', 'month'], keep='last')
+        .drop(columns='data_date')
+    )
+    return curves.to_frame().merge(observed, on=['project_id', 'month'], how='left')
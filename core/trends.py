@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Data dates used for slopes and rolling averages
+TREND_WINDOW = 3
+# Consecutive declines that flag a project as deteriorating
+DETERIORATION_PERIODS = 3
+
+
+@dataclass
+class TrendAnalytics:
+    """Trend analytics over every project's data dates, computed once per calculation."""
+    history: pd.DataFrame  # one row per snapshot, sorted by project and data date
+    summary: pd.DataFrame  # one row per project: its latest snapshot's trends
+    window: int
+    periods: int
+
+    def project_history(self, project_id):
+        return self.history[self.history['project_id'].astype(str) == str(project_id)]
+
+    def project_summary(self, project_id):
+        """The trend row of one project, or None."""
+        rows = self.summary[self.summary['project_id'].astype(str) == str(project_id)]
+        return rows.iloc[0] if len(rows) else None
+
+
+def _window_sums(values, position, window):
+    """
+    Sum of each row's value and its previous rows in the same project, up
+    to ``window`` rows, from one cumulative sum (NaN counts as 0).
+    """
+    cumulative = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+    index = np.arange(len(values))
+    lag = np.minimum(position + 1, window)
+    return cumulative[index + 1] - cumulative[index + 1 - lag]
+
+
+def _rolling_slope(values, position, window):
+    """
+    Least-squares slope of values against period number over the last
+    ``window`` rows of each project (change per data date). NaN values are
+    left out; fewer than two points give NaN.
+    """
+    valid = np.isfinite(values).astype(float)
+    x = position.astype(float) * valid
+    y = np.where(valid > 0, values, 0.0)
+
+    n = _window_sums(valid, position, window)
+    sx = _window_sums(x, position, window)
+    sy = _window_sums(y, position, window)
+    sxy = _window_sums(x * y, position, window)
+    sxx = _window_sums(x * x, position, window)
+
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sxy - sx * sy) / denominator
+    return np.where((n >= 2) & (denominator > 0), slope, np.nan)
+
+
+def _decline_streak(values, position):
+    """Number of consecutive data dates, up to each row, on which the value fell."""
+    previous = np.concatenate([[np.nan], values[:-1]])
+    declined = (position > 0) & (values < previous)
+    index = np.arange(len(values))
+    last_not_declined = np.maximum.accumulate(np.where(declined, -1, index))
+    return index - last_not_declined
+
+
+def build_trends(data, window=TREND_WINDOW, periods=DETERIORATION_PERIODS):
+    """
+    CPI/SPI trends for every project at once from multi-snapshot EVM data.
+
+    Rows are sorted once by project and data date. Every measure is then
+    a vectorized pass over the whole portfolio, using the project
+    boundaries instead of a per-project loop:
+
+    - ``cpi_slope`` / ``spi_slope``: least-squares change per data date
+      over the last ``window`` data dates.
+    - ``cpi_rolling`` / ``spi_rolling``: mean of the last ``window`` values.
+    - ``ev_delta`` / ``ac_delta``: change since the previous data date.
+    - ``cpi_decline_streak`` / ``spi_decline_streak``: consecutive data
+      dates on which the index fell, and ``deteriorating`` when either
+      reaches ``periods``.
+
+    Args:
+        data (pd.DataFrame): Output of calculate_evm.
+        window (int): Data dates used for slopes and rolling averages.
+        periods (int): Consecutive declines that flag a project.
+
+    Returns:
+        TrendAnalytics: Per-snapshot history and per-project summary.
+    """
+    columns = [col for col in ['project_id', 'project_name', 'department', 'data_date',
+                               'cpi', 'spi', 'ev', 'ac']
+               if col in data.columns]
+    codes, _ = pd.factorize(data['project_id'])
+    if 'data_date' in data.columns:
+        order = np.lexsort((data['data_date'].to_numpy(), codes))
+    else:
+        order = np.argsort(codes, kind='stable')
+
+    history = data[columns].iloc[order]
+    codes = codes[order]
+    index = np.arange(len(history))
+    first = np.concatenate([[True], codes[1:] != codes[:-1]]) if len(history) else np.zeros(0, dtype=bool)
+    position = index - np.maximum.accumulate(np.where(first, index, 0))
+    last = np.concatenate([first[1:], [True]]) if len(history) else first
+
+    trends = {}
+    for metric in ('cpi', 'spi'):
+        if metric not in history.columns:
+            continue
+        values = history[metric].to_numpy(dtype=float)
+        count = _window_sums(np.isfinite(values).astype(float), position, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trends[f'{metric}_rolling'] = np.where(count > 0, _window_sums(values, position, window) / count, np.nan)
+        trends[f'{metric}_slope'] = _rolling_slope(values, position, window)
+        trends[f'{metric}_decline_streak'] = _decline_streak(values, position)
+    for metric in ('ev', 'ac'):
+        if metric not in history.columns:
+            continue
+        values = history[metric].to_numpy(dtype=float)
+        trends[f'{metric}_delta'] = np.where(position > 0, values - np.concatenate([[np.nan], values[:-1]]), np.nan)
+
+    history = history.assign(period=position + 1, **trends)
+    streaks = [history[col] for col in ('cpi_decline_streak', 'spi_decline_streak') if col in history.columns]
+    history['deteriorating'] = np.logical_or.reduce([s >= periods for s in streaks]) if streaks else False
+
+    summary = history[last].reset_index(drop=True)
+    return TrendAnalytics(history=history, summary=summary, window=window, periods=periods)
@@ -1,8 +1,10 @@
-
 from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
+import numpy as np
+import pandas as pd
+
 @dataclass
 class Project:
     project_id: str
@@ -19,3 +21,226 @@ class Project:
     beta: Optional[float] = None
     alpha: Optional[float] = None
     inflation_rate: Optional[float] = None
+
+
+# Column name -> kind, in Project field order. Names match calculate_evm's
+# internal (pythonic) column names.
+BATCH_FIELDS = {
+    'project_id': 'str',
+    'project_name': 'str',
+    'department': 'str',
+    'bac': 'float',
+    'ac': 'float',
+    'plan_start_date': 'datetime',
+    'plan_finish_date': 'datetime',
+    'data_date': 'datetime',
+    'ev': 'float',
+    'pv': 'float',
+    'curve': 'str',
+    'beta': 'float',
+    'alpha': 'float',
+    'inflation_rate': 'float',
+    'manual_ev': 'float',
+    'manual_pv': 'float',
+}
+REQUIRED_FIELDS = [
+    'project_id', 'project_name', 'department', 'bac', 'ac',
+    'plan_start_date', 'plan_finish_date', 'data_date',
+]
+
+
+def _validate_column(name, values):
+    """Returns values as a 1-D array of the field's dtype, without copying when it already is."""
+    kind = BATCH_FIELDS[name]
+    values = np.asarray(values)
+    if values.ndim != 1:
+        raise ValueError(f"Column '{name}' must be one-dimensional")
+
+    try:
+        if kind == 'float' and values.dtype != np.float64:
+            values = values.astype(np.float64)
+        elif kind == 'datetime' and values.dtype.kind != 'M':
+            values = values.astype('datetime64[ns]')
+        elif kind == 'str' and values.dtype != object:
+            values = values.astype(object)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Column '{name}' cannot be stored as {kind}: {e}") from e
+
+    return values
+
+
+def _missing_column(name, length):
+    kind = BATCH_FIELDS[name]
+    if kind == 'float':
+        return np.full(length, np.nan)
+    if kind == 'datetime':
+        return np.full(length, np.datetime64('NaT', 'ns'))
+    return np.full(length, None, dtype=object)
+
+
+class ProjectBatch:
+    """
+    Typed, columnar storage for many project snapshots.
+
+    Each field is one NumPy array (float64 for money and curve parameters,
+    datetime64 for dates, object for text), validated once on construction.
+    Column names are the engine's internal names, so calculate_evm can use a
+    batch directly without renaming columns or converting them to strings
+    and back. Rows are exposed as lightweight ProjectView objects that read
+    from the arrays and build a Project only when asked; slicing a batch
+    gives a batch over views of the same arrays.
+
+    Values must already be typed: date columns are datetime64 and are not
+    parsed from text the way calculate_evm parses a DataFrame, so convert
+    text dates (e.g. with core.evm_engine.parse_date_column) before building
+    a batch.
+    """
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, columns):
+        missing = [name for name in REQUIRED_FIELDS if name not in columns]
+        if missing:
+            raise ValueError(f"ProjectBatch is missing required columns: {missing}")
+        unknown = [name for name in columns if name not in BATCH_FIELDS]
+        if unknown:
+            raise ValueError(f"ProjectBatch got unknown columns: {unknown}")
+
+        self._columns = {name: _validate_column(name, values) for name, values in columns.items()}
+        lengths = {len(values) for values in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"ProjectBatch columns have different lengths: {sorted(lengths)}")
+        self._length = lengths.pop()
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ProjectBatch({name: values[index] for name, values in self._columns.items()})
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return ProjectView(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield ProjectView(self, index)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """The underlying array of one column (not a copy)."""
+        return self._columns[name]
+
+    @classmethod
+    def from_projects(cls, projects):
+        """Builds a batch from Project objects."""
+        projects = list(projects)
+        columns = {}
+        for name in Project.__dataclass_fields__:
+            values = [getattr(project, name) for project in projects]
+            if name in REQUIRED_FIELDS or any(value is not None for value in values):
+                if BATCH_FIELDS[name] == 'float':
+                    values = [np.nan if value is None else value for value in values]
+                elif BATCH_FIELDS[name] == 'datetime':
+                    values = [np.datetime64(value, 'ns') if value is not None else np.datetime64('NaT', 'ns')
+                              for value in values]
+                columns[name] = values
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, batches):
+        """
+        Stacks several batches into one. Optional columns missing from some
+        batches are filled with NaN / NaT / None.
+        """
+        batches = list(batches)
+        names = [name for name in BATCH_FIELDS if any(name in batch._columns for batch in batches)]
+        columns = {}
+        for name in names:
+            parts = []
+            for batch in batches:
+                if name in batch._columns:
+                    parts.append(batch._columns[name])
+                else:
+                    parts.append(_missing_column(name, len(batch)))
+            columns[name] = np.concatenate(parts)
+        return cls(columns)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """
+        Builds a batch from a DataFrame that uses the engine's column names.
+
+        Numeric and datetime columns that already have the right dtype are
+        shared with the frame rather than copied. Columns that are not batch
+        fields are ignored.
+        """
+        return cls({name: df[name].to_numpy() for name in df.columns if name in BATCH_FIELDS})
+
+    def to_dataframe(self):
+        """DataFrame over the batch arrays; numeric and date columns are not copied."""
+        return pd.DataFrame(self._columns, copy=False)
+
+    @classmethod
+    def from_arrow(cls, table):
+        """
+        Builds a batch from a pyarrow Table.
+
+        Numeric and timestamp columns without nulls convert without copying.
+        """
+        columns = {}
+        for name in table.column_names:
+            if name in BATCH_FIELDS:
+                columns[name] = table.column(name).to_numpy()
+        return cls(columns)
+
+    def to_arrow(self):
+        """Converts the batch to a pyarrow Table (requires pyarrow)."""
+        import pyarrow as pa
+
+        arrays = []
+        for name, values in self._columns.items():
+            if BATCH_FIELDS[name] == 'str':
+                arrays.append(pa.array(values, type=pa.string(), from_pandas=True))
+            else:
+                arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=list(self._columns))
+
+
+class ProjectView:
+    """Read-only view of one row of a ProjectBatch."""
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+
+    def __getattr__(self, name):
+        try:
+            return self._batch.column(name)[self._index]
+        except KeyError:
+            if name in BATCH_FIELDS:
+                return None
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"ProjectView({self._batch.column('project_id')[self._index]!r})"
+
+    def to_project(self):
+        """Materializes the row as a Project dataclass."""
+        values = {}
+        for name in Project.__dataclass_fields__:
+            value = getattr(self, name)
+            kind = BATCH_FIELDS[name]
+            if value is None:
+                pass
+            elif kind == 'datetime':
+                value = None if np.isnat(value) else pd.Timestamp(value).date()
+            elif kind == 'float':
+                value = None if np.isnan(value) else float(value)
+            values[name] = value
+        return Project(**values)
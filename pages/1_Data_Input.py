@@ -1,7 +1,29 @@
 
 import streamlit as st
-from utils.file_utils import read_csv, read_json
+from utils.file_utils import (
+    read_csv, read_csv_files, list_csv_files, data_root, DATA_ROOT_ENV_VAR, deduplicate_snapshots, read_json,
+    read_excel, is_excel_file, list_excel_sheets
+)
+from utils.upload_cache import ParsedFileCache
+from core.kernels import EAC_METHODS, DEFAULT_EAC_METHODS
+from core.price_index import PriceIndex
+from core.calendars import build_calendars
+from core.fx import FxRates
 import pandas as pd
+from utils.profiling import profile_page
+from utils.memory import use_frames, release_frame, restore_frame, has_spilled
+
+
+@st.cache_resource
+def get_upload_cache():
+    """One parse cache per server process, shared by all sessions."""
+    return ParsedFileCache()
+
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Data Input")
+# raw_data stays in memory while its columns are mapped (until release_frame)
+use_frames('project_data', 'raw_data')
 
 st.title("Data Input")
 st.write("Step 1: Load your project data and configure calculation settings")
@@ -32,17 +54,101 @@ st.divider()
 st.header("1. Load Data")
 
 # Use tabs for better organization
-tab1, tab2 = st.tabs(["📁 Upload CSV", "📄 Upload JSON"])
+tab1, tab2 = st.tabs(["📁 Upload CSV / Excel", "📄 Upload JSON"])
 
 with tab1:
-    st.write("Upload a CSV file with your project data")
-    csv_file = st.file_uploader("Choose a CSV file", type=["csv"], key="csv_uploader")
+    st.write("Upload one or more CSV or Excel files with your project data (for example one file per data date)")
+    csv_files = st.file_uploader(
+        "Choose CSV or Excel files", type=["csv", "xlsx", "xlsm"], accept_multiple_files=True, key="csv_uploader"
+    )
+
+    with st.expander("📂 Load all files from a folder", expanded=False):
+        folder_col, pattern_col = st.columns([3, 1])
+        with folder_col:
+            csv_folder = st.text_input("Folder path", key="csv_folder",
+                                       help=f"A folder inside {data_root()} (set with {DATA_ROOT_ENV_VAR})")
+        with pattern_col:
+            csv_pattern = st.text_input("File pattern", "*.csv", key="csv_pattern", help="For example *.csv or *.xlsx")
+        load_folder = st.button("📂 Load Folder", disabled=not csv_folder)
+
+    # Once a mapping is confirmed, new files can skip the unmapped columns
+    mapped_columns = st.session_state.get('mapped_columns')
+    only_mapped = st.checkbox(
+        "Only read the mapped columns",
+        disabled=not mapped_columns,
+        help="Faster and smaller for wide files. Uses the columns of the last confirmed mapping."
+    )
+    usecols = mapped_columns if only_mapped and mapped_columns else None
+
+    # Worksheet and header row for Excel workbooks
+    excel_uploads = [f for f in csv_files or [] if is_excel_file(f)]
+    sheet_name = None
+    header_row = None
+    if excel_uploads or (csv_folder and csv_pattern.lower().endswith(('.xlsx', '.xlsm'))):
+        sheet_col, header_col = st.columns(2)
+        with sheet_col:
+            if len(excel_uploads) == 1:
+                sheets = list_excel_sheets(excel_uploads[0])
+                sheet_name = st.selectbox("Worksheet", sheets, key="excel_sheet")
+            else:
+                sheet_name = st.text_input(
+                    "Worksheet", key="excel_sheet_name",
+                    help="Sheet name used in every workbook. Leave empty for the first sheet."
+                ) or None
+        with header_col:
+            header_choice = st.number_input(
+                "Header row", min_value=0, value=0, step=1, key="excel_header_row",
+                help="Row number of the column names (1 = first row). 0 detects it automatically."
+            )
+            header_row = header_choice - 1 if header_choice else None
+    excel_options = (sheet_name, header_row)
+
+    # Only re-parse when the set of files changes
+    new_source = None
+    if load_folder:
+        try:
+            source_files = list_csv_files(csv_folder, csv_pattern)
+            if not source_files:
+                st.warning(f"⚠️ No files matching `{csv_pattern}` in {csv_folder}")
+            else:
+                new_source = ('folder', csv_folder, csv_pattern, tuple(str(f) for f in source_files), usecols, excel_options)
+        except (FileNotFoundError, PermissionError, ValueError) as e:
+            st.error(f"❌ {e}")
+    elif csv_files:
+        source_files = csv_files
+        new_source = ('upload', tuple(f.file_id for f in csv_files), usecols, excel_options)
+
+    if new_source is not None and new_source != st.session_state.get('raw_data_source'):
+        cache = get_upload_cache()
+        hits = cache.hits
+
+        def read_file(file, usecols=None):
+            if is_excel_file(file):
+                return read_excel(file, sheet_name=sheet_name, header_row=header_row, usecols=usecols)
+            return cache.read_csv(file, usecols=usecols)
 
-    if csv_file is not None:
-        df = read_csv(csv_file)
-        df = df.loc[:, ~df.columns.str.contains('Unnamed:', case=False)]
-        st.session_state.raw_data = df
-        st.success(f"✓ CSV loaded: {len(df)} rows")
+        try:
+            if len(source_files) == 1:
+                df = read_file(source_files[0], usecols=usecols)
+                timings = None
+            else:
+                df, timings = read_csv_files(source_files, usecols=usecols, reader=read_file)
+        except ValueError as e:
+            # For example a worksheet name missing from a workbook
+            st.error(f"❌ {e}")
+        else:
+            if cache.hits > hits:
+                st.info(f"⚡ {cache.hits - hits} of {len(source_files)} file(s) loaded from the parse cache")
+            df = df.loc[:, ~df.columns.str.contains('Unnamed:', case=False)]
+            st.session_state.raw_data = df
+            st.session_state.raw_data_source = new_source
+            st.session_state.ingest_timings = timings
+            st.success(f"✓ Data loaded: {len(df)} rows from {len(source_files)} file(s)")
+
+    if st.session_state.get('ingest_timings'):
+        timings = pd.DataFrame(st.session_state.ingest_timings)
+        with st.expander(f"⏱️ Parsed {len(timings)} files in parallel", expanded=False):
+            st.dataframe(timings, width='stretch', hide_index=True)
 
     if 'raw_data' in st.session_state:
         st.subheader("Map CSV Columns")
@@ -90,13 +196,38 @@ with tab1:
                 for field, name in optional_fields.items():
                     mapping[field] = st.selectbox(name, ['None'] + columns, index=0, key=f"opt_{field}")
 
+            duplicate_policies = {
+                'last': 'Keep last row (later files win)',
+                'first': 'Keep first row',
+                'all': 'Keep all rows',
+            }
+            duplicate_policy = st.selectbox(
+                "Duplicate rows for the same Project ID and Data Date",
+                list(duplicate_policies),
+                format_func=duplicate_policies.get,
+                key="duplicate_policy"
+            )
+
             submitted = st.form_submit_button("✓ Confirm Column Mapping", width='stretch')
             if submitted:
                 renamed_df = df.rename(columns={v: k for k, v in mapping.items() if v != 'None'})
+                if duplicate_policy != 'all':
+                    renamed_df, dropped = deduplicate_snapshots(renamed_df, keep=duplicate_policy)
+                    if dropped:
+                        st.toast(f"Removed {dropped} duplicate project snapshots")
                 st.session_state.project_data = renamed_df
+                st.session_state.mapped_columns = [v for v in mapping.values() if v != 'None']
+                # The raw upload is only needed to map again; keep it on disk, not in memory
+                release_frame('raw_data')
                 st.success("✓ Columns mapped successfully! Proceed to configure global settings below.")
                 st.rerun()
 
+    elif has_spilled('raw_data'):
+        st.info("ℹ️ Columns are mapped. The raw upload was moved out of memory.")
+        if st.button("🔁 Change Column Mapping", key="remap_columns"):
+            restore_frame('raw_data')
+            st.rerun()
+
 with tab2:
     st.write("Upload a JSON file (previously exported from this application)")
     json_file = st.file_uploader("Choose a JSON file", type=["json"], key="json_uploader")
@@ -261,24 +392,189 @@ with st.form("global_values_form"):
             help="Use manually entered Planned Value instead of calculated"
         )
 
+    eac_methods = st.multiselect(
+        "Forecast methods (in addition to EAC = BAC / CPI)",
+        list(EAC_METHODS),
+        default=[method for method in existing_values.get('eac_methods', DEFAULT_EAC_METHODS) if method in EAC_METHODS],
+        format_func=lambda method: f"{method}: {EAC_METHODS[method]}",
+        help="IEAC(t) methods forecast the duration in months from earned schedule"
+    )
+
+    st.write("**Working Calendars** (optional)")
+    use_calendars = st.checkbox(
+        "Count durations in working days",
+        value=bool(existing_values.get('calendars')),
+        help="Weekends and holidays of each project's calendar do not count towards its durations"
+    )
+    calendar_rows = pd.DataFrame(
+        existing_values.get('calendars') or [{'name': 'Standard', 'weekmask': 'Mon Tue Wed Thu Fri', 'holidays': []}],
+        columns=['name', 'weekmask', 'holidays']
+    )
+    calendar_rows['holidays'] = calendar_rows['holidays'].apply(lambda days: ', '.join(days or []))
+    edited_calendars = st.data_editor(
+        calendar_rows,
+        num_rows='dynamic',
+        hide_index=True,
+        width='stretch',
+        key="calendar_editor",
+        column_config={
+            'name': st.column_config.TextColumn('Calendar', required=True),
+            'weekmask': st.column_config.TextColumn('Working days', help="e.g. 'Mon Tue Wed Thu Fri' or '1111100'"),
+            'holidays': st.column_config.TextColumn('Holidays', help="Comma-separated dates (YYYY-MM-DD)"),
+        }
+    )
+    project_columns = st.session_state.project_data.columns.tolist() if data_loaded else []
+    existing_calendar_column = existing_values.get('calendar_column')
+    calendar_column = st.selectbox(
+        "Project data column with the calendar name",
+        ['None'] + project_columns,
+        index=project_columns.index(existing_calendar_column) + 1 if existing_calendar_column in project_columns else 0,
+        help="Projects without a known calendar name use the first calendar"
+    )
+
     submitted = st.form_submit_button("✓ Save Global Settings", width='stretch')
     if submitted:
-        st.session_state.global_values = {
-            "curve": global_curve,
-            "alpha": global_alpha,
-            "beta": global_beta,
-            "inflation_rate": global_inflation_rate,
-            "use_manual_ev": use_manual_ev,
-            "use_manual_pv": use_manual_pv,
-        }
-        st.success("✓ Global settings saved!")
-        st.rerun()
+        calendars = None
+        if use_calendars:
+            calendars = [
+                {
+                    'name': str(row['name']).strip(),
+                    'weekmask': str(row['weekmask'] or '').strip() or '1111100',
+                    'holidays': [day.strip() for day in str(row['holidays'] or '').split(',') if day.strip()],
+                }
+                for _, row in edited_calendars.dropna(subset=['name']).iterrows()
+            ]
+        try:
+            build_calendars(calendars)
+        except ValueError as e:
+            st.error(f"❌ Invalid calendar: {e}")
+        else:
+            st.session_state.global_values = {
+                "curve": global_curve,
+                "alpha": global_alpha,
+                "beta": global_beta,
+                "inflation_rate": global_inflation_rate,
+                "use_manual_ev": use_manual_ev,
+                "use_manual_pv": use_manual_pv,
+                "eac_methods": eac_methods,
+                "calendars": calendars or None,
+                "calendar_column": None if calendar_column == 'None' else calendar_column,
+            }
+            st.success("✓ Global settings saved!")
+            st.rerun()
 
 # Show current global values
 if 'global_values' in st.session_state:
     with st.expander("Current Global Settings", expanded=False):
         st.json(st.session_state.global_values)
 
+# Optional price index replacing the constant inflation rate
+with st.expander("📈 Price Index (optional)", expanded='price_index' in st.session_state):
+    st.write("Upload monthly price index levels or annual inflation rates, optionally one series per "
+             "currency or region. They replace the constant inflation rate in present value calculations.")
+    index_file = st.file_uploader("Choose a price index CSV", type=["csv"], key="price_index_uploader")
+
+    if index_file is not None:
+        index_table = read_csv(index_file)
+        index_columns = index_table.columns.tolist()
+        project_columns = st.session_state.project_data.columns.tolist() if data_loaded else []
+
+        with st.form("price_index_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                date_column = st.selectbox("Month column", index_columns)
+                value_column = st.selectbox("Value column", index_columns, index=min(1, len(index_columns) - 1))
+                value_type = st.radio("Values are", ["Index levels", "Annual inflation rates (%)"], horizontal=True)
+            with col2:
+                series_column = st.selectbox(
+                    "Series column", ['None'] + index_columns,
+                    help="Column with the currency or region of each series ('None' for one series for all projects)"
+                )
+                match_column = st.selectbox(
+                    "Project data column with the series", ['None'] + project_columns,
+                    help="Projects whose value has no series keep the constant inflation rate"
+                )
+
+            if st.form_submit_button("✓ Use Price Index", width='stretch'):
+                try:
+                    st.session_state.price_index = PriceIndex.from_frame(
+                        index_table,
+                        date_column,
+                        value_column,
+                        series_column=None if series_column == 'None' else series_column,
+                        rates=value_type != "Index levels",
+                        match_column=None if match_column == 'None' else match_column
+                    )
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    st.rerun()
+
+    if 'price_index' in st.session_state:
+        price_index = st.session_state.price_index
+        series = "one series" if price_index.keys == [None] else f"{len(price_index.keys)} series matched on '{price_index.match_column}'"
+        st.success(f"✓ Using a price index with {series} and {len(price_index):,} monthly levels")
+        if st.button("🗑️ Stop Using Price Index"):
+            del st.session_state.price_index
+            st.rerun()
+
+# Optional exchange rates for portfolios in several currencies
+with st.expander("💱 Currencies and Exchange Rates (optional)", expanded='fx_rates' in st.session_state):
+    st.write("Upload dated exchange rates to convert budgets and costs in several currencies to one "
+             "reporting currency. Each row uses the latest rate on or before its data date.")
+    fx_file = st.file_uploader("Choose an exchange rate CSV", type=["csv"], key="fx_uploader")
+
+    if fx_file is not None:
+        fx_table = read_csv(fx_file)
+        fx_columns = fx_table.columns.tolist()
+        project_columns = st.session_state.project_data.columns.tolist() if data_loaded else []
+
+        with st.form("fx_form"):
+            col1, col2 = st.columns(2)
+            with col1:
+                fx_date_column = st.selectbox("Date column", fx_columns)
+                fx_currency_column = st.selectbox("Currency column", fx_columns, index=min(1, len(fx_columns) - 1))
+                fx_rate_column = st.selectbox("Rate column", fx_columns, index=min(2, len(fx_columns) - 1))
+            with col2:
+                reporting_currency = st.text_input("Reporting currency", "USD", max_chars=3)
+                fx_quote = st.radio(
+                    "Rates are quoted as",
+                    ["Reporting currency per unit", "Units per reporting currency"],
+                    help="e.g. EUR 1.08 (USD per EUR) or EUR 0.93 (EUR per USD) for a USD report"
+                )
+                currency_column = st.selectbox(
+                    "Project data column with the currency", ['None'] + project_columns,
+                    help="Projects without a currency are taken to be in the reporting currency"
+                )
+
+            if st.form_submit_button("✓ Use Exchange Rates", width='stretch'):
+                try:
+                    if currency_column == 'None':
+                        raise ValueError("Please select the project data column with each project's currency")
+                    st.session_state.fx_rates = FxRates.from_frame(
+                        fx_table,
+                        fx_date_column,
+                        fx_currency_column,
+                        fx_rate_column,
+                        reporting_currency,
+                        inverse=fx_quote != "Reporting currency per unit",
+                        match_column=currency_column
+                    )
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    st.rerun()
+
+    if 'fx_rates' in st.session_state:
+        fx_rates = st.session_state.fx_rates
+        st.success(
+            f"✓ Converting to {fx_rates.reporting_currency} with {len(fx_rates):,} rates for "
+            f"{len(fx_rates.keys)} currencies, matched on '{fx_rates.match_column}'"
+        )
+        if st.button("🗑️ Stop Converting Currencies"):
+            del st.session_state.fx_rates
+            st.rerun()
+
 st.divider()
 
 # Next steps guidance
@@ -290,11 +586,3 @@ elif globals_set:
     st.warning("⚠️ Please load data above before proceeding.")
 else:
     st.info("ℹ️ Start by loading your data and configuring settings above.")
-
-
-
-
-
-
-
-
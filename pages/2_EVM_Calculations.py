@@ -1,12 +1,31 @@
 
 import streamlit as st
 import pandas as pd
-from core.evm_engine import calculate_evm
+from core.diagnostics import ISSUE_TYPES
+from core.time_phasing import baseline_curves, join_history
+from core.portfolio import latest_summary
+from core.kernels import METRIC_DEPENDENCIES, required_metrics
+from utils.calculation_jobs import start_calculation, collect_calculation, calculation_cache
+from utils.results_grid import results_grid
+from utils.formatting import format_money
 import json
+from utils.profiling import profile_page
+from utils.memory import use_frames
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("EVM Calculations")
+use_frames('project_data', 'calculated_data')
+
+# Columns shown under Detailed Results until the user picks others
+DEFAULT_RESULT_COLUMNS = ['project_id', 'project_name', 'bac', 'ac', 'ev', 'pv',
+                          'cpi', 'spi', 'cv', 'sv', 'percent_complete']
 
 st.title("EVM Calculations")
 st.write("Step 2: Calculate EVM metrics and export results")
 
+# Pick up results from a background calculation that has finished
+finished_job = collect_calculation()
+
 # Check prerequisites
 data_loaded = 'project_data' in st.session_state
 globals_set = 'global_values' in st.session_state
@@ -57,82 +76,130 @@ st.divider()
 # Calculation Section
 st.header("1. Calculate EVM Metrics")
 
+if 'fx_rates' in st.session_state:
+    fx_rates = st.session_state.fx_rates
+    if fx_rates.match_column in st.session_state.project_data.columns:
+        st.caption(f"💱 Money columns are converted to {fx_rates.reporting_currency} "
+                   "at each row's data date")
+    else:
+        st.warning(f"⚠️ The project data has no currency column '{fx_rates.match_column}', so amounts "
+                   f"cannot be converted to {fx_rates.reporting_currency}. Pick the currency column "
+                   "again on the **Data Input** page, or stop converting currencies.")
+if 'price_index' in st.session_state:
+    st.caption("📈 Present values use the price index from the Data Input page instead of the constant inflation rate")
+
 if calculated:
     st.info("ℹ️ Calculations have already been performed. Click below to recalculate.")
 
+# The Detailed Results column selector can limit the calculation to the metrics it shows
+outputs = None
+if st.toggle(
+    "Only calculate the metrics selected under Detailed Results",
+    key="calculate_selected_only",
+    help="Skips the other metrics and everything only they depend on, saving time and memory "
+         "on large portfolios. The Project Analysis and Portfolio Overview pages need the full set."
+):
+    selected = st.session_state.get('results_columns', DEFAULT_RESULT_COLUMNS)
+    outputs = [col for col in METRIC_DEPENDENCIES if col in selected]
+    if outputs:
+        dependencies = [col for col in required_metrics(outputs) if col not in outputs]
+        st.caption(f"Calculating {', '.join(outputs)}"
+                   + (f" (using {', '.join(dependencies)})" if dependencies else ""))
+    else:
+        st.warning("No metrics are selected under Detailed Results; all metrics will be calculated")
+        outputs = None
+
+job = st.session_state.get('calculation_job')
+running = job is not None and job.is_running
+
 col1, col2 = st.columns([3, 1])
 with col1:
-    if st.button("🔄 Calculate EVM Metrics", width='stretch', type="primary"):
-        with st.spinner("Calculating EVM metrics..."):
-            import warnings
-
-            # Capture warnings
-            warning_list = []
-            def warning_handler(message, category, filename, lineno, file=None, line=None):
-                warning_list.append(str(message))
-
-            old_showwarning = warnings.showwarning
-            warnings.showwarning = warning_handler
-
-            try:
-                st.session_state.calculated_data = calculate_evm(
-                    st.session_state.project_data.copy(),
-                    st.session_state.global_values
-                )
-
-                # Restore warning handler
-                warnings.showwarning = old_showwarning
-
-                # Show any warnings
-                if warning_list:
-                    st.warning("⚠️ Calculation completed with warnings:")
-                    for warn in warning_list:
-                        st.write(f"- {warn}")
-                    st.info("💡 Check the Data Quality section in Data Input page for details.")
-
-                st.success("✅ EVM calculations completed successfully!")
-                st.rerun()
-            except ValueError as e:
-                warnings.showwarning = old_showwarning
-                st.error(f"❌ Data validation error: {e}")
-                st.info("💡 Tip: Check that all required columns are mapped and contain valid data.")
-                st.stop()
-            except Exception as e:
-                warnings.showwarning = old_showwarning
-                st.error(f"❌ Calculation error: {e}")
-                st.error("**Error details:** " + str(type(e).__name__))
-
-                # Show stack trace for debugging
-                import traceback
-                with st.expander("🔍 Error Details (for debugging)"):
-                    st.code(traceback.format_exc())
-
-                with st.expander("💡 Troubleshooting Tips"):
-                    st.markdown("""
-                    **Common issues:**
-                    - **Date format errors**: Ensure dates are in YYYY-MM-DD format or valid Excel serial numbers
-                    - **Missing data**: Check that all required fields have values
-                    - **Invalid numbers**: Ensure BAC and AC are positive numbers
-                    - **Column mapping**: Verify all required columns are properly mapped in Data Input
-
-                    **Date format examples:**
-                    - ✅ Good: `2024-01-15`, `2024/01/15`, `44940` (Excel serial)
-                    - ❌ Bad: `15-01-2024`, `15/01/24`, very large numbers
-
-                    **Action items:**
-                    1. Go back to Data Input page
-                    2. Open "Data Quality Check" section
-                    3. Look for columns with problematic values
-                    4. Fix the source CSV file or adjust column mapping
-                    """)
-                st.stop()
+    if st.button("🔄 Calculate EVM Metrics", width='stretch', type="primary", disabled=running):
+        # Copy-on-write: the job shares project_data's columns instead of copying them
+        start_calculation(
+            st.session_state.project_data,
+            st.session_state.global_values,
+            price_index=st.session_state.get('price_index'),
+            fx_rates=st.session_state.get('fx_rates'),
+            outputs=outputs
+        )
+        st.rerun()
 
 with col2:
-    if calculated:
+    if calculated and not running:
         if st.button("🗑️ Clear Results", width='stretch'):
             del st.session_state.calculated_data
+            st.session_state.pop('calculation_diagnostics', None)
+            st.session_state.pop('calculation_id', None)
+            st.session_state.pop('calculation_currency', None)
             st.rerun()
 
+if running:
+    @st.fragment(run_every=0.5)
+    def calculation_progress():
+        job = st.session_state.get('calculation_job')
+        if job is None or not job.is_running:
+            # Finished while we were polling - rerun the page to collect it
+            st.rerun()
+
+        st.progress(
+            job.progress,
+            text=f"Calculating EVM metrics... {job.rows_done:,} of {job.total_rows:,} rows "
+                 f"(chunk {job.chunks_done}/{job.total_chunks})"
+        )
+        st.caption("You can keep working on other pages - results are collected when the calculation finishes.")
+        if st.button("✖️ Cancel Calculation"):
+            job.cancel()
+
+    calculation_progress()
+
+elif finished_job is not None and finished_job.status == 'done':
+    if finished_job.diagnostics:
+        counts = finished_job.diagnostics.counts()
+        st.warning(
+            "⚠️ Calculation completed with data issues: "
+            + ", ".join(f"{ISSUE_TYPES.get(issue, issue)} ({count:,})" for issue, count in counts.items())
+        )
+        st.info("💡 See **Data Issues** below, or the Data Quality section in Data Input page for details.")
+    st.success("✅ EVM calculations completed successfully!")
+
+elif finished_job is not None and finished_job.status == 'cancelled':
+    st.info("ℹ️ Calculation cancelled. Previous results, if any, have been kept.")
+
+elif finished_job is not None and finished_job.status == 'failed':
+    e = finished_job.error
+    if isinstance(e, ValueError):
+        st.error(f"❌ Data validation error: {e}")
+        st.info("💡 Tip: Check that all required columns are mapped and contain valid data.")
+    else:
+        st.error(f"❌ Calculation error: {e}")
+        st.error("**Error details:** " + str(type(e).__name__))
+
+        # Show stack trace for debugging
+        with st.expander("🔍 Error Details (for debugging)"):
+            st.code(finished_job.error_traceback)
+
+        with st.expander("💡 Troubleshooting Tips"):
+            st.markdown("""
+            **Common issues:**
+            - **Date format errors**: Use one date format per column (YYYY-MM-DD, MM/DD/YYYY, DD/MM/YYYY, ...) or valid Excel serial numbers
+            - **Missing data**: Check that all required fields have values
+            - **Invalid numbers**: Ensure BAC and AC are positive numbers
+            - **Column mapping**: Verify all required columns are properly mapped in Data Input
+
+            **Date format examples:**
+            - ✅ Good: `2024-01-15`, `2024/01/15`, `15-01-2024`, `01/15/2024`, `44940` (Excel serial)
+            - ⚠️ Ambiguous: `01/02/2024` is read as January 2 unless other dates in the column show a day-first format
+            - ❌ Bad: mixing formats in one column, very large numbers
+
+            **Action items:**
+            1. Go back to Data Input page
+            2. Open "Data Quality Check" section
+            3. Look for columns with problematic values
+            4. Fix the source CSV file or adjust column mapping
+            """)
+    st.stop()
+
 st.divider()
 
 # Results Section
@@ -140,68 +207,112 @@ if calculated:
     st.header("2. Review Results")
 
     df = st.session_state.calculated_data
+    # Each project's latest snapshot, built when the calculation finished
+    latest = calculation_cache('latest_summary', latest_summary)
 
     # Key metrics summary
     st.subheader("Key Metrics Summary")
+    st.caption(f"Latest data date of each of the {len(latest):,} projects")
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        avg_cpi = df['cpi'].mean()
-        st.metric(
-            "Avg CPI",
-            f"{avg_cpi:.2f}",
-            delta=f"{avg_cpi - 1:.2f}",
-            delta_color="normal"
-        )
+        if 'cpi' in latest.columns:
+            avg_cpi = latest['cpi'].mean()
+            st.metric(
+                "Avg CPI",
+                f"{avg_cpi:.2f}",
+                delta=f"{avg_cpi - 1:.2f}",
+                delta_color="normal"
+            )
+        else:
+            st.metric("Avg CPI", "N/A")
 
     with col2:
-        avg_spi = df['spi'].mean()
-        st.metric(
-            "Avg SPI",
-            f"{avg_spi:.2f}",
-            delta=f"{avg_spi - 1:.2f}",
-            delta_color="normal"
-        )
+        if 'spi' in latest.columns:
+            avg_spi = latest['spi'].mean()
+            st.metric(
+                "Avg SPI",
+                f"{avg_spi:.2f}",
+                delta=f"{avg_spi - 1:.2f}",
+                delta_color="normal"
+            )
+        else:
+            st.metric("Avg SPI", "N/A")
 
     with col3:
-        total_cv = df['cv'].sum()
-        st.metric(
-            "Total CV",
-            f"${total_cv:,.0f}",
-            delta_color="normal" if total_cv >= 0 else "inverse"
-        )
+        if 'cv' in latest.columns:
+            total_cv = latest['cv'].sum()
+            st.metric(
+                "Total CV",
+                format_money(total_cv),
+                delta_color="normal" if total_cv >= 0 else "inverse"
+            )
+        else:
+            st.metric("Total CV", "N/A")
 
     with col4:
-        avg_complete = df['percent_complete'].mean()
-        st.metric("Avg % Complete", f"{avg_complete:.1f}%")
+        if 'percent_complete' in latest.columns:
+            avg_complete = latest['percent_complete'].mean()
+            st.metric("Avg % Complete", f"{avg_complete:.1f}%")
+        else:
+            st.metric("Avg % Complete", "N/A")
 
     st.divider()
 
+    # Data issues found during calculation
+    diagnostics = st.session_state.get('calculation_diagnostics')
+    if diagnostics is not None and (diagnostics or diagnostics.notes):
+        with st.expander(f"⚠️ Data Issues ({diagnostics.total:,} flagged rows)", expanded=False):
+            for message in diagnostics.notes:
+                st.caption(f"ℹ️ {message}")
+
+            if diagnostics:
+                st.dataframe(diagnostics.summary(), width='stretch', hide_index=True)
+
+                issue_filter = st.multiselect(
+                    "Filter by issue type",
+                    list(diagnostics.counts()),
+                    default=list(diagnostics.counts()),
+                    format_func=lambda issue: ISSUE_TYPES.get(issue, issue)
+                )
+                # One row per flagged row and issue, so it can be as long as the results
+                results_grid(diagnostics.to_frame(df, issues=issue_filter), key="diagnostics_grid", height=300)
+
+        st.divider()
+
+    if diagnostics is not None and diagnostics.date_formats:
+        st.caption("📅 Date formats detected: " + " · ".join(diagnostics.date_format_summary()))
+
     # Full results table
     st.subheader("Detailed Results")
 
-    # Column selector
+    # Column selector; metrics the last calculation skipped can be picked to calculate them
     all_columns = df.columns.tolist()
-    default_columns = ['project_id', 'project_name', 'bac', 'ac', 'ev', 'pv',
-                      'cpi', 'spi', 'cv', 'sv', 'percent_complete']
-    available_defaults = [col for col in default_columns if col in all_columns]
+    all_columns += [col for col in METRIC_DEPENDENCIES if col not in all_columns]
+    available_defaults = [col for col in DEFAULT_RESULT_COLUMNS if col in all_columns]
 
     selected_columns = st.multiselect(
         "Select columns to display",
         all_columns,
         default=available_defaults,
-        help="Choose which columns to show in the results table"
+        key="results_columns",
+        help="Choose which columns to show in the results table. With "
+             "'Only calculate the metrics selected' on, this also sets what the next calculation computes."
     )
+    not_calculated = [col for col in selected_columns if col not in df.columns]
+    if not_calculated:
+        st.info(f"ℹ️ Not in the current results: {', '.join(not_calculated)}. Recalculate to include them.")
+        selected_columns = [col for col in selected_columns if col in df.columns]
+
+    # Option to show all columns
+    show_all = st.toggle("Show All Columns", key="results_show_all")
 
-    if selected_columns:
-        st.dataframe(df[selected_columns], width='stretch', height=400)
+    if show_all or selected_columns:
+        # Only the current page of results is sent to the browser
+        results_grid(df, key="results_grid", columns=None if show_all else selected_columns)
     else:
         st.warning("Please select at least one column to display")
 
-    # Option to show all columns
-    with st.expander("Show All Columns", expanded=False):
-        st.dataframe(df, width='stretch', height=400)
-
     st.divider()
 
     # Export Section
@@ -242,9 +353,9 @@ if calculated:
 
     with col2:
         # Export to JSON
-        calculated_data_for_json = df.copy()
-        for col in calculated_data_for_json.select_dtypes(include=['datetime64[ns]']).columns:
-            calculated_data_for_json[col] = calculated_data_for_json[col].dt.strftime('%Y-%m-%d')
+        # Only the date columns are rebuilt; the rest are shared with df
+        date_columns = df.select_dtypes(include=['datetime64[ns]']).columns
+        calculated_data_for_json = df.assign(**{col: df[col].dt.strftime('%Y-%m-%d') for col in date_columns})
 
         if include_settings:
             export_data = {
@@ -266,6 +377,26 @@ if calculated:
             help="Download results as JSON (includes settings if selected)"
         )
 
+    # Monthly baseline for period-by-period reporting (generated on click)
+    global_values = st.session_state.global_values
+
+    def monthly_baseline_csv():
+        curves = baseline_curves(df, global_values)
+        return join_history(curves, df).to_csv(index=False).encode('utf-8')
+
+    # The observed EV comes from the results, which may have skipped it
+    has_ev = 'ev' in df.columns
+    st.download_button(
+        label="📥 Download Monthly Baseline (CSV)",
+        data=monthly_baseline_csv,
+        file_name=f"{file_name}_monthly_baseline.csv",
+        mime='text/csv',
+        width='stretch',
+        disabled=not has_ev,
+        help="Monthly planned value curve for every project (working days when calendars are set), with the PV, EV and AC used in the months that have a data date"
+        if has_ev else "Needs EV - recalculate with all metrics (or with ev selected) to download the monthly baseline"
+    )
+
     st.divider()
     st.success("✅ Ready to analyze! Navigate to **Project Analysis** for detailed project views.")
 
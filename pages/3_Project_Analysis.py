@@ -3,16 +3,42 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
+from core.kernels import EAC_METHODS
+from core.portfolio import latest_summary
+from core.time_phasing import baseline_curves
+from core.trends import build_trends
+from utils.calculation_jobs import collect_calculation, calculation_cache, project_cache, require_metrics
+from utils.results_grid import results_grid
+from utils.formatting import format_money, currency_symbol
+from utils.profiling import profile_page
+from utils.memory import use_frames
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Project Analysis")
+use_frames('calculated_data')
 
 st.title("Project Analysis")
 st.write("Step 3: Analyze individual project performance")
 
+# Pick up results from a background calculation that has finished
+finished_job = collect_calculation()
+if finished_job is not None:
+    if finished_job.is_running:
+        st.info(f"⏳ EVM calculation running in the background ({finished_job.progress:.0%}). "
+                "Results below are from the previous calculation.")
+    elif finished_job.status == 'done':
+        st.toast("✅ EVM calculations completed - showing the new results.")
+    elif finished_job.status == 'failed':
+        st.error(f"❌ Background calculation failed: {finished_job.error}. See the **EVM Calculations** page.")
+
 # Check prerequisites
 if 'calculated_data' not in st.session_state:
     st.error("⚠️ No calculated data available!")
     st.warning("📊 Please run calculations in the **EVM Calculations** page first.")
     st.stop()
 
+require_metrics('ev', 'pv', 'cpi', 'spi', 'tcpi', 'eac', 'actual_duration_months', 'original_duration_months')
+
 df = st.session_state.calculated_data
 
 st.divider()
@@ -20,26 +46,36 @@ st.divider()
 # Project Selection
 st.header("Select Project")
 
-# Create project list with better formatting
+# Create project list with better formatting (once per calculation)
 if 'project_id' in df.columns and 'project_name' in df.columns:
-    project_list = df['project_id'].astype(str) + " - " + df['project_name'].astype(str)
+    project_list = calculation_cache(
+        'project_options',
+        lambda data: (data['project_id'].astype(str) + " - " + data['project_name'].astype(str)).unique()
+    )
 else:
     st.error("Required columns 'project_id' or 'project_name' not found in data")
     st.stop()
 
 selected_project = st.selectbox(
     "Choose a project to analyze",
-    project_list.unique(),
+    project_list,
     help="Select a project to view detailed metrics and analysis"
 )
 
 if selected_project:
     project_id = selected_project.split(" - ")[0]
-    project_data = df[df['project_id'].astype(str) == project_id].copy()
 
-    # Sort by Data Date if available
-    if 'data_date' in project_data.columns:
-        project_data = project_data.sort_values(by='data_date', ascending=True)
+    def select_project_rows():
+        rows = df[df['project_id'].astype(str) == project_id]
+        # Sort by Data Date if available
+        if 'data_date' in rows.columns:
+            rows = rows.sort_values(by='data_date', ascending=True)
+        return rows
+
+    # Figures and tables below are built once per calculation and project,
+    # and again when the settings or currency they are drawn with change
+    project_data = project_cache(project_id, 'rows', select_project_rows)
+    display_settings = (st.session_state.get('global_values'), currency_symbol())
 
     st.divider()
 
@@ -50,7 +86,8 @@ if selected_project:
     st.subheader("Key Performance Indicators")
 
     if len(project_data) > 0:
-        latest = project_data.iloc[-1]
+        # The project's latest snapshot, from the summary built with the calculation
+        latest = calculation_cache('latest_summary', latest_summary).loc[project_id]
 
         col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -88,7 +125,7 @@ if selected_project:
             if 'cv' in latest and pd.notna(latest['cv']):
                 st.metric(
                     "Cost Variance",
-                    f"${latest['cv']:,.0f}",
+                    format_money(latest['cv']),
                     delta_color="normal" if latest['cv'] >= 0 else "inverse"
                 )
             else:
@@ -98,7 +135,7 @@ if selected_project:
             if 'sv' in latest and pd.notna(latest['sv']):
                 st.metric(
                     "Schedule Variance",
-                    f"${latest['sv']:,.0f}",
+                    format_money(latest['sv']),
                     delta_color="normal" if latest['sv'] >= 0 else "inverse"
                 )
             else:
@@ -112,15 +149,15 @@ if selected_project:
 
         with col1:
             if 'bac' in latest:
-                st.metric("Budget (BAC)", f"${latest['bac']:,.0f}")
+                st.metric("Budget (BAC)", format_money(latest['bac']))
 
         with col2:
             if 'ac' in latest:
-                st.metric("Actual Cost (AC)", f"${latest['ac']:,.0f}")
+                st.metric("Actual Cost (AC)", format_money(latest['ac']))
 
         with col3:
             if 'eac' in latest and pd.notna(latest['eac']):
-                st.metric("Est. at Completion", f"${latest['eac']:,.0f}")
+                st.metric("Est. at Completion", format_money(latest['eac']))
             else:
                 st.metric("Est. at Completion", "N/A")
 
@@ -128,28 +165,51 @@ if selected_project:
             if 'vac' in latest and pd.notna(latest['vac']):
                 st.metric(
                     "Variance at Completion",
-                    f"${latest['vac']:,.0f}",
+                    format_money(latest['vac']),
                     delta_color="normal" if latest['vac'] >= 0 else "inverse"
                 )
             else:
                 st.metric("Variance at Completion", "N/A")
 
+        # Forecasts by the EAC methods selected in the global settings
+        forecasts = [(EAC_METHODS[method], latest[method]) for method in EAC_METHODS if method in latest]
+        if forecasts:
+            with st.expander("🔮 Forecasts by Method", expanded=False):
+                rows = [('BAC / CPI', latest['eac'], 'Cost')] + [
+                    (formula, value, 'Duration (months)' if formula.startswith('AT') else 'Cost')
+                    for formula, value in forecasts
+                ]
+                st.dataframe(
+                    pd.DataFrame(rows, columns=['Method', 'Forecast', 'Unit']),
+                    hide_index=True,
+                    column_config={'Forecast': st.column_config.NumberColumn(format='%.2f')}
+                )
+                if 'eac_low' in latest and pd.notna(latest['eac_low']):
+                    st.caption(f"Cost forecasts range from {format_money(latest['eac_low'])} to {format_money(latest['eac_high'])}")
+                if latest.get('bac_unattainable'):
+                    st.warning(
+                        f"⚠️ TCPI {latest['tcpi']:.2f} is {latest['tcpi_cpi_gap']:.2f} above CPI {latest['cpi']:.2f}: "
+                        "finishing on budget is unlikely, plan with an EAC instead"
+                    )
+                if latest.get('optimistic_eacs', 0) > 0:
+                    st.info(f"ℹ️ {int(latest['optimistic_eacs'])} cost forecast(s) need better efficiency than the current CPI")
+
         st.divider()
 
         # Visualizations
         st.subheader("Performance Trends")
 
+        if 'data_date' in project_data.columns:
+            x_data = project_data['data_date']
+            x_label = 'Date'
+        else:
+            x_data = range(len(project_data))
+            x_label = 'Data Point'
+
         # EVM Chart (AC, PV, EV)
-        if all(col in project_data.columns for col in ['ac', 'pv', 'ev']):
+        def build_evm_figure():
             fig = go.Figure()
 
-            if 'data_date' in project_data.columns:
-                x_data = project_data['data_date']
-                x_label = 'Date'
-            else:
-                x_data = range(len(project_data))
-                x_label = 'Data Point'
-
             fig.add_trace(go.Scatter(
                 x=x_data, y=project_data['ac'],
                 name='Actual Cost (AC)',
@@ -160,6 +220,17 @@ if selected_project:
                 name='Planned Value (PV)',
                 line=dict(color='blue', width=3, dash='dash')
             ))
+
+            # Full monthly baseline from plan start to plan finish
+            if 'data_date' in project_data.columns and 'global_values' in st.session_state:
+                baseline = baseline_curves(project_data, st.session_state.global_values)
+                if len(baseline):
+                    pv_curve = baseline.curve(baseline.project_ids[0])
+                    fig.add_trace(go.Scatter(
+                        x=pv_curve.index, y=pv_curve.values,
+                        name='Baseline PV (monthly)',
+                        line=dict(color='lightblue', width=2, dash='dot')
+                    ))
             fig.add_trace(go.Scatter(
                 x=x_data, y=project_data['ev'],
                 name='Earned Value (EV)',
@@ -169,59 +240,74 @@ if selected_project:
             fig.update_layout(
                 title='EVM Performance Over Time',
                 xaxis_title=x_label,
-                yaxis_title='Value ($)',
+                yaxis_title=f'Value ({currency_symbol().strip()})',
                 hovermode='x unified',
                 height=400
             )
+            return fig
 
-            st.plotly_chart(fig, width='stretch')
+        if all(col in project_data.columns for col in ['ac', 'pv', 'ev']):
+            st.plotly_chart(project_cache(project_id, 'evm_figure', build_evm_figure, display_settings), width='stretch')
 
         # Performance Indices
+        def build_index_figure(metric, title, color):
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=x_data,
+                y=project_data[metric],
+                name=metric.upper(),
+                line=dict(color=color, width=3),
+                fill='tozeroy'
+            ))
+            fig.add_hline(y=1, line_dash="dash", line_color="gray",
+                          annotation_text="Target (1.0)")
+            fig.update_layout(
+                title=title,
+                yaxis_title=metric.upper(),
+                height=300
+            )
+            return fig
+
         if all(col in project_data.columns for col in ['cpi', 'spi']):
             col1, col2 = st.columns(2)
 
             with col1:
-                fig_cpi = go.Figure()
-
-                if 'data_date' in project_data.columns:
-                    x_data = project_data['data_date']
-                else:
-                    x_data = range(len(project_data))
-
-                fig_cpi.add_trace(go.Scatter(
-                    x=x_data,
-                    y=project_data['cpi'],
-                    name='CPI',
-                    line=dict(color='purple', width=3),
-                    fill='tozeroy'
-                ))
-                fig_cpi.add_hline(y=1, line_dash="dash", line_color="gray",
-                                 annotation_text="Target (1.0)")
-                fig_cpi.update_layout(
-                    title='Cost Performance Index (CPI)',
-                    yaxis_title='CPI',
-                    height=300
-                )
+                fig_cpi = project_cache(project_id, 'cpi_figure', lambda: build_index_figure(
+                    'cpi', 'Cost Performance Index (CPI)', 'purple'), display_settings)
                 st.plotly_chart(fig_cpi, width='stretch')
 
             with col2:
-                fig_spi = go.Figure()
-                fig_spi.add_trace(go.Scatter(
-                    x=x_data,
-                    y=project_data['spi'],
-                    name='SPI',
-                    line=dict(color='orange', width=3),
-                    fill='tozeroy'
-                ))
-                fig_spi.add_hline(y=1, line_dash="dash", line_color="gray",
-                                 annotation_text="Target (1.0)")
-                fig_spi.update_layout(
-                    title='Schedule Performance Index (SPI)',
-                    yaxis_title='SPI',
-                    height=300
-                )
+                fig_spi = project_cache(project_id, 'spi_figure', lambda: build_index_figure(
+                    'spi', 'Schedule Performance Index (SPI)', 'orange'), display_settings)
                 st.plotly_chart(fig_spi, width='stretch')
 
+        # Trends, shared with the Portfolio Overview page and computed once per calculation
+        trends = calculation_cache('portfolio_trends', build_trends)
+        project_trend = trends.project_summary(project_id)
+        if project_trend is not None and project_trend['period'] > 1:
+            st.write(f"**Trend over the last {trends.window} data dates**")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("CPI Slope", f"{project_trend['cpi_slope']:+.3f}" if pd.notna(project_trend['cpi_slope']) else "N/A",
+                          help="Change in CPI per data date")
+            with col2:
+                st.metric("SPI Slope", f"{project_trend['spi_slope']:+.3f}" if pd.notna(project_trend['spi_slope']) else "N/A",
+                          help="Change in SPI per data date")
+            with col3:
+                st.metric(f"CPI ({trends.window}-date avg)",
+                          f"{project_trend['cpi_rolling']:.2f}" if pd.notna(project_trend['cpi_rolling']) else "N/A")
+            with col4:
+                st.metric("EV Change", format_money(project_trend['ev_delta']) if pd.notna(project_trend['ev_delta']) else "N/A",
+                          help="Since the previous data date")
+            with col5:
+                st.metric("AC Change", format_money(project_trend['ac_delta']) if pd.notna(project_trend['ac_delta']) else "N/A",
+                          help="Since the previous data date")
+            if project_trend['deteriorating']:
+                st.warning(
+                    f"⚠️ Deteriorating: CPI fell on {project_trend['cpi_decline_streak']} and SPI on "
+                    f"{project_trend['spi_decline_streak']} consecutive data dates"
+                )
+
         st.divider()
 
         # Detailed Data Table
@@ -232,18 +318,15 @@ if selected_project:
                       'percent_complete', 'eac', 'vac']
         available_columns = [col for col in key_columns if col in project_data.columns]
 
-        if available_columns:
-            st.dataframe(
-                project_data[available_columns],
-                width='stretch',
-                height=300
-            )
-        else:
-            st.dataframe(project_data, width='stretch', height=300)
-
         # Option to show all columns
-        with st.expander("Show All Columns", expanded=False):
-            st.dataframe(project_data, width='stretch', height=400)
+        show_all = st.toggle("Show All Columns", key="project_show_all")
+
+        results_grid(
+            project_data,
+            key="project_grid",
+            columns=None if show_all or not available_columns else available_columns,
+            height=300
+        )
 
         st.divider()
 
@@ -343,7 +426,7 @@ if selected_project:
                 return "N/A"
 
             if format_type == 'currency':
-                return f"${value:,.0f}"
+                return format_money(value)
             elif format_type == 'decimal1':
                 return f"{value:.1f}"
             elif format_type == 'decimal2':
@@ -365,103 +448,110 @@ if selected_project:
             # Normalized Progress Chart
             st.subheader("📈 Normalized Progress Over Time")
 
-            # Calculate normalized values
-            chart_data = project_data.copy()
-            chart_data['normalized_time'] = chart_data['actual_duration_months'] / chart_data['original_duration_months']
-            chart_data['normalized_ev'] = chart_data['ev'] / chart_data['bac']
-            chart_data['normalized_ac'] = chart_data['ac'] / chart_data['bac']
+            def build_progress_figure():
+                # Calculate normalized values
+                chart_data = project_data.assign(
+                    normalized_time=project_data['actual_duration_months'] / project_data['original_duration_months'],
+                    normalized_ev=project_data['ev'] / project_data['bac'],
+                    normalized_ac=project_data['ac'] / project_data['bac']
+                )
 
-            # Create plotly figure
-            fig = go.Figure()
+                # Create plotly figure
+                fig = go.Figure()
+
+                # Add EV line/points
+                fig.add_trace(go.Scatter(
+                    x=chart_data['normalized_time'],
+                    y=chart_data['normalized_ev'],
+                    mode='lines+markers',
+                    name='EV (Earned Value)',
+                    line=dict(color='green', width=3),
+                    marker=dict(size=10, symbol='circle')
+                ))
 
-            # Add EV line/points
-            fig.add_trace(go.Scatter(
-                x=chart_data['normalized_time'],
-                y=chart_data['normalized_ev'],
-                mode='lines+markers',
-                name='EV (Earned Value)',
-                line=dict(color='green', width=3),
-                marker=dict(size=10, symbol='circle')
-            ))
+                # Add AC line/points
+                fig.add_trace(go.Scatter(
+                    x=chart_data['normalized_time'],
+                    y=chart_data['normalized_ac'],
+                    mode='lines+markers',
+                    name='AC (Actual Cost)',
+                    line=dict(color='red', width=3),
+                    marker=dict(size=10, symbol='square')
+                ))
 
-            # Add AC line/points
-            fig.add_trace(go.Scatter(
-                x=chart_data['normalized_time'],
-                y=chart_data['normalized_ac'],
-                mode='lines+markers',
-                name='AC (Actual Cost)',
-                line=dict(color='red', width=3),
-                marker=dict(size=10, symbol='square')
-            ))
+                # Add vertical lines for each data date
+                for idx, row in chart_data.iterrows():
+                    date_str = pd.to_datetime(row['data_date']).strftime('%Y-%m-%d') if pd.notna(row['data_date']) else ''
+                    fig.add_vline(
+                        x=row['normalized_time'],
+                        line_dash="dash",
+                        line_color="gray",
+                        opacity=0.3,
+                        annotation_text=date_str,
+                        annotation_position="top"
+                    )
+
+                # Add diagonal reference line (perfect progress)
+                fig.add_trace(go.Scatter(
+                    x=[0, 1],
+                    y=[0, 1],
+                    mode='lines',
+                    name='Planned (Perfect Progress)',
+                    line=dict(color='blue', width=2, dash='dot'),
+                    showlegend=True
+                ))
 
-            # Add vertical lines for each data date
-            for idx, row in chart_data.iterrows():
-                date_str = pd.to_datetime(row['data_date']).strftime('%Y-%m-%d') if pd.notna(row['data_date']) else ''
-                fig.add_vline(
-                    x=row['normalized_time'],
-                    line_dash="dash",
-                    line_color="gray",
-                    opacity=0.3,
-                    annotation_text=date_str,
-                    annotation_position="top"
+                fig.update_layout(
+                    title='Normalized Progress Chart (0-1 Scale)',
+                    xaxis_title='Normalized Time (0 = Start, 1 = Planned Finish)',
+                    yaxis_title='Normalized Value (as fraction of BAC)',
+                    hovermode='x unified',
+                    height=500,
+                    xaxis=dict(range=[-0.05, 1.1]),
+                    yaxis=dict(range=[-0.05, 1.1])
                 )
 
-            # Add diagonal reference line (perfect progress)
-            fig.add_trace(go.Scatter(
-                x=[0, 1],
-                y=[0, 1],
-                mode='lines',
-                name='Planned (Perfect Progress)',
-                line=dict(color='blue', width=2, dash='dot'),
-                showlegend=True
-            ))
+                return fig
 
-            fig.update_layout(
-                title='Normalized Progress Chart (0-1 Scale)',
-                xaxis_title='Normalized Time (0 = Start, 1 = Planned Finish)',
-                yaxis_title='Normalized Value (as fraction of BAC)',
-                hovermode='x unified',
-                height=500,
-                xaxis=dict(range=[-0.05, 1.1]),
-                yaxis=dict(range=[-0.05, 1.1])
-            )
-
-            st.plotly_chart(fig, width='stretch')
+            st.plotly_chart(project_cache(project_id, 'progress_figure', build_progress_figure, display_settings), width='stretch')
 
             st.divider()
 
-            # Get data dates as column headers
-            data_dates = project_data['data_date'].tolist()
-            date_columns = [f"Date {i+1}" if pd.isna(d) else pd.to_datetime(d).strftime('%Y-%m-%d')
-                           for i, d in enumerate(data_dates)]
-
-            # Build single comprehensive table with all variables
             st.subheader("📋 Complete Time-Series Data")
 
-            all_rows = []
+            def build_time_series_table():
+                # Get data dates as column headers
+                data_dates = project_data['data_date'].tolist()
+                date_columns = [f"Date {i+1}" if pd.isna(d) else pd.to_datetime(d).strftime('%Y-%m-%d')
+                               for i, d in enumerate(data_dates)]
+
+                # Build single comprehensive table with all variables
+                all_rows = []
+
+                # Add category headers and variables
+                for category_name, variables in variable_categories.items():
+                    # Add category header row
+                    category_header = {'Category': f"📁 {category_name}", 'Metric': ''}
+                    for col in date_columns:
+                        category_header[col] = ''
+                    all_rows.append(category_header)
 
-            # Add category headers and variables
-            for category_name, variables in variable_categories.items():
-                # Add category header row
-                category_header = {'Category': f"📁 {category_name}", 'Metric': ''}
-                for col in date_columns:
-                    category_header[col] = ''
-                all_rows.append(category_header)
+                    # Add variable rows
+                    for var_name, var_info in variables.items():
+                        if var_name in project_data.columns:
+                            row = {'Category': '', 'Metric': var_info['label']}
 
-                # Add variable rows
-                for var_name, var_info in variables.items():
-                    if var_name in project_data.columns:
-                        row = {'Category': '', 'Metric': var_info['label']}
+                            # Add values for each data date
+                            for i, col_name in enumerate(date_columns):
+                                value = project_data.iloc[i][var_name]
+                                row[col_name] = format_value(value, var_info['format'])
 
-                        # Add values for each data date
-                        for i, col_name in enumerate(date_columns):
-                            value = project_data.iloc[i][var_name]
-                            row[col_name] = format_value(value, var_info['format'])
+                            all_rows.append(row)
 
-                        all_rows.append(row)
+                return pd.DataFrame(all_rows)
 
-            if all_rows:
-                complete_df = pd.DataFrame(all_rows)
+            complete_df = project_cache(project_id, 'time_series_table', build_time_series_table, display_settings)
+            if len(complete_df):
                 st.dataframe(
                     complete_df,
                     width='stretch',
@@ -0,0 +1,234 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+from core.portfolio import HEALTH_LEVELS, build_aggregates, binned_scatter, latest_summary
+from core.trends import build_trends
+from utils.calculation_jobs import collect_calculation, calculation_cache, require_metrics
+from utils.results_grid import results_grid
+from utils.formatting import format_money, currency_symbol
+from utils.profiling import profile_page
+from utils.memory import use_frames
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Portfolio Overview")
+use_frames('calculated_data')
+
+st.title("Portfolio Overview")
+st.write("Portfolio-wide performance, using the latest data date of every project")
+
+# Pick up results from a background calculation that has finished
+collect_calculation()
+
+# Check prerequisites
+if 'calculated_data' not in st.session_state:
+    st.error("⚠️ No calculated data available!")
+    st.warning("📊 Please run calculations in the **EVM Calculations** page first.")
+    st.stop()
+
+require_metrics('ev', 'pv', 'cpi', 'spi')
+
+HEALTH_COLORS = {
+    'On Track': 'green',
+    'At Risk': 'orange',
+    'Critical': 'red',
+    'No Data': 'lightgray',
+}
+
+# Aggregates and trends are computed once per calculation and reused across reruns
+latest_rows = calculation_cache('latest_summary', latest_summary)
+aggregates = calculation_cache('portfolio_aggregates', lambda data: build_aggregates(latest_rows))
+trends = calculation_cache('portfolio_trends', build_trends)
+
+latest = aggregates.latest
+departments = aggregates.departments['department'].tolist()
+
+selected_departments = st.multiselect(
+    "Departments",
+    departments,
+    default=departments,
+    help="Limit the scatter and summary to these departments"
+)
+if not selected_departments:
+    st.warning("Please select at least one department")
+    st.stop()
+
+if len(selected_departments) < len(departments):
+    latest = latest[latest['department'].isin(selected_departments)]
+
+st.divider()
+
+# Portfolio KPIs
+col1, col2, col3, col4 = st.columns(4)
+total_ac = latest['ac'].sum()
+total_pv = latest['pv'].sum()
+with col1:
+    st.metric("Projects", f"{len(latest):,}")
+with col2:
+    st.metric("Total Budget (BAC)", format_money(latest['bac'].sum()))
+with col3:
+    portfolio_cpi = latest['ev'].sum() / total_ac if total_ac > 0 else np.nan
+    st.metric("Portfolio CPI", f"{portfolio_cpi:.2f}" if pd.notna(portfolio_cpi) else "N/A",
+              help="Budget weighted: total EV / total AC")
+with col4:
+    portfolio_spi = latest['ev'].sum() / total_pv if total_pv > 0 else np.nan
+    st.metric("Portfolio SPI", f"{portfolio_spi:.2f}" if pd.notna(portfolio_spi) else "N/A",
+              help="Budget weighted: total EV / total PV")
+
+st.divider()
+
+# CPI vs SPI scatter
+st.subheader("CPI vs SPI")
+
+col1, col2 = st.columns([3, 1])
+with col2:
+    axis_max = st.slider("Axis range", 1.2, 5.0, 2.0, 0.1, help="Values beyond the range are drawn at the edge")
+    max_points = st.select_slider("Max individual points", [1000, 2000, 5000, 10000, 20000], value=5000)
+
+binned = binned_scatter(
+    latest['cpi'], latest['spi'],
+    x_range=(0.0, axis_max), y_range=(0.0, axis_max),
+    max_points=max_points
+)
+
+with col1:
+    fig = go.Figure()
+    if binned['n_binned']:
+        counts = binned['counts'].astype(float)
+        counts[counts == 0] = np.nan
+        fig.add_trace(go.Heatmap(
+            x=binned['x_centers'], y=binned['y_centers'], z=counts,
+            colorscale='Blues', name='Dense regions',
+            colorbar=dict(title='Projects'),
+            hovertemplate='CPI %{x:.2f}, SPI %{y:.2f}<br>%{z} projects<extra></extra>'
+        ))
+
+    points = latest.iloc[binned['points']]
+    hover_columns = [col for col in ['project_id', 'project_name'] if col in points.columns]
+    hover_template = ' - '.join(f'%{{customdata[{i}]}}' for i in range(len(hover_columns)))
+    hover_template += '<br>CPI %{x:.2f}, SPI %{y:.2f}<extra></extra>'
+    for health in HEALTH_LEVELS:
+        subset = points[points['health'] == health]
+        if len(subset) == 0:
+            continue
+        fig.add_trace(go.Scattergl(
+            x=subset['cpi'].clip(upper=axis_max), y=subset['spi'].clip(upper=axis_max),
+            mode='markers',
+            name=health,
+            marker=dict(color=HEALTH_COLORS[health], size=6, opacity=0.7),
+            customdata=subset[hover_columns].astype(str).to_numpy(),
+            hovertemplate=hover_template
+        ))
+
+    fig.add_hline(y=1, line_dash="dash", line_color="gray")
+    fig.add_vline(x=1, line_dash="dash", line_color="gray")
+    fig.update_layout(
+        xaxis_title='CPI',
+        yaxis_title='SPI',
+        xaxis=dict(range=[0, axis_max]),
+        yaxis=dict(range=[0, axis_max]),
+        height=550
+    )
+    st.plotly_chart(fig, width='stretch')
+
+st.caption(
+    f"{len(binned['points']):,} projects drawn individually, "
+    f"{binned['n_binned']:,} aggregated into dense regions"
+)
+
+st.divider()
+
+# Department x health heatmap
+st.subheader("Department Health")
+
+heatmap_value = st.radio("Show", ["Project count", "Budget (BAC)"], horizontal=True)
+matrix = aggregates.department_health if heatmap_value == "Project count" else aggregates.department_health_bac
+matrix = matrix.loc[matrix.index.isin(selected_departments)]
+
+fig_heatmap = go.Figure(go.Heatmap(
+    x=[str(col) for col in matrix.columns],
+    y=matrix.index.tolist(),
+    z=matrix.to_numpy(),
+    colorscale='Reds',
+    texttemplate='%{z:,.0f}',
+    hovertemplate='%{y} / %{x}: %{z:,.0f}<extra></extra>'
+))
+fig_heatmap.update_layout(height=max(300, 30 * len(matrix) + 100))
+st.plotly_chart(fig_heatmap, width='stretch')
+
+st.divider()
+
+# Budget-weighted bubble chart per department
+st.subheader("Budget-Weighted Performance by Department")
+
+summary = aggregates.departments
+summary = summary[summary['department'].isin(selected_departments)]
+max_bac = summary['bac'].max()
+
+fig_bubble = go.Figure(go.Scatter(
+    x=summary['cpi'],
+    y=summary['spi'],
+    mode='markers+text',
+    text=summary['department'],
+    textposition='top center',
+    marker=dict(
+        size=summary['bac'],
+        sizemode='area',
+        sizeref=2.0 * max_bac / (60 ** 2) if max_bac > 0 else 1,
+        sizemin=4,
+        color=summary['cpi'],
+        colorscale='RdYlGn',
+        cmin=0.8,
+        cmax=1.2,
+        showscale=True,
+        colorbar=dict(title='CPI')
+    ),
+    customdata=summary[['projects', 'bac']].to_numpy(),
+    hovertemplate='%{text}<br>CPI %{x:.2f}, SPI %{y:.2f}<br>%{customdata[0]} projects, BAC ' + currency_symbol() + '%{customdata[1]:,.0f}<extra></extra>'
+))
+fig_bubble.add_hline(y=1, line_dash="dash", line_color="gray")
+fig_bubble.add_vline(x=1, line_dash="dash", line_color="gray")
+fig_bubble.update_layout(xaxis_title='CPI (EV / AC)', yaxis_title='SPI (EV / PV)', height=500)
+st.plotly_chart(fig_bubble, width='stretch')
+
+with st.expander("Department Summary Table", expanded=False):
+    st.dataframe(summary, width='stretch', hide_index=True)
+
+st.divider()
+
+# Trends across data dates
+st.subheader("Trends Across Data Dates")
+
+project_trends = trends.summary
+if 'department' in project_trends.columns and len(selected_departments) < len(departments):
+    project_trends = project_trends[project_trends['department'].astype(str).isin(selected_departments)]
+
+if len(project_trends) == 0 or project_trends['period'].max() < 2:
+    st.info("ℹ️ Trends need at least two data dates per project.")
+else:
+    deteriorating = project_trends[project_trends['deteriorating']]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Projects with History", f"{(project_trends['period'] > 1).sum():,}")
+    with col2:
+        st.metric("Deteriorating", f"{len(deteriorating):,}",
+                  help=f"CPI or SPI fell on {trends.periods} consecutive data dates")
+    with col3:
+        st.metric("Median CPI Slope", f"{project_trends['cpi_slope'].median():+.3f}",
+                  help=f"Change per data date over the last {trends.window} data dates")
+    with col4:
+        st.metric("Median SPI Slope", f"{project_trends['spi_slope'].median():+.3f}",
+                  help=f"Change per data date over the last {trends.window} data dates")
+
+    if len(deteriorating):
+        st.write(f"**Deteriorating projects** (CPI or SPI down {trends.periods} data dates in a row)")
+        trend_columns = ['project_id', 'project_name', 'department', 'data_date',
+                         'cpi', 'cpi_rolling', 'cpi_slope', 'cpi_decline_streak',
+                         'spi', 'spi_rolling', 'spi_slope', 'spi_decline_streak', 'ev_delta', 'ac_delta']
+        results_grid(
+            deteriorating.sort_values('cpi_slope'),
+            key="trends_grid",
+            columns=[col for col in trend_columns if col in deteriorating.columns]
+        )
+    else:
+        st.success(f"✓ No project's CPI or SPI fell on {trends.periods} consecutive data dates")
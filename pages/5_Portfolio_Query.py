@@ -0,0 +1,87 @@
+import time
+
+import streamlit as st
+import pandas as pd
+from core.query import QueryIndex
+from utils.calculation_jobs import collect_calculation, calculation_cache
+from utils.results_grid import results_grid
+from utils.profiling import profile_page
+from utils.memory import use_frames
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Portfolio Query")
+use_frames('calculated_data')
+
+st.title("Portfolio Query")
+st.write("Filter calculated results and find top projects without exporting to Excel")
+
+# Pick up results from a background calculation that has finished
+collect_calculation()
+
+# Check prerequisites
+if 'calculated_data' not in st.session_state:
+    st.error("⚠️ No calculated data available!")
+    st.warning("📊 Please run calculations in the **EVM Calculations** page first.")
+    st.stop()
+
+# Indexes are built once per calculation and reused across reruns and queries
+index = calculation_cache('query_index', QueryIndex)
+df = index.data
+
+numeric_columns = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+
+with st.expander("ℹ️ Query syntax", expanded=False):
+    st.markdown("""
+- Compare columns with values: `cpi < 0.9`, `department == 'Engineering'`, `data_date >= '2024-06-30'`
+- Ranges: `0.8 <= spi < 1`
+- Lists: `department in ['IT', 'Operations']`, `project_id not in ['P001', 'P002']`
+- Combine with `and`, `or`, `not` and parentheses
+- `latest` keeps each project's row at its most recent data date
+""")
+    st.caption("Columns: " + ", ".join(f"`{col}`" for col in df.columns))
+
+expression = st.text_input(
+    "Query",
+    "latest and cpi < 0.9",
+    key="query_expression",
+    help="Leave empty to select every row"
+)
+
+col1, col2, col3 = st.columns([2, 1, 1])
+with col1:
+    order_by = st.selectbox("Top projects by", ['(none)'] + numeric_columns, key="query_order_by")
+with col2:
+    direction = st.radio("Order", ["Smallest", "Largest"], horizontal=True, key="query_direction",
+                         disabled=order_by == '(none)')
+with col3:
+    top_n = st.number_input("How many", min_value=1, value=20, step=5, key="query_top_n",
+                            disabled=order_by == '(none)')
+
+started = time.perf_counter()
+try:
+    if order_by == '(none)':
+        result = index.query(expression)
+    else:
+        result = index.query(expression, order_by=order_by, n=top_n, largest=direction == "Largest")
+except ValueError as e:
+    st.error(f"❌ {e}")
+    st.stop()
+elapsed_ms = (time.perf_counter() - started) * 1000
+
+st.success(f"✓ {len(result):,} of {len(df):,} rows in {elapsed_ms:,.1f} ms")
+
+if len(result):
+    key_columns = ['project_id', 'project_name', 'department', 'data_date', 'bac', 'ac', 'ev', 'pv',
+                   'cpi', 'spi', 'eac', 'vac']
+    show_all = st.toggle("Show All Columns", key="query_show_all")
+    columns = None if show_all else [col for col in key_columns if col in result.columns]
+    if order_by != '(none)' and columns is not None and order_by not in columns:
+        columns.append(order_by)
+    results_grid(result, key="query_grid", columns=columns)
+
+    st.download_button(
+        "📥 Download Query Results (CSV)",
+        data=lambda: result.to_csv(index=False),
+        file_name="evm_query_results.csv",
+        mime="text/csv"
+    )
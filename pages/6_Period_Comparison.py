@@ -0,0 +1,116 @@
+import time
+
+import streamlit as st
+import pandas as pd
+from core.portfolio import CHANGE_STATUSES, compare_periods
+from utils.calculation_jobs import collect_calculation, calculation_cache
+from utils.results_grid import results_grid
+from utils.formatting import format_money
+from utils.profiling import profile_page
+from utils.memory import use_frames
+
+# Opt-in profiling of this page (?profile=1 or EVM_PROFILE=1)
+profile_page("Period Comparison")
+use_frames('calculated_data')
+
+st.title("Period Comparison")
+st.write("What changed for every project between two data dates")
+
+# Pick up results from a background calculation that has finished
+collect_calculation()
+
+# Check prerequisites
+if 'calculated_data' not in st.session_state:
+    st.error("⚠️ No calculated data available!")
+    st.warning("📊 Please run calculations in the **EVM Calculations** page first.")
+    st.stop()
+
+data_dates = calculation_cache(
+    'period_data_dates',
+    lambda df: sorted(pd.Timestamp(d) for d in df['data_date'].dropna().unique())
+)
+if len(data_dates) < 2:
+    st.info("ℹ️ Comparing periods needs results for at least two data dates.")
+    st.stop()
+
+col1, col2 = st.columns(2)
+with col1:
+    previous_date = st.selectbox("Previous data date", data_dates, index=len(data_dates) - 2,
+                                 format_func=lambda d: d.strftime('%Y-%m-%d'), key="period_previous")
+with col2:
+    current_date = st.selectbox("Current data date", data_dates, index=len(data_dates) - 1,
+                                format_func=lambda d: d.strftime('%Y-%m-%d'), key="period_current")
+if previous_date >= current_date:
+    st.warning("Please pick a current data date after the previous one")
+    st.stop()
+
+col1, col2 = st.columns(2)
+with col1:
+    index_threshold = st.number_input("CPI/SPI change threshold", min_value=0.01, value=0.05, step=0.01,
+                                      key="period_index_threshold",
+                                      help="Flag projects whose CPI or SPI moved by at least this much")
+with col2:
+    money_threshold = st.number_input("EAC/VAC change threshold (% of BAC)", min_value=0.1, value=5.0, step=0.5,
+                                      key="period_money_threshold",
+                                      help="Flag projects whose EAC or VAC moved by at least this share of the budget")
+
+# Kept across reruns (paging, filters) until the calculation or the inputs change
+settings = (st.session_state.get('calculation_id'), previous_date, current_date, index_threshold, money_threshold)
+cached = st.session_state.get('period_comparison')
+if cached is None or cached[0] != settings:
+    started = time.perf_counter()
+    changes = compare_periods(st.session_state.calculated_data, previous_date, current_date,
+                              index_threshold=index_threshold, money_threshold=money_threshold)
+    cached = (settings, changes, (time.perf_counter() - started) * 1000)
+    st.session_state.period_comparison = cached
+_, changes, elapsed_ms = cached
+
+st.caption(f"{len(changes):,} projects compared in {elapsed_ms:,.0f} ms")
+
+status_counts = changes['status'].value_counts()
+continuing = changes[changes['status'] != 'New']
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    st.metric("New", f"{status_counts.get('New', 0):,}", help="Reported at the current data date only")
+with col2:
+    st.metric("Completed", f"{status_counts.get('Completed', 0):,}", help="Reached 100% complete since the previous data date")
+with col3:
+    st.metric("Dropped", f"{status_counts.get('Dropped', 0):,}", help="Reported at the previous data date only")
+with col4:
+    st.metric("Significant Changes", f"{(changes['significant'] & (changes['status'] == 'Continuing')).sum():,}",
+              help="Continuing projects with a CPI, SPI, EAC or VAC change above its threshold")
+with col5:
+    st.metric("Total EAC Change", format_money(continuing['eac_change'].sum()) if 'eac_change' in changes else "N/A")
+
+st.divider()
+
+# Ranked change table
+st.subheader("Changes")
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    statuses = st.multiselect("Status", CHANGE_STATUSES, default=CHANGE_STATUSES, key="period_statuses")
+with col2:
+    significant_only = st.toggle("Significant only", value=True, key="period_significant_only")
+
+shown = changes[changes['status'].isin(statuses)]
+if significant_only:
+    shown = shown[shown['significant']]
+
+if len(shown):
+    key_columns = ['project_id', 'project_name', 'department', 'status', 'change_score',
+                   'cpi_previous', 'cpi_current', 'cpi_change', 'spi_previous', 'spi_current', 'spi_change',
+                   'eac_previous', 'eac_current', 'eac_change', 'vac_previous', 'vac_current', 'vac_change']
+    show_all = st.toggle("Show All Columns", key="period_show_all")
+    results_grid(shown, key="period_grid",
+                 columns=None if show_all else [col for col in key_columns if col in shown.columns])
+
+    st.download_button(
+        label="📥 Download CSV",
+        data=lambda: shown.to_csv(index=False),
+        file_name=f"period_comparison_{previous_date:%Y%m%d}_{current_date:%Y%m%d}.csv",
+        mime='text/csv',
+        help="Download the changes shown above"
+    )
+else:
+    st.success("✓ No projects match the selected filters")
@@ -0,0 +1,118 @@
+"""
+Benchmarks the EVM kernel against the DataFrame wrapper.
+
+Run from the repository root:
+    python scripts/benchmark_kernels.py [--rows 1000000]
+
+Reports the median time of a 1-row call (the single-project status update
+path) and a large batch call for both compute_metrics and calculate_evm.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.evm_engine import calculate_evm  # noqa: E402
+from core.kernels import compute_metrics  # noqa: E402
+from models.project import ProjectBatch  # noqa: E402
+
+GLOBAL_VALUES = {
+    'curve': 's-curve',
+    'alpha': 2.0,
+    'beta': 2.0,
+    'inflation_rate': 3.5,
+    'use_manual_ev': False,
+    'use_manual_pv': False,
+}
+
+
+def make_inputs(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2023-01-01', 'ns') + rng.integers(0, 365, rows).astype('timedelta64[D]')
+    finish = start + rng.integers(90, 1500, rows).astype('timedelta64[D]')
+    data_date = start + rng.integers(1, 900, rows).astype('timedelta64[D]')
+    bac = rng.uniform(1e5, 1e7, rows)
+    ac = bac * rng.uniform(0.05, 1.1, rows)
+    return {'bac': bac, 'ac': ac, 'start': start, 'finish': finish, 'data_date': data_date}
+
+
+def as_batch(inputs):
+    rows = len(inputs['bac'])
+    ids = np.array([f'P{i}' for i in range(rows)], dtype=object)
+    return ProjectBatch({
+        'project_id': ids,
+        'project_name': ids,
+        'department': np.full(rows, 'Dept', dtype=object),
+        'bac': inputs['bac'],
+        'ac': inputs['ac'],
+        'plan_start_date': inputs['start'],
+        'plan_finish_date': inputs['finish'],
+        'data_date': inputs['data_date'],
+    })
+
+
+def as_frame(inputs):
+    """String DataFrame as it arrives from the Data Input page."""
+    batch = as_batch(inputs)
+    frame = batch.to_dataframe()
+    for col in ['plan_start_date', 'plan_finish_date', 'data_date']:
+        frame[col] = frame[col].dt.strftime('%Y-%m-%d')
+    return frame.astype(str)
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def kernel_call(inputs):
+    return compute_metrics(
+        inputs['bac'], inputs['ac'], inputs['start'], inputs['finish'], inputs['data_date'],
+        curve=GLOBAL_VALUES['curve'], alpha=GLOBAL_VALUES['alpha'], beta=GLOBAL_VALUES['beta'],
+        inflation_rate=GLOBAL_VALUES['inflation_rate'],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows in the large-batch run')
+    parser.add_argument('--frame-rows', type=int, default=5_000,
+                        help='rows for calculate_evm on a string DataFrame (per-cell date parsing)')
+    args = parser.parse_args()
+
+    single = make_inputs(1)
+    scalar = {key: values[0] for key, values in single.items()}
+    large = make_inputs(args.rows)
+
+    results = [
+        ('compute_metrics, 1 row (scalars)', timed(lambda: kernel_call(scalar), 200)),
+        ('compute_metrics, 1 row (arrays)', timed(lambda: kernel_call(single), 200)),
+        ('calculate_evm, 1 row (ProjectBatch)', timed(lambda: calculate_evm(as_batch(single), GLOBAL_VALUES), 50)),
+        ('calculate_evm, 1 row (DataFrame)', timed(lambda: calculate_evm(as_frame(single), GLOBAL_VALUES), 50)),
+        (f'compute_metrics, {args.rows:,} rows', timed(lambda: kernel_call(large), 3)),
+        (f'calculate_evm, {args.rows:,} rows (ProjectBatch)',
+         timed(lambda: calculate_evm(as_batch(large), GLOBAL_VALUES), 1)),
+    ]
+    if args.frame_rows:
+        frame = as_frame(make_inputs(args.frame_rows))
+        results.append((f'calculate_evm, {args.frame_rows:,} rows (DataFrame)',
+                        timed(lambda: calculate_evm(frame, GLOBAL_VALUES), 1)))
+
+    width = max(len(name) for name, _ in results)
+    for name, seconds in results:
+        if seconds < 0.01:
+            print(f'{name:<{width}}  {seconds * 1e6:10.1f} us')
+        else:
+            print(f'{name:<{width}}  {seconds:10.3f} s')
+
+
+if __name__ == '__main__':
+    main()
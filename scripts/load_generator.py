@@ -0,0 +1,102 @@
+"""
+Load generator for the local EVM service.
+
+Start the service first (python -m services.evm_service), then run:
+    python scripts/load_generator.py --concurrency 16 --duration 10 --projects 5
+
+Each worker thread sends /calculate requests with a few random projects as
+fast as it can. The client-side latency percentiles and throughput are
+printed together with the service's own /stats, which shows how many
+requests were combined per engine batch.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+
+def make_projects(rng, count):
+    projects = []
+    for _ in range(count):
+        start = np.datetime64('2023-01-01') + int(rng.integers(0, 365))
+        finish = start + int(rng.integers(90, 1500))
+        data_date = start + int(rng.integers(1, 900))
+        bac = float(rng.uniform(1e5, 1e7))
+        projects.append({
+            'Project ID': f'P{int(rng.integers(0, 1_000_000)):06d}',
+            'Project Name': 'Load test',
+            'Department': f'Dept {int(rng.integers(0, 10))}',
+            'Budget (BAC)': round(bac, 2),
+            'Actual Cost (AC)': round(bac * float(rng.uniform(0.05, 1.1)), 2),
+            'Plan Start Date': str(start),
+            'Plan Finish Date': str(finish),
+            'Data Date': str(data_date),
+        })
+    return projects
+
+
+def post_json(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}, method='POST'
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def worker(url, args, seed, deadline, latencies, errors):
+    rng = np.random.default_rng(seed)
+    global_values = {'curve': args.curve}
+    while time.perf_counter() < deadline:
+        payload = {'projects': make_projects(rng, args.projects), 'global_values': global_values}
+        started = time.perf_counter()
+        try:
+            post_json(url + '/calculate', payload)
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            errors.append(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the EVM service')
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds')
+    parser.add_argument('--projects', type=int, default=5, help='projects per request')
+    parser.add_argument('--curve', default='s-curve', choices=['linear', 's-curve'])
+    args = parser.parse_args()
+
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.url, args, seed, deadline, latencies, errors))
+        for seed in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f'requests:     {len(latencies):,} ok, {len(errors):,} failed in {elapsed:.1f} s')
+    print(f'throughput:   {len(latencies) / elapsed:,.1f} requests/s, '
+          f'{len(latencies) * args.projects / elapsed:,.1f} projects/s')
+    if len(latencies_ms):
+        print('latency (ms): ' + ', '.join(
+            f'p{p}={np.percentile(latencies_ms, p):.2f}' for p in (50, 90, 99)
+        ) + f', max={latencies_ms.max():.2f}')
+
+    with urllib.request.urlopen(args.url + '/stats') as response:
+        print('service stats:')
+        for key, value in json.loads(response.read()).items():
+            print(f'  {key}: {value:,.2f}' if isinstance(value, float) else f'  {key}: {value:,}')
+
+
+if __name__ == '__main__':
+    main()
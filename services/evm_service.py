@@ -0,0 +1,377 @@
+"""
+Local HTTP service around the EVM engine.
+
+Run from the repository root:
+    python -m services.evm_service --port 8765
+
+Endpoints:
+    POST /calculate        JSON {"projects": [...], "global_values": {...}}
+                           -> {"results": [...], "diagnostics": {...}}
+    POST /calculate/arrow  Arrow IPC stream of project rows; global values as
+                           JSON in the X-Global-Values header -> Arrow IPC stream
+    GET  /health           liveness check
+    GET  /stats            latency percentiles, throughput and batch sizes
+
+Project rows may use either the CSV column names ('Budget (BAC)', ...) or
+the engine's names ('bac', ...). Arrow tables whose columns already have the
+engine's names and types skip string conversion and date parsing entirely.
+"""
+import argparse
+import io
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from core.evm_engine import (COLUMN_MAPPING, NO_VALID_DATES_MESSAGE, calculate_evm, has_valid_dates,
+                              infer_date_formats)
+from models.project import ProjectBatch
+
+# Same defaults as the Data Input page's global settings form
+DEFAULT_GLOBAL_VALUES = {
+    'curve': 's-curve',
+    'alpha': 2.0,
+    'beta': 2.0,
+    'inflation_rate': 3.5,
+    'use_manual_ev': False,
+    'use_manual_pv': False,
+}
+
+
+@lru_cache(maxsize=256)
+def _parse_global_values(raw):
+    values = dict(DEFAULT_GLOBAL_VALUES)
+    if raw:
+        values.update(json.loads(raw))
+    return values
+
+
+def parse_global_values(values):
+    """
+    Returns (cache key, settings dict) for request settings.
+
+    Settings are keyed by their canonical JSON, so repeat requests with the
+    same settings reuse one parsed dict and land in the same micro-batch.
+    """
+    raw = values if isinstance(values, str) else json.dumps(values or {}, sort_keys=True)
+    return raw, _parse_global_values(raw)
+
+
+class ServiceStats:
+    """Thread-safe latency and throughput counters for the service."""
+
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self.started = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.batches = 0
+        self.engine_seconds = 0.0
+
+    def record_request(self, seconds, rows, failed=False):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+            self.errors += int(failed)
+
+    def record_batch(self, requests, seconds):
+        with self._lock:
+            self._batch_sizes.append(requests)
+            self.batches += 1
+            self.engine_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            batch_sizes = np.array(self._batch_sizes)
+            elapsed = time.time() - self.started
+            snapshot = {
+                'uptime_seconds': elapsed,
+                'requests': self.requests,
+                'rows': self.rows,
+                'errors': self.errors,
+                'batches': self.batches,
+                'requests_per_second': self.requests / elapsed if elapsed else 0.0,
+                'rows_per_second': self.rows / elapsed if elapsed else 0.0,
+                'engine_seconds': self.engine_seconds,
+            }
+        if len(latencies):
+            for p in (50, 90, 99):
+                snapshot[f'latency_p{p}_ms'] = float(np.percentile(latencies, p))
+            snapshot['latency_max_ms'] = float(latencies.max())
+        if len(batch_sizes):
+            snapshot['mean_requests_per_batch'] = float(batch_sizes.mean())
+        return snapshot
+
+
+class _Request:
+    __slots__ = ('data', 'settings_key', 'global_values', 'date_formats', 'future')
+
+    def __init__(self, data, settings_key, global_values, date_formats):
+        self.data = data
+        self.settings_key = settings_key
+        self.global_values = global_values
+        self.date_formats = date_formats
+        self.future = Future()
+
+    @property
+    def batch_key(self):
+        return (self.settings_key, isinstance(self.data, ProjectBatch), tuple(sorted(self.date_formats.items())))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and runs the engine once per batch.
+
+    A single worker thread waits up to ``max_wait`` seconds after the first
+    request (or until ``max_batch_rows`` rows are queued), groups the queued
+    requests by settings, input type and date formats, concatenates each
+    group, and calls calculate_evm once per group. Each request then gets its
+    own slice of the result. If a batch fails, its requests are retried one
+    by one so a bad request cannot fail its neighbours.
+
+    Requests are checked on submit: their columns get the engine's names (so
+    'Budget (BAC)' and 'bac' concatenate into one column), their date
+    formats are inferred from their own values, and a request without any
+    valid date fails on its own instead of joining a batch.
+    """
+
+    def __init__(self, stats, max_batch_rows=50000, max_wait=0.005):
+        self.stats = stats
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='evm-microbatcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, data, global_values):
+        """Queues a DataFrame or ProjectBatch; returns a Future of (result, diagnostic counts)."""
+        settings_key, settings = parse_global_values(global_values)
+        date_formats = {}
+        if not isinstance(data, ProjectBatch):
+            data = data.rename(columns=COLUMN_MAPPING)
+            date_formats = infer_date_formats(data)
+        request = _Request(data, settings_key, settings, date_formats)
+        if has_valid_dates(data, date_formats):
+            self._queue.put(request)
+        else:
+            request.future.set_exception(ValueError(NO_VALID_DATES_MESSAGE))
+        return request.future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            rows = len(pending[0].data)
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                rows += len(request.data)
+
+            groups = {}
+            for request in pending:
+                groups.setdefault(request.batch_key, []).append(request)
+            for group in groups.values():
+                self._process(group)
+
+    def _process(self, group):
+        started = time.perf_counter()
+        try:
+            if len(group) == 1:
+                combined = group[0].data
+            elif isinstance(group[0].data, ProjectBatch):
+                combined = ProjectBatch.concat(request.data for request in group)
+            else:
+                combined = pd.concat([request.data for request in group], ignore_index=True)
+            result, diagnostics = calculate_evm(combined, group[0].global_values, return_diagnostics=True,
+                                                date_formats=group[0].date_formats, require_valid_dates=False)
+        except Exception as e:
+            if len(group) == 1:
+                group[0].future.set_exception(e)
+            else:
+                for request in group:
+                    self._process([request])
+            return
+        self.stats.record_batch(len(group), time.perf_counter() - started)
+
+        result = result.reset_index(drop=True)
+        offset = 0
+        for request in group:
+            size = len(request.data)
+            counts = {}
+            for (issue, _), rows in diagnostics.issues.items():
+                # Batches have a RangeIndex, so diagnostic row labels are positions
+                in_request = int(((rows >= offset) & (rows < offset + size)).sum())
+                if in_request:
+                    counts[issue] = counts.get(issue, 0) + in_request
+            request.future.set_result((result.iloc[offset:offset + size], counts))
+            offset += size
+
+
+def _frame_from_records(records):
+    frame = pd.DataFrame.from_records(records)
+    if frame.empty:
+        raise ValueError("Request contains no projects")
+    return frame
+
+
+def _data_from_arrow(body):
+    import pyarrow as pa
+
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+    try:
+        return ProjectBatch.from_arrow(table)
+    except ValueError:
+        # Not typed with the engine's names - use the string DataFrame path
+        return table.to_pandas()
+
+
+def _arrow_response(result):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(result, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrent clients connect in bursts; the default backlog of 5 drops some
+    request_queue_size = 128
+
+
+class EVMService:
+    """Owns the batcher and statistics and serves HTTP requests."""
+
+    def __init__(self, host='127.0.0.1', port=8765, max_batch_rows=50000, max_wait=0.005):
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(self.stats, max_batch_rows=max_batch_rows, max_wait=max_wait)
+        self.server = _Server((host, port), self._handler_class())
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def warm_up(self):
+        """Runs one tiny calculation so imports and settings caches are hot."""
+        parse_global_values(DEFAULT_GLOBAL_VALUES)
+        warm = _frame_from_records([{
+            'project_id': 'warm-up', 'project_name': 'warm-up', 'department': '',
+            'bac': 1.0, 'ac': 0.5, 'plan_start_date': '2024-01-01',
+            'plan_finish_date': '2024-12-31', 'data_date': '2024-06-30',
+        }])
+        self.batcher.submit(warm, DEFAULT_GLOBAL_VALUES).result()
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def calculate(self, data, global_values):
+        started = time.perf_counter()
+        try:
+            result = self.batcher.submit(data, global_values).result()
+        except Exception:
+            self.stats.record_request(time.perf_counter() - started, len(data), failed=True)
+            raise
+        self.stats.record_request(time.perf_counter() - started, len(data))
+        return result
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json'):
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_error(self, status, message):
+                self._send(status, json.dumps({'error': message}))
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self._send(200, json.dumps({'status': 'ok'}))
+                elif self.path == '/stats':
+                    self._send(200, json.dumps(service.stats.snapshot()))
+                else:
+                    self._send_error(404, f'Unknown path {self.path}')
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                try:
+                    if self.path == '/calculate':
+                        payload = json.loads(body)
+                        data = _frame_from_records(payload.get('projects', []))
+                        result, counts = service.calculate(data, payload.get('global_values'))
+                        response = (
+                            '{"results":' + result.to_json(orient='records', date_format='iso')
+                            + ',"diagnostics":' + json.dumps(counts) + '}'
+                        )
+                        self._send(200, response)
+                    elif self.path == '/calculate/arrow':
+                        data = _data_from_arrow(body)
+                        global_values = self.headers.get('X-Global-Values') or '{}'
+                        result, counts = service.calculate(data, global_values)
+                        self._send(200, _arrow_response(result), 'application/vnd.apache.arrow.stream')
+                    else:
+                        self._send_error(404, f'Unknown path {self.path}')
+                except (ValueError, KeyError) as e:
+                    self._send_error(400, str(e))
+                except Exception as e:
+                    self._send_error(500, f'{type(e).__name__}: {e}')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local EVM calculation service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-rows', type=int, default=50000)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help='how long to wait for more requests before running a batch')
+    args = parser.parse_args()
+
+    service = EVMService(args.host, args.port, args.max_batch_rows, args.max_wait_ms / 1000)
+    service.warm_up()
+    print(f'EVM service listening on {service.address}')
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
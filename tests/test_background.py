@@ -0,0 +1,40 @@
+import pandas as pd
+
+from core.background import CalculationJob
+from core.evm_engine import calculate_evm
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+DATE_COLUMNS = ['Plan Start Date', 'Plan Finish Date', 'Data Date']
+
+
+def projects(n=6):
+    return pd.DataFrame({
+        'Project ID': [f'P{i}' for i in range(n)],
+        'Project Name': 'Project',
+        'Budget (BAC)': '1000',
+        'Actual Cost (AC)': '100',
+        'Plan Start Date': '2024-01-01',
+        'Plan Finish Date': '2025-06-30',
+        'Data Date': '2024-06-30',
+    })
+
+
+def test_chunk_without_valid_dates_matches_a_whole_frame_run():
+    data = projects()
+    data.loc[:1, DATE_COLUMNS] = 'not a date'
+    job = CalculationJob(data, GLOBAL_VALUES, chunk_size=2)
+    job._run()
+    assert job.status == 'done', job.error_traceback
+    assert job.result['actual_duration_months'].iloc[:2].isna().all()
+    assert job.result['likely_completion'].iloc[:2].isna().all()
+    pd.testing.assert_frame_equal(job.result, calculate_evm(data, GLOBAL_VALUES))
+
+
+def test_job_without_any_valid_date_fails():
+    data = projects()
+    data[DATE_COLUMNS] = 'not a date'
+    job = CalculationJob(data, GLOBAL_VALUES, chunk_size=2)
+    job._run()
+    assert job.status == 'failed'
+    assert 'No valid dates' in str(job.error)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.calendars import WorkCalendar, add_working_months, build_calendars, calendar_codes, working_duration_months
+
+
+@pytest.fixture
+def calendars():
+    return build_calendars([
+        {'name': 'Standard'},
+        {'name': 'Gulf', 'weekmask': '1111001', 'holidays': ['2024-04-10', '2024-04-11']},
+    ])
+
+
+def test_duration_matches_busday_count(calendars):
+    rng = np.random.default_rng(3)
+    start = np.datetime64('2024-01-01') + rng.integers(0, 365, 200).astype('timedelta64[D]')
+    end = start + rng.integers(-30, 400, 200).astype('timedelta64[D]')
+    codes = rng.integers(0, 2, 200)
+    result = working_duration_months(start.astype('datetime64[ns]'), end.astype('datetime64[ns]'), calendars, codes)
+    for code, calendar in enumerate(calendars):
+        rows = codes == code
+        expected = np.busday_count(start[rows], end[rows], busdaycal=calendar.busdaycalendar)
+        np.testing.assert_allclose(result[rows] * calendar.days_per_month, expected)
+
+
+def test_missing_dates_give_nan(calendars):
+    start = np.array(['2024-01-01', 'NaT'], dtype='datetime64[ns]')
+    end = np.array(['NaT', '2024-02-01'], dtype='datetime64[ns]')
+    assert np.isnan(working_duration_months(start, end, calendars, [0, 1])).all()
+
+
+def test_add_working_months_rolls_forward(calendars):
+    # 2024-01-06 is a Saturday; the Standard calendar starts counting on Monday
+    result = add_working_months(np.array(['2024-01-06'], dtype='datetime64[ns]'), 0.0, calendars, 0)
+    assert result[0] == np.datetime64('2024-01-08')
+
+
+def test_unknown_calendars_fall_back_to_the_first(calendars):
+    codes, unknown = calendar_codes(pd.Series(['Gulf', 'Mars', None]), calendars)
+    np.testing.assert_array_equal(codes, [1, 0, 0])
+    assert unknown == 1
+
+
+def test_invalid_weekmask():
+    with pytest.raises(ValueError):
+        WorkCalendar('Broken', weekmask='1111')
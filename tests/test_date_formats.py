@@ -0,0 +1,58 @@
+import pandas as pd
+
+from core.background import CalculationJob
+from core.evm_engine import calculate_evm, infer_date_formats, parse_date_column
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def eu_frame():
+    """Day-first dates; only the last rows have a day above 12."""
+    starts = ['01/02/2024', '03/04/2024', '05/06/2024', '07/08/2024', '09/10/2024', '25/01/2024']
+    return pd.DataFrame({
+        'Project ID': [f'P{i}' for i in range(len(starts))],
+        'Project Name': 'Project',
+        'Budget (BAC)': '1000',
+        'Actual Cost (AC)': '100',
+        'Plan Start Date': starts,
+        'Plan Finish Date': ['01/12/2025'] * 5 + ['28/12/2025'],
+        'Data Date': ['01/07/2024'] * 5 + ['30/06/2024'],
+    })
+
+
+def test_infer_date_formats_uses_the_whole_input():
+    formats = infer_date_formats(eu_frame())
+    assert formats['plan_start_date'][0] == 'EU'
+    assert formats['data_date'][0] == 'EU'
+
+
+def test_chunks_of_a_job_parse_dates_alike():
+    data = eu_frame()
+    job = CalculationJob(data, GLOBAL_VALUES, chunk_size=2)
+    job._run()
+    assert job.status == 'done', job.error_traceback
+
+    starts = job.result['plan_start_date']
+    assert starts.iloc[0] == pd.Timestamp('2024-02-01')
+    assert starts.iloc[2] == pd.Timestamp('2024-06-05')
+    assert (job.result['data_date'].iloc[:5] == pd.Timestamp('2024-07-01')).all()
+    assert all(info['format'] == 'EU' for info in job.diagnostics.date_formats.values())
+
+    whole = calculate_evm(data, GLOBAL_VALUES)
+    pd.testing.assert_series_equal(job.result['pv'], whole['pv'])
+
+
+
+def test_timezone_aware_and_naive_strings_in_one_column():
+    series = pd.Series(['2024-01-01T00:00:00Z', '2024-02-01', '2024-03-01T05:00:00+02:00'])
+    parsed, info = parse_date_column(series)
+    assert list(parsed) == [pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'),
+                            pd.Timestamp('2024-03-01 03:00')]
+    assert info['invalid'] == 0
+
+    data = eu_frame().iloc[:1].assign(**{'Data Date': '2024-07-01T00:00:00Z',
+                                         'Plan Start Date': '2024-02-01',
+                                         'Plan Finish Date': '2025-12-01T00:00:00+01:00'})
+    result = calculate_evm(pd.concat([data, data.assign(**{'Data Date': '2024-08-01'})]), GLOBAL_VALUES)
+    assert result['data_date'].notna().all()
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from services.evm_service import MicroBatcher, ServiceStats
+from core.evm_engine import calculate_evm
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def request(starts, finish, data_date, project_id='P'):
+    starts = [starts] if isinstance(starts, str) else starts
+    return pd.DataFrame({
+        'Project ID': [f'{project_id}{i}' for i in range(len(starts))],
+        'Project Name': 'Project',
+        'Budget (BAC)': '1000',
+        'Actual Cost (AC)': '100',
+        'Plan Start Date': starts,
+        'Plan Finish Date': finish,
+        'Data Date': data_date,
+    })
+
+
+def submit_together(*frames):
+    # A long wait so every request lands in the same round of the worker
+    batcher = MicroBatcher(ServiceStats(), max_wait=0.2)
+    return [batcher.submit(frame, GLOBAL_VALUES) for frame in frames]
+
+
+def test_requests_keep_their_own_date_formats():
+    # '01/02/2024' is ambiguous; the other start date settles each request's format
+    eu = request(['01/02/2024', '25/01/2024'], '28/12/2025', '30/06/2024', 'EU')
+    us = request(['01/02/2024', '01/25/2024'], '12/28/2025', '06/30/2024', 'US')
+    eu_result, us_result = (future.result(timeout=10)[0] for future in submit_together(eu, us))
+    assert eu_result['plan_start_date'].iloc[0] == pd.Timestamp('2024-02-01')
+    assert us_result['plan_start_date'].iloc[0] == pd.Timestamp('2024-01-02')
+    pd.testing.assert_series_equal(eu_result['pv'].reset_index(drop=True), calculate_evm(eu, GLOBAL_VALUES)['pv'])
+
+
+def test_request_without_valid_dates_fails_alone():
+    good = request('2024-01-01', '2025-06-30', '2024-06-30')
+    bad = request('not a date', 'not a date', 'not a date', 'Q')
+    good_future, bad_future = submit_together(good, bad)
+    assert len(good_future.result(timeout=10)[0]) == 1
+    with pytest.raises(ValueError, match='No valid dates'):
+        bad_future.result(timeout=10)
+
+
+def test_csv_and_engine_column_names_batch_together():
+    csv = request('2024-01-01', '2025-06-30', '2024-06-30')
+    engine = csv.rename(columns={'Project ID': 'project_id', 'Budget (BAC)': 'bac'})
+    csv_result, engine_result = (future.result(timeout=10)[0] for future in submit_together(csv, engine))
+    assert engine_result['bac'].iloc[0] == csv_result['bac'].iloc[0] == 1000
+    assert engine_result['project_id'].iloc[0] == 'P0'
@@ -0,0 +1,71 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.file_utils import deduplicate_snapshots, list_csv_files, read_csv
+
+CSV_FILES = {
+    'plain': b'Project ID,Project Name,Budget (BAC)\nP1, Alpha ,100\nP2,Beta,N/A\n',
+    'quoted newline in header': b'"Project\nID",Name,"Budget (BAC)"\nP1,"A\nB", 100 \nP2,C,200\n',
+    'crlf header with bom': b'\xef\xbb\xbf"Project\r\nID",Name\r\nP1,x\r\n',
+    'blank and duplicate headers': b'a,b,,b\n1,,,3\n',
+}
+
+
+@pytest.mark.parametrize('content', CSV_FILES.values(), ids=CSV_FILES.keys())
+def test_arrow_and_pandas_readers_agree(content):
+    pytest.importorskip('pyarrow')
+    arrow = read_csv(io.BytesIO(content), engine='pyarrow')
+    pandas = read_csv(io.BytesIO(content), engine='pandas')
+    pd.testing.assert_frame_equal(arrow.astype(object), pandas.astype(object))
+
+
+def test_quoted_newline_in_header_is_one_column_name(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'projects.csv'
+    path.write_bytes(CSV_FILES['quoted newline in header'])
+    data = read_csv(path, engine='pyarrow')
+    assert list(data.columns) == ['Project\nID', 'Name', 'Budget (BAC)']
+    assert data['Project\nID'].tolist() == ['P1', 'P2']
+
+
+def test_folder_listing_stays_inside_the_data_root(tmp_path):
+    root = tmp_path / 'data'
+    (root / 'snapshots').mkdir(parents=True)
+    (root / 'snapshots' / 'a.csv').write_text('x\n1\n')
+    (tmp_path / 'secret.csv').write_text('x\n1\n')
+    (root / 'snapshots' / 'link.csv').symlink_to(tmp_path / 'secret.csv')
+
+    assert [p.name for p in list_csv_files('snapshots', root=root)] == ['a.csv']
+    assert [p.name for p in list_csv_files(root / 'snapshots', root=root)] == ['a.csv']
+    assert list_csv_files('.', '../*.csv', root=root) == []
+    with pytest.raises(PermissionError):
+        list_csv_files('..', root=root)
+    with pytest.raises(PermissionError):
+        list_csv_files(tmp_path, root=root)
+    with pytest.raises(ValueError):
+        list_csv_files('snapshots', str(tmp_path / '*.csv'), root=root)
+
+
+def test_rows_without_a_project_id_are_not_one_project():
+    data = pd.DataFrame({
+        'project_id': ['P1', np.nan, None, 'P1', ' '],
+        'data_date': '2024-01-31',
+        'row': range(5),
+    })
+    deduplicated, dropped = deduplicate_snapshots(data)
+    assert dropped == 1
+    assert sorted(deduplicated['row']) == [1, 2, 3, 4]
+
+
+def test_arrow_reader_closes_the_mapped_file(tmp_path, monkeypatch):
+    pa = pytest.importorskip('pyarrow')
+    sources = []
+    memory_map = pa.memory_map
+    monkeypatch.setattr(pa, 'memory_map', lambda *args: sources.append(memory_map(*args)) or sources[-1])
+    path = tmp_path / 'projects.csv'
+    path.write_bytes(CSV_FILES['plain'])
+    assert len(read_csv(path, engine='pyarrow')) == 2
+    assert len(sources) == 1 and sources[0].closed
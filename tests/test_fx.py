@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.evm_engine import calculate_evm
+from core.fx import FxRates
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def rates(match_column='Currency'):
+    table = pd.DataFrame({
+        'Date': ['2024-01-01', '2024-02-15', '2023-06-01'],
+        'Currency': ['EUR', 'EUR', 'GBP'],
+        'Rate': [1.1, 1.2, 1.3],
+    })
+    return FxRates.from_frame(table, 'Date', 'Currency', 'Rate', 'usd', match_column=match_column)
+
+
+def days(*values):
+    return np.array(values, dtype='datetime64[D]')
+
+
+def test_as_of_lookup_at_the_date_edges():
+    fx = rates()
+    result = fx.rate(['EUR'] * 4, days('2023-12-31', '2024-01-01', '2024-02-14', '2024-02-15'))
+    np.testing.assert_array_equal(result, [np.nan, 1.1, 1.1, 1.2])
+    # The last rate holds after the table ends
+    assert fx.rate(['GBP'], days('2030-01-01'))[0] == 1.3
+
+
+def test_reporting_and_unknown_currencies():
+    result = rates().rate([' usd ', None, '', 'XYZ', 'eur'], days(*['2024-03-01'] * 5))
+    np.testing.assert_array_equal(result, [1.0, 1.0, 1.0, np.nan, 1.2])
+
+
+def test_inverse_quotes():
+    table = pd.DataFrame({'Date': ['2024-01-01'], 'Currency': ['EUR'], 'Rate': [0.8]})
+    fx = FxRates.from_frame(table, 'Date', 'Currency', 'Rate', 'USD', inverse=True)
+    assert fx.rate(['EUR'], days('2024-01-02'))[0] == pytest.approx(1.25)
+
+
+def test_engine_converts_money_at_each_data_date():
+    data = pd.DataFrame({
+        'Project ID': ['P1', 'P1'], 'Project Name': 'Project', 'Currency': 'EUR',
+        'Budget (BAC)': '1000', 'Actual Cost (AC)': '100',
+        'Plan Start Date': '2024-01-01', 'Plan Finish Date': '2025-01-01',
+        'Data Date': ['2024-02-01', '2024-03-01'],
+    })
+    result = calculate_evm(data, GLOBAL_VALUES, fx_rates=rates())
+    assert result['bac'].tolist() == pytest.approx([1100, 1200])
+    assert result['fx_rate'].tolist() == pytest.approx([1.1, 1.2])
+
+
+@pytest.mark.parametrize('match_column', [None, 'Missing'])
+def test_conversion_without_the_currency_column_fails(match_column):
+    data = pd.DataFrame({'Currency': ['EUR'], 'data_date': days('2024-03-01')})
+    with pytest.raises(ValueError, match='[Cc]urrency'):
+        rates(match_column).rates_for(data)
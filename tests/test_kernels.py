@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.evm_engine import calculate_evm
+from core.kernels import DAYS_PER_MONTH, compute_metrics, duration_months, required_metrics
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def test_single_project_by_hand():
+    metrics = compute_metrics(1000.0, 500.0, '2024-01-01', '2025-01-01', '2024-07-01', curve='linear')
+    assert metrics['actual_duration_months'] == pytest.approx(182 / DAYS_PER_MONTH)
+    assert metrics['original_duration_months'] == pytest.approx(366 / DAYS_PER_MONTH)
+    assert metrics['pv'] == pytest.approx(1000 * 182 / 366)
+    assert metrics['ev'] == pytest.approx(500.0)
+    assert metrics['cpi'] == pytest.approx(1.0)
+    assert metrics['spi'] == pytest.approx(500 / (1000 * 182 / 366))
+    assert metrics['eac'] == pytest.approx(1000.0)
+    assert metrics['tcpi'] == pytest.approx(1.0)
+
+
+def test_invalid_inputs_give_nan():
+    metrics = compute_metrics([1000.0, 1000.0], [0.0, 100.0], ['2024-01-01', 'NaT'], '2024-12-31', '2024-06-30')
+    assert np.isnan(metrics['cpi'][0])
+    assert np.isnan(metrics['actual_duration_months'][1])
+    # Without an actual duration, present value falls back to AC
+    assert metrics['present_value'][1] == 100.0
+
+
+def test_durations_floor_partial_days():
+    start = np.array(['2024-01-01T18:00'], dtype='datetime64[ns]')
+    end = np.array(['2024-01-31T06:00'], dtype='datetime64[ns]')
+    assert duration_months(start, end)[0] == pytest.approx(29 / DAYS_PER_MONTH)
+
+
+def test_kernel_matches_calculate_evm():
+    data = pd.DataFrame({
+        'Project ID': ['P1', 'P2', 'P3'],
+        'Project Name': 'Project',
+        'Budget (BAC)': ['1000', '5000', '250'],
+        'Actual Cost (AC)': ['400', '1000', '300'],
+        'Plan Start Date': ['2024-01-01', '2023-06-15', '2024-03-01'],
+        'Plan Finish Date': ['2024-12-31', '2025-06-15', '2024-09-01'],
+        'Data Date': '2024-06-30',
+    })
+    result = calculate_evm(data, GLOBAL_VALUES)
+    metrics = compute_metrics(result['bac'], result['ac'], result['plan_start_date'], result['plan_finish_date'],
+                              result['data_date'], alpha=2.0, beta=2.0, inflation_rate=3.5)
+    for name in ('pv', 'ev', 'cpi', 'spi', 'eac', 'es', 'ld'):
+        np.testing.assert_allclose(result[name], metrics[name], err_msg=name)
+
+
+@pytest.mark.parametrize('output', ['cpi', 'spi', 'vac', 'ld', 'likely_completion', 'eac_spie', 'percent_time_used'])
+def test_subset_outputs_match_the_full_output(output):
+    args = ([1000.0, 2000.0], [400.0, 2500.0], ['2024-01-01', '2024-02-01'], ['2024-12-31', '2024-08-01'],
+            '2024-06-30')
+    full = compute_metrics(*args, inflation_rate=3.5)
+    subset = compute_metrics(*args, inflation_rate=3.5, outputs=[output])
+    np.testing.assert_array_equal(subset[output], full[output])
+    assert set(subset) <= set(required_metrics([output]))
+
+
+def test_unknown_outputs():
+    with pytest.raises(ValueError, match='Unknown metric'):
+        required_metrics(['cpi', 'nope'])
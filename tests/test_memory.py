@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.memory import SessionMemory, frame_bytes
+
+
+def frame(rows=1000):
+    return pd.DataFrame({'project_id': [f'P{i}' for i in range(rows)], 'bac': 1.0})
+
+
+def test_pinned_raw_data_is_kept_and_released_raw_data_stays_on_disk(tmp_path):
+    raw = frame()
+    manager = SessionMemory(budget_mb=frame_bytes(raw) * 1.5 / 1024 ** 2, spill_dir=tmp_path)
+    state = {'raw_data': raw, 'project_data': frame()}
+
+    # While columns are mapped both frames are pinned, even over budget
+    manager.use(state, ['project_data', 'raw_data'])
+    assert 'raw_data' in state and not manager.spilled
+
+    # A spill under memory pressure is undone by the next use()
+    manager.spill(state, 'raw_data')
+    manager.use(state, ['project_data', 'raw_data'])
+    assert state['raw_data'].equals(raw)
+
+    # A released frame is only loaded back on request
+    manager.spill(state, 'raw_data')
+    manager.released.add('raw_data')
+    manager.use(state, ['project_data', 'raw_data'])
+    assert 'raw_data' not in state and 'raw_data' in manager.spilled
+
+    # A new upload replaces the released copy
+    state['raw_data'] = frame(10)
+    manager.use(state, ['project_data', 'raw_data'])
+    assert not manager.released and not manager.spilled
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.evm_engine import calculate_evm
+from core.portfolio import compare_periods, latest_summary
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def snapshots():
+    """P1 at both dates, P2 only at the previous one, P3 only at the current one."""
+    return calculate_evm(pd.DataFrame({
+        'Project ID': ['P1', 'P1', 'P2', 'P3'],
+        'Project Name': ['One', 'One', 'Two', 'Three'],
+        'Budget (BAC)': '1000',
+        'Actual Cost (AC)': ['100', '300', '200', '50'],
+        'Plan Start Date': '2024-01-01',
+        'Plan Finish Date': '2025-01-01',
+        'Data Date': ['2024-03-31', '2024-06-30', '2024-03-31', '2024-06-30'],
+    }), GLOBAL_VALUES)
+
+
+def test_projects_missing_on_one_side():
+    changes = compare_periods(snapshots(), '2024-03-31', '2024-06-30').set_index('project_id')
+    assert changes.loc['P1', 'status'] == 'Continuing'
+    assert changes.loc['P2', 'status'] == 'Dropped'
+    assert changes.loc['P3', 'status'] == 'New'
+
+    assert np.isnan(changes.loc['P2', 'cpi_current']) and np.isnan(changes.loc['P2', 'cpi_change'])
+    assert np.isnan(changes.loc['P3', 'cpi_previous']) and np.isnan(changes.loc['P3', 'cpi_change'])
+    assert changes.loc['P2', 'project_name'] == 'Two'
+    assert changes.loc['P3', 'project_name'] == 'Three'
+
+
+def test_changes_match_the_two_snapshots():
+    data = snapshots()
+    changes = compare_periods(data, '2024-03-31', '2024-06-30').set_index('project_id')
+    p1 = data[data['project_id'] == 'P1'].set_index('data_date')
+    for metric in ('cpi', 'spi', 'eac'):
+        previous, current = p1.loc['2024-03-31', metric], p1.loc['2024-06-30', metric]
+        assert changes.loc['P1', f'{metric}_previous'] == pytest.approx(previous)
+        assert changes.loc['P1', f'{metric}_change'] == pytest.approx(current - previous)
+    # New and dropped projects are significant, and significant rows rank first
+    assert changes.loc[['P2', 'P3'], 'significant'].all()
+    assert (np.diff(changes['significant'].to_numpy(dtype=int)) <= 0).all()
+
+
+def test_date_without_snapshots_marks_everything_dropped():
+    changes = compare_periods(snapshots(), '2024-03-31', '2024-12-31')
+    assert (changes['status'] == 'Dropped').all()
+    assert set(changes['project_id']) == {'P1', 'P2'}
+
+
+def test_latest_summary_matches_a_groupby():
+    data = snapshots()
+    # Shuffled rows, a project without a data date and a tie on the latest date
+    extra = data[data['project_id'] == 'P1'].iloc[[1]].assign(ac=999.0)
+    data = pd.concat([data, extra]).sample(frac=1, random_state=1)
+    data.loc[data['project_id'] == 'P3', 'data_date'] = pd.NaT
+    summary = latest_summary(data)
+    assert list(summary.index) == list(dict.fromkeys(data['project_id']))
+    expected = data.dropna(subset=['data_date']).sort_values('data_date', kind='stable').groupby('project_id').tail(1)
+    for _, row in expected.iterrows():
+        assert summary.loc[row['project_id'], 'data_date'] == row['data_date']
+    # A later row wins among equal data dates
+    last_p1 = data[(data['project_id'] == 'P1') & (data['data_date'] == pd.Timestamp('2024-06-30'))]['ac'].iloc[-1]
+    assert summary.loc['P1', 'ac'] == last_p1
+    assert pd.isna(summary.loc['P3', 'data_date'])
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.price_index import PriceIndex
+
+
+def days(*values):
+    return np.array(values, dtype='datetime64[D]')
+
+
+def index():
+    return PriceIndex(['2024-01-01', '2024-02-01', '2024-03-01'], [100.0, 102.0, 105.0])
+
+
+def test_growth_between_months():
+    growth = index().factor(days('2024-01-15'), days('2024-03-31'), 0)
+    assert growth[0] == pytest.approx(1.05)
+
+
+def test_growth_past_the_end_uses_the_constant_rate():
+    # Twelve months after the last level at 6% a year
+    growth = index().factor(days('2024-03-01'), days('2025-03-01'), 0, rate=6.0)
+    assert growth[0] == pytest.approx(1.06)
+    # From inside the series to past its end: index growth, then the rate
+    growth = index().factor(days('2024-01-01'), days('2025-03-01'), 0, rate=6.0)
+    assert growth[0] == pytest.approx(1.05 * 1.06)
+
+
+def test_growth_before_the_start_uses_the_constant_rate():
+    growth = index().factor(days('2023-01-01'), days('2024-01-01'), 0, rate=3.0)
+    assert growth[0] == pytest.approx(1.03)
+
+
+def test_missing_dates_and_unmatched_series():
+    prices = PriceIndex(['2024-01-01', '2024-01-01'], [100.0, 200.0], series=['EUR', 'USD'], match_column='Currency')
+    codes = prices.series_codes(pd.DataFrame({'Currency': ['USD', 'GBP', 'EUR']}))
+    np.testing.assert_array_equal(codes, [1, -1, 0])
+    growth = prices.factor(days('2024-01-01', '2024-01-01', 'NaT'), days('2024-01-01', '2024-06-01', '2024-06-01'), codes)
+    assert growth[0] == 1.0
+    assert np.isnan(growth[1:]).all()
+
+
+def test_rates_chain_into_levels():
+    table = pd.DataFrame({'Month': ['2024-01-01', '2024-02-01', '2024-03-01'], 'Rate': [12.0, 12.0, 12.0]})
+    prices = PriceIndex.from_frame(table, 'Month', 'Rate', rates=True)
+    growth = prices.factor(days('2024-01-01'), days('2024-03-01'), 0)
+    assert growth[0] == pytest.approx(1.12 ** (2 / 12))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.evm_engine import calculate_evm
+from models.project import ProjectBatch
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+
+
+def batch():
+    return ProjectBatch({
+        'project_id': ['P1', 'P2', 'P3'],
+        'project_name': ['Alpha', None, 'Gamma'],
+        'department': ['IT', 'HR', 'IT'],
+        'bac': [1000.0, 2000.0, 3000.0],
+        'ac': [100.0, np.nan, 900.0],
+        'plan_start_date': np.array(['2024-01-01', '2024-02-01', 'NaT'], dtype='datetime64[ns]'),
+        'plan_finish_date': np.array(['2024-12-31', '2025-01-31', '2025-06-30'], dtype='datetime64[ns]'),
+        'data_date': np.array(['2024-06-30'] * 3, dtype='datetime64[ns]'),
+    })
+
+
+def test_dataframe_round_trip():
+    original = batch()
+    frame = original.to_dataframe()
+    assert frame['bac'].dtype == np.float64
+    assert frame['data_date'].dtype == 'datetime64[ns]'
+    pd.testing.assert_frame_equal(ProjectBatch.from_dataframe(frame).to_dataframe(), frame)
+
+
+def test_arrow_round_trip():
+    pytest.importorskip('pyarrow')
+    original = batch()
+    result = ProjectBatch.from_arrow(original.to_arrow())
+    assert result.columns == original.columns
+    pd.testing.assert_frame_equal(result.to_dataframe(), original.to_dataframe())
+    assert result[1].project_name is None
+    assert np.isnat(result[2].plan_start_date)
+
+
+def test_slices_are_batches():
+    original = batch()
+    part = original[1:]
+    assert isinstance(part, ProjectBatch)
+    assert [view.project_id for view in part] == ['P2', 'P3']
+    assert part[-1].to_project().bac == 3000.0
+    with pytest.raises(IndexError):
+        original[3]
+
+
+def test_batches_report_their_dates():
+    result, diagnostics = calculate_evm(batch(), GLOBAL_VALUES, return_diagnostics=True)
+    assert diagnostics.date_formats['plan_start_date']['invalid'] == 1
+    assert diagnostics.date_formats['data_date']['invalid'] == 0
+    frame = batch().to_dataframe().rename(columns={'project_id': 'Project ID'})
+    pd.testing.assert_series_equal(result['pv'], calculate_evm(frame, GLOBAL_VALUES)['pv'])
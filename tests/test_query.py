@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.query import BITMAP_CACHE_SIZE, QueryIndex
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    n = 400
+    df = pd.DataFrame({
+        'project_id': rng.integers(0, 60, n).astype(str),
+        'department': np.array(['IT', 'HR', 'Ops', 'Finance'], dtype=object)[rng.integers(0, 4, n)],
+        'data_date': pd.Timestamp('2024-01-31') + pd.to_timedelta(rng.integers(0, 6, n) * 30, unit='D'),
+        'cpi': rng.uniform(0.6, 1.4, n).round(2),
+        'spi': rng.uniform(0.6, 1.4, n).round(2),
+        'vac': rng.normal(0, 5000, n).round(0),
+    })
+    return df
+
+
+@pytest.mark.parametrize('expression', [
+    "department == 'IT' and cpi < 0.9",
+    "0.8 <= cpi <= 1.1",
+    "1 > spi or vac < -2000",
+    "department in ['HR', 'Ops']",
+    "department not in ['HR', 'Ops'] and cpi >= 1",
+    "department != 'Finance'",
+    "not (vac > 0) and spi > 0.7",
+    "data_date >= '2024-04-01'",
+    "project_id == '12'",
+])
+def test_query_matches_dataframe_query(frame, expression):
+    result = QueryIndex(frame).query(expression)
+    pd.testing.assert_frame_equal(result, frame.query(expression))
+
+
+def test_top_n_matches_nsmallest(frame):
+    result = QueryIndex(frame).query("department == 'IT'", order_by='vac', n=5, largest=False)
+    expected = frame.query("department == 'IT'").nsmallest(5, 'vac')
+    np.testing.assert_array_equal(result['vac'], expected['vac'])
+
+
+def test_missing_values_never_match(frame):
+    frame.loc[::7, 'cpi'] = np.nan
+    mask = QueryIndex(frame).evaluate('cpi < 1')
+    assert not mask[frame['cpi'].isna().to_numpy()].any()
+
+
+def test_bitmap_cache_is_capped():
+    frame = pd.DataFrame({'project_id': [str(i) for i in range(BITMAP_CACHE_SIZE * 2)]})
+    index = QueryIndex(frame)
+    for i in range(BITMAP_CACHE_SIZE * 2):
+        assert index.evaluate(f"project_id == '{i}'").sum() == 1
+    assert len(index._bitmaps) == BITMAP_CACHE_SIZE
+    # The least recently used bitmaps are dropped first
+    assert ('project_id', '0') not in index._bitmaps
+    assert ('project_id', str(BITMAP_CACHE_SIZE * 2 - 1)) in index._bitmaps
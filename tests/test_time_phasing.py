@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+from core.evm_engine import calculate_evm
+from core.time_phasing import baseline_curves, join_history
+
+GLOBAL_VALUES = {'curve': 's-curve', 'alpha': 2.0, 'beta': 2.0, 'inflation_rate': 3.5,
+                 'use_manual_ev': False, 'use_manual_pv': False}
+CALENDARS = [{'name': 'Office', 'weekmask': 'Mon Tue Wed Thu Fri', 'holidays': ['2024-12-25', '2024-12-26']},
+             {'name': 'Site', 'weekmask': '1111110'}]
+
+
+def projects():
+    """Two projects whose data date is a month end, in different calendars."""
+    return pd.DataFrame({
+        'Project ID': ['P0', 'P1'],
+        'Project Name': 'Project',
+        'Budget (BAC)': '1000',
+        'Actual Cost (AC)': '100',
+        'Manual PV': '123',
+        'Plan Start Date': '2024-01-15',
+        'Plan Finish Date': '2025-06-30',
+        'Data Date': '2024-12-31',
+        'Calendar': ['Office', 'Site'],
+    })
+
+
+@pytest.mark.parametrize('global_values', [
+    GLOBAL_VALUES,
+    dict(GLOBAL_VALUES, curve='linear'),
+    dict(GLOBAL_VALUES, calendars=CALENDARS, calendar_column='Calendar'),
+], ids=['calendar days', 'linear', 'working calendars'])
+def test_baseline_matches_engine_pv_at_the_data_date(global_values):
+    result = calculate_evm(projects(), global_values)
+    curves = baseline_curves(result, global_values)
+    for project_id, pv in zip(result['project_id'], result['pv']):
+        assert curves.curve(project_id)[pd.Timestamp('2024-12-31')] == pytest.approx(pv)
+
+
+def test_history_shows_the_manual_pv_the_engine_used():
+    global_values = dict(GLOBAL_VALUES, use_manual_pv=True)
+    result = calculate_evm(projects(), global_values)
+    history = join_history(baseline_curves(result, global_values), result)
+    december = history[history['month'] == pd.Timestamp('2024-12-31')]
+    assert (december['pv'] == 123).all()
+    assert (december['pv_baseline'] != 123).all()
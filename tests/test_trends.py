@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from core.trends import build_trends
+
+
+def snapshots():
+    rng = np.random.default_rng(11)
+    rows = []
+    for project in range(8):
+        for month in range(rng.integers(1, 7)):
+            rows.append({
+                'project_id': f'P{project}',
+                'data_date': pd.Timestamp('2024-01-31') + pd.DateOffset(months=month),
+                'cpi': rng.uniform(0.7, 1.3),
+                'spi': rng.uniform(0.7, 1.3),
+                'ev': float(rng.integers(0, 1000)),
+                'ac': float(rng.integers(0, 1000)),
+            })
+    data = pd.DataFrame(rows)
+    data.loc[data.index[::5], 'cpi'] = np.nan
+    # Rows in no particular order, as after merging several files
+    return data.sample(frac=1, random_state=0).reset_index(drop=True)
+
+
+def reference_slope(values):
+    values = values[np.isfinite(values[:, 1])]
+    if len(values) < 2:
+        return np.nan
+    return np.polyfit(values[:, 0], values[:, 1], 1)[0]
+
+
+def test_trends_match_a_per_project_reference():
+    data = snapshots()
+    history = build_trends(data, window=3, periods=2).history
+    for _, group in history.groupby('project_id'):
+        group = group.sort_values('data_date')
+        assert group['data_date'].is_monotonic_increasing
+        np.testing.assert_array_equal(group['period'], np.arange(1, len(group) + 1))
+        np.testing.assert_allclose(group['cpi_rolling'], group['cpi'].rolling(3, min_periods=1).mean())
+        np.testing.assert_allclose(group['ev_delta'], group['ev'].diff())
+        points = np.column_stack([np.arange(len(group)), group['cpi'].to_numpy()])
+        expected = [reference_slope(points[max(0, i - 2):i + 1]) for i in range(len(group))]
+        np.testing.assert_allclose(group['cpi_slope'], expected, atol=1e-9)
+
+
+def test_decline_streaks_flag_deteriorating_projects():
+    data = pd.DataFrame({
+        'project_id': ['A'] * 4 + ['B'] * 3,
+        'data_date': pd.to_datetime(['2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30',
+                                     '2024-01-31', '2024-02-29', '2024-03-31']),
+        'cpi': [1.0, 0.9, 0.8, 0.7, 1.0, 1.1, 1.0],
+        'spi': [1.0] * 7,
+    })
+    trends = build_trends(data, periods=3)
+    np.testing.assert_array_equal(trends.history['cpi_decline_streak'], [0, 1, 2, 3, 0, 0, 1])
+    assert trends.project_summary('A')['deteriorating']
+    assert not trends.project_summary('B')['deteriorating']
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+import streamlit as st
+from core.background import CalculationJob
+
+
+def start_calculation(data, global_values, price_index=None, fx_rates=None, outputs=None):
+    """Start a background EVM calculation, replacing any job still running."""
+    job = st.session_state.get('calculation_job')
+    if job is not None and job.is_running:
+        job.cancel()
+    job = CalculationJob(data, global_values, price_index=price_index, fx_rates=fx_rates, outputs=outputs).start()
+    st.session_state.calculation_job = job
+    return job
+
+
+def collect_calculation():
+    """
+    Move the results of a finished background calculation into session state.
+
+    Safe to call at the top of every page. Returns the job when there is
+    something to report (still running, just finished, cancelled or failed),
+    otherwise None. Jobs that have stopped are removed from the session once
+    collected, so the caller is responsible for reporting their outcome.
+    """
+    job = st.session_state.get('calculation_job')
+    if job is None:
+        return None
+
+    if job.status == 'done':
+        st.session_state.calculated_data = job.result
+        st.session_state.calculation_diagnostics = job.diagnostics
+        # Identifies this set of results for anything cached per calculation
+        st.session_state.calculation_id = job.id
+        st.session_state.calculation_currency = job.currency
+        # Built with the results; pages read it through calculation_cache('latest_summary', ...)
+        st.session_state.latest_summary = (job.id, job.latest)
+        del st.session_state.calculation_job
+    elif not job.is_running:
+        del st.session_state.calculation_job
+
+    return job
+
+
+def require_metrics(*columns):
+    """
+    Stops the page with a warning when the current results lack metrics it
+    needs (the last calculation was limited to a subset of metrics).
+    """
+    missing = [col for col in columns if col not in st.session_state.calculated_data.columns]
+    if missing:
+        st.warning(f"⚠️ The last calculation skipped {', '.join(missing)}, which this page needs.")
+        st.info("💡 Recalculate all metrics on the **EVM Calculations** page.")
+        st.stop()
+
+
+def calculation_cache(key, build):
+    """
+    Value derived from the current calculated_data, built once per calculation.
+
+    The value is kept in session state under ``key`` together with the
+    calculation_id it was built from, so every page asking for the same key
+    shares it until the next calculation replaces the results.
+    """
+    calculation_id = st.session_state.get('calculation_id')
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != calculation_id:
+        cached = (calculation_id, build(st.session_state.calculated_data))
+        st.session_state[key] = cached
+    return cached[1]
+
+
+# Projects whose figures and tables are kept per session
+PROJECT_CACHE_SIZE = 16
+
+
+def project_cache(project_id, name, build, depends_on=None):
+    """
+    Figure or table of one project, built once per calculation and project.
+
+    Values are kept in session state per (calculation_id, project_id), so
+    widget interactions and switching back to a recently viewed project
+    reuse them instead of rebuilding. Only the PROJECT_CACHE_SIZE most
+    recently used projects are kept, and a new calculation starts afresh.
+    A value is also rebuilt when ``depends_on`` (the settings it was drawn
+    with, compared by equality) differs from the one it was built with.
+    """
+    calculation_id = st.session_state.get('calculation_id')
+    cache = st.session_state.get('project_cache')
+    if cache is None or cache[0] != calculation_id:
+        cache = (calculation_id, OrderedDict())
+        st.session_state.project_cache = cache
+    projects = cache[1]
+
+    values = projects.get(project_id)
+    if values is None:
+        values = projects[project_id] = {}
+        while len(projects) > PROJECT_CACHE_SIZE:
+            projects.popitem(last=False)
+    else:
+        projects.move_to_end(project_id)
+
+    cached = values.get(name)
+    if cached is None or cached[0] != depends_on:
+        cached = values[name] = (depends_on, build())
+    return cached[1]
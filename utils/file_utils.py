@@ -1,19 +1,66 @@
 
 import pandas as pd
+import importlib.util
 import json
+import os
+import time
+from datetime import date, datetime, time as dt_time
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
 
-def read_csv(file):
+NA_VALUES = ['', ' ', 'NA', 'N/A', 'null', 'NULL', 'None']
+
+# Folder loading only reads below this directory (default: the working directory)
+DATA_ROOT_ENV_VAR = 'EVM_DATA_DIR'
+
+# pandas' default NA strings (keep_default_na=True), for the Arrow and Excel readers
+DEFAULT_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+]
+
+def read_csv(file, engine='auto', usecols=None):
     """
     Reads a CSV file and returns a pandas DataFrame.
     Handles common data quality issues during import.
+
+    Args:
+        file: Path or file-like object (e.g. a Streamlit upload).
+        engine (str): 'pyarrow' for the multithreaded Arrow reader, 'pandas'
+            for the pandas C parser, or 'auto' to use Arrow when pyarrow is
+            installed. Both apply the same NA values, whitespace trimming and
+            empty/Unnamed column dropping.
+        usecols (list, optional): Only read these columns. Names that are
+            not in the file are ignored.
     """
+    if engine in ('auto', 'pyarrow'):
+        try:
+            return _read_csv_arrow(file, usecols)
+        except ImportError:
+            if engine == 'pyarrow':
+                raise
+        except Exception as e:
+            # Rows the Arrow reader rejects (e.g. ragged rows) go to pandas
+            import pyarrow as pa
+            if not isinstance(e, pa.ArrowInvalid):
+                raise
+            if hasattr(file, 'seek'):
+                file.seek(0)
+
+    return _read_csv_pandas(file, usecols)
+
+def _read_csv_pandas(file, usecols=None):
     # Read CSV with flexible parsing - keep all columns as strings initially
     df = pd.read_csv(
         file,
-        na_values=['', ' ', 'NA', 'N/A', 'null', 'NULL', 'None'],
+        na_values=NA_VALUES,
         keep_default_na=True,
         dtype=str,  # Read everything as string to prevent auto-conversion issues
-        low_memory=False
+        low_memory=False,
+        usecols=None if usecols is None else (lambda name: name in usecols)
     )
 
     # Drop completely empty columns
@@ -24,11 +71,375 @@ def read_csv(file):
 
     # Clean up whitespace in string columns
     for col in df.columns:
-        if df[col].dtype == 'object':
+        if pd.api.types.is_string_dtype(df[col]):
             df[col] = df[col].str.strip() if df[col].notna().any() else df[col]
 
     return df
 
+def _header_names(raw_header):
+    """Column names as pandas would give them: blanks become 'Unnamed: i', duplicates get '.1', '.2'."""
+    names = []
+    seen = {}
+    for i, name in enumerate(raw_header):
+        name = name if name != '' else f'Unnamed: {i}'
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+def _read_csv_arrow(file, usecols=None):
+    """
+    Multithreaded CSV read with pyarrow.
+
+    Local paths are memory-mapped; uploads are read from their in-memory
+    buffer. Every column is parsed as a string, and whitespace is trimmed
+    in Arrow memory with a vectorized kernel before conversion to pandas, so
+    no per-column Python string pass is needed.
+    """
+    import csv
+    import io
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+
+    if isinstance(file, (str, Path)):
+        with open(file, newline='', encoding='utf-8-sig') as handle:
+            raw_header = next(csv.reader(handle), None)
+    else:
+        data = file.getvalue() if hasattr(file, 'getvalue') else file.read()
+        raw_header = next(csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')), None)
+
+    if not raw_header:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    source = pa.memory_map(str(file), 'r') if isinstance(file, (str, Path)) else pa.BufferReader(data)
+
+    names = _header_names(raw_header)
+    include = [name for name in names if usecols is None or name in usecols]
+
+    # The header is parsed as a data row and sliced off below: skip_rows
+    # counts physical lines, so it would cut a quoted header with a newline.
+    # The parsed table owns its buffers, so the file is unmapped right after.
+    with source:
+        table = pa_csv.read_csv(
+            source,
+            read_options=pa_csv.ReadOptions(column_names=names, use_threads=True),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in include},
+                include_columns=include,
+                null_values=sorted(set(NA_VALUES) | set(DEFAULT_NA_VALUES)),
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=True,
+            ),
+        ).slice(1)
+
+    # Drop completely empty and unnamed columns (artifacts from Excel)
+    keep = [
+        name for name in table.column_names
+        if table.column(name).null_count < table.num_rows
+        and not name.lower().startswith('unnamed')
+    ]
+    table = table.select(keep)
+
+    # Trim whitespace inside Arrow
+    table = pa.table(
+        [pc.utf8_trim_whitespace(table.column(name)) for name in keep],
+        names=keep
+    )
+
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def read_csv_files(files, max_workers=None, source_column='Source File', usecols=None, reader=None):
+    """
+    Reads several CSV files in parallel and concatenates them into one frame.
+
+    Each file goes through read_csv on a worker thread. The parsed frames are
+    combined with a single concat at the end, so columns are allocated once
+    rather than grown file by file. Row order follows the order of ``files``,
+    which is what "last wins" deduplication relies on.
+
+    Args:
+        files (list): Uploaded file objects or paths.
+        max_workers (int, optional): Thread pool size (default: one per file, max 8).
+        source_column (str, optional): Name of a column recording which file
+            each row came from. Pass None to skip it.
+        usecols (list, optional): Only read these columns (see read_csv).
+        reader (callable, optional): Used instead of read_csv, called as
+            reader(file, usecols=usecols) - e.g. a cache's read_csv.
+
+    Returns:
+        tuple: (pd.DataFrame, list of dicts with file, rows, columns and seconds)
+    """
+    files = list(files)
+    if not files:
+        return pd.DataFrame(), []
+
+    read = reader or read_csv
+
+    def parse(file):
+        started = time.perf_counter()
+        df = read(file, usecols=usecols)
+        return df, {
+            'file': getattr(file, 'name', None) or Path(file).name,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'seconds': time.perf_counter() - started,
+        }
+
+    workers = max_workers or min(8, len(files))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(parse, files))
+
+    frames = []
+    timings = []
+    for df, timing in results:
+        if source_column:
+            df[source_column] = timing['file']
+        frames.append(df)
+        timings.append(timing)
+
+    combined = pd.concat(frames, ignore_index=True, sort=False)
+    return combined, timings
+
+def data_root():
+    """The directory folder loading is confined to: $EVM_DATA_DIR, else the working directory."""
+    return Path(os.environ.get(DATA_ROOT_ENV_VAR) or Path.cwd()).expanduser().resolve()
+
+def list_csv_files(folder, pattern='*.csv', root=None):
+    """
+    Returns the files in a folder that match a glob pattern, sorted by name.
+
+    ``folder`` is resolved against ``root`` (default: data_root()), and
+    neither the folder nor any matched file may resolve outside it, so a
+    path typed into the app cannot reach other files on the server (e.g.
+    ``../../**/*.csv`` or a symlink out of the data folder).
+
+    Raises:
+        PermissionError: The folder is outside the root.
+        FileNotFoundError: The folder does not exist.
+        ValueError: The pattern is absolute.
+    """
+    root = Path(root).expanduser().resolve() if root is not None else data_root()
+    resolved = (root / Path(folder).expanduser()).resolve()
+    if not resolved.is_relative_to(root):
+        raise PermissionError(f"Folder is outside the data folder {root}: {folder}")
+    if not resolved.is_dir():
+        raise FileNotFoundError(f"Folder not found: {folder}")
+    if Path(pattern).is_absolute():
+        raise ValueError(f"File pattern must be relative to the folder: {pattern}")
+    return sorted(
+        path for path in resolved.glob(pattern)
+        if path.is_file() and path.resolve().is_relative_to(root)
+    )
+
+def deduplicate_snapshots(df, id_column='project_id', date_column='data_date', keep='last'):
+    """
+    Drops repeated (project, data date) rows and sorts the snapshots.
+
+    Dates are compared after parsing, so ``2024-01-31`` and ``01/31/2024``
+    count as the same data date. Rows without a project ID or whose data
+    date cannot be parsed are never treated as duplicates (they are kept
+    and sorted last); the engine reports them later.
+
+    Args:
+        df (pd.DataFrame): Mapped project data (one row per project snapshot).
+        id_column (str): Project identifier column.
+        date_column (str): Data date column.
+        keep (str): 'last' keeps the row that appears last (e.g. the most
+            recently loaded file), 'first' keeps the earliest one.
+
+    Returns:
+        tuple: (deduplicated frame sorted by project and data date, number of rows dropped)
+    """
+    from core.evm_engine import convert_date_column
+
+    if id_column not in df.columns or date_column not in df.columns:
+        return df, 0
+
+    # Missing IDs stay missing: astype(str) would turn them all into one 'nan' project
+    ids = df[id_column].astype('string').str.strip().replace('', pd.NA)
+    keys = pd.DataFrame({
+        'id': ids.to_numpy(dtype=object, na_value=None),
+        'date': convert_date_column(df[date_column]).to_numpy(),
+    })
+    duplicated = keys.duplicated(keep=keep).to_numpy() & keys.notna().all(axis=1).to_numpy()
+
+    # keys has a RangeIndex, so the sorted index gives row positions in df
+    order = keys[~duplicated].sort_values(['id', 'date'], kind='stable').index.to_numpy()
+    return df.iloc[order].reset_index(drop=True), int(duplicated.sum())
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+# Rows scanned for the header when it is not given explicitly
+HEADER_SCAN_ROWS = 20
+
+def is_excel_file(file):
+    """True for .xlsx / .xlsm paths and uploads."""
+    name = getattr(file, 'name', None) or str(file)
+    return name.lower().endswith(EXCEL_EXTENSIONS)
+
+def _excel_engine(engine):
+    """'calamine' when python-calamine is installed (for 'auto'), else 'openpyxl'."""
+    if engine == 'auto':
+        return 'calamine' if importlib.util.find_spec('python_calamine') else 'openpyxl'
+    return engine
+
+def list_excel_sheets(file, engine='auto'):
+    """Sheet names of a workbook, without loading its cells."""
+    try:
+        if _excel_engine(engine) == 'calamine':
+            from python_calamine import CalamineWorkbook
+
+            workbook = CalamineWorkbook.from_object(str(file) if isinstance(file, Path) else file)
+            try:
+                return workbook.sheet_names
+            finally:
+                workbook.close()
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    finally:
+        if hasattr(file, 'seek'):
+            file.seek(0)
+
+@contextmanager
+def _sheet_rows(file, sheet_name, engine):
+    """Yields an iterator over the rows (sequences of cell values) of one sheet."""
+    def select(sheet_names):
+        if isinstance(sheet_name, str):
+            if sheet_name not in sheet_names:
+                raise ValueError(f"Worksheet '{sheet_name}' not found; sheets are {sheet_names}")
+            return sheet_names.index(sheet_name)
+        return sheet_name or 0
+
+    if _excel_engine(engine) == 'calamine':
+        from python_calamine import CalamineWorkbook
+
+        # Native reader: the sheet's cells are held in Rust, rows are converted one at a time
+        workbook = CalamineWorkbook.from_object(str(file) if isinstance(file, Path) else file)
+        try:
+            yield workbook.get_sheet_by_index(select(workbook.sheet_names)).iter_rows()
+        finally:
+            workbook.close()
+        return
+
+    import openpyxl
+
+    # Read-only mode streams rows from the XML without building the object model
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield workbook.worksheets[select(workbook.sheetnames)].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _cell_text(value, na_values):
+    """An Excel cell as the string read_csv would have produced (None for NA)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return None if value in na_values else value.strip()
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d') if value.time() == dt_time(0) else value.isoformat(sep=' ')
+    if isinstance(value, (date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def detect_header_row(rows):
+    """
+    Index of the header among the first rows of a sheet.
+
+    Title and note rows above a table usually fill only one or two cells, so
+    the header is taken to be the first row that is at least half as wide as
+    the widest scanned row and contains only text.
+    """
+    widths = [sum(cell is not None and str(cell).strip() != '' for cell in row) for row in rows]
+    if not widths or max(widths) == 0:
+        return 0
+    needed = max(min(2, max(widths)), (max(widths) + 1) // 2)
+    for index, row in enumerate(rows):
+        cells = [cell for cell in row if cell is not None and str(cell).strip() != '']
+        if len(cells) >= needed and all(isinstance(cell, str) for cell in cells):
+            return index
+    return widths.index(max(widths))
+
+def _text_frame(df):
+    """Gives an object frame the string dtype read_csv(dtype=str) uses."""
+    try:
+        infer_string = pd.get_option('future.infer_string')
+    except (KeyError, pd.errors.OptionError):
+        infer_string = False
+    return df.astype('str') if infer_string else df
+
+def read_excel(file, sheet_name=None, header_row=None, usecols=None, engine='auto', chunk_size=10000):
+    """
+    Reads one worksheet of an .xlsx workbook into a DataFrame of strings.
+
+    Rows are streamed one at a time, either by python-calamine (a native
+    reader, used when installed) or by openpyxl in read-only mode, so the
+    workbook's Python object model is never built. Rows are collected into
+    frames of ``chunk_size`` rows, which keeps memory close to the size of
+    the result. Cells get the same treatment as read_csv: everything is
+    text (dates as YYYY-MM-DD, whole numbers without a decimal point), the
+    same NA strings become missing, whitespace is trimmed, blank lines are
+    skipped, and empty and Unnamed columns are dropped. Formulas give their
+    cached values.
+
+    Args:
+        file: Path or file-like object.
+        sheet_name (str or int, optional): Sheet name or position (default: first sheet).
+        header_row (int, optional): 0-based row of the column names, counted
+            from the first row read; detected among the first rows when
+            omitted (see detect_header_row).
+        usecols (list, optional): Only read these columns.
+        engine (str): 'auto', 'calamine' or 'openpyxl'.
+        chunk_size (int): Rows collected before they are turned into a frame.
+    """
+    na_values = set(NA_VALUES) | set(DEFAULT_NA_VALUES)
+
+    with _sheet_rows(file, sheet_name, engine) as rows:
+        head = list(islice(rows, HEADER_SCAN_ROWS))
+        if not head:
+            return pd.DataFrame()
+        if header_row is None:
+            header_row = detect_header_row(head)
+
+        header = head[header_row] if header_row < len(head) else ()
+        names = _header_names(['' if cell is None else str(cell) for cell in header])
+        keep = [i for i, name in enumerate(names) if usecols is None or name in usecols]
+        columns = [names[i] for i in keep]
+
+        frames = []
+        buffer = []
+        for row in chain(head[header_row + 1:], rows):
+            values = [_cell_text(row[i], na_values) if i < len(row) else None for i in keep]
+            # Blank lines are skipped, as read_csv does
+            if any(value is not None for value in values):
+                buffer.append(values)
+            if len(buffer) >= chunk_size:
+                frames.append(pd.DataFrame(buffer, columns=columns, dtype=object))
+                buffer = []
+        if buffer or not frames:
+            frames.append(pd.DataFrame(buffer, columns=columns, dtype=object))
+
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    # Drop completely empty and unnamed columns (artifacts from Excel)
+    df = df.dropna(axis=1, how='all')
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed', case=False)]
+
+    return _text_frame(df)
+
 def read_json(file):
     """Reads a JSON file and returns a dictionary."""
     return json.load(file)
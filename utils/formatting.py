@@ -0,0 +1,24 @@
+import streamlit as st
+
+CURRENCY_SYMBOLS = {
+    'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥', 'CNY': '¥', 'INR': '₹', 'KRW': '₩', 'BRL': 'R$',
+    'CAD': 'C$', 'AUD': 'A$',
+}
+
+
+def results_currency():
+    """Currency of the current calculated results (None when values were not converted)."""
+    return st.session_state.get('calculation_currency')
+
+
+def currency_symbol(currency=None):
+    """'$' for results without a reporting currency, else the currency's symbol or code."""
+    currency = currency or results_currency()
+    if currency is None:
+        return '$'
+    return CURRENCY_SYMBOLS.get(currency, f'{currency} ')
+
+
+def format_money(value, currency=None, decimals=0):
+    """A money amount in the results' currency, e.g. '$1,234' or 'CHF 1,234'."""
+    return f"{currency_symbol(currency)}{value:,.{decimals}f}"
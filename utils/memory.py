@@ -0,0 +1,202 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import weakref
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+# Large frames kept in session state, in the order they are produced
+MANAGED_FRAMES = ('raw_data', 'project_data', 'calculated_data')
+# Caches built from a frame; they hold references to it, so they are dropped
+# (and rebuilt by the pages on demand) when the frame is spilled
+DERIVED_KEYS = {
+    'calculated_data': ('query_index', 'portfolio_aggregates', 'portfolio_trends',
+                        'period_data_dates', 'period_comparison', 'project_options', 'project_cache'),
+}
+DEFAULT_BUDGET_MB = 2048
+
+# Every live session's manager, for the server-wide total
+_managers = weakref.WeakSet()
+
+
+def frame_bytes(df):
+    """Memory held by a frame, including the contents of text columns."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class SessionMemory:
+    """
+    Tracks the large frames of one session and keeps them under a budget.
+
+    Pages declare the frames they need with use(). Those are loaded back
+    from disk if they were spilled and marked as used. Then the least
+    recently used other frames are pickled to a per-session spill
+    directory, and removed from session state, until the session fits its
+    budget. Frame sizes are measured once per object, so repeated reruns
+    cost nothing. Frames that share buffers through copy-on-write are
+    counted in full under each key, so the total is an upper bound.
+
+    Args:
+        budget_mb: Memory budget in megabytes (default: EVM_SESSION_MEMORY_MB or 2048).
+        spill_dir: Parent of the spill directories (default: EVM_SPILL_DIR or the
+            system temp directory).
+    """
+
+    def __init__(self, budget_mb=None, spill_dir=None):
+        budget_mb = budget_mb or os.environ.get('EVM_SESSION_MEMORY_MB') or DEFAULT_BUDGET_MB
+        self.budget_bytes = int(float(budget_mb) * 1024 ** 2)
+        parent = spill_dir or os.environ.get('EVM_SPILL_DIR') or Path(tempfile.gettempdir()) / 'evm_spill'
+        self.spill_dir = Path(parent) / uuid.uuid4().hex
+        self.spilled = {}
+        # Frames moved to disk on purpose (release_frame); use() leaves them there
+        self.released = set()
+        self._sizes = {}
+        self._last_used = {}
+        # Spill files go away with the session
+        weakref.finalize(self, shutil.rmtree, str(self.spill_dir), True)
+        _managers.add(self)
+
+    def size(self, state, key):
+        """Bytes held by a managed frame in session state (0 if absent or spilled)."""
+        value = state.get(key)
+        if not isinstance(value, pd.DataFrame):
+            return 0
+        cached = self._sizes.get(key)
+        # A weak reference, so a replaced frame is not kept alive by its size entry
+        if cached is None or cached[0]() is not value:
+            cached = (weakref.ref(value), frame_bytes(value))
+            self._sizes[key] = cached
+        return cached[1]
+
+    def usage(self, state):
+        """Bytes per managed frame held in memory."""
+        return {key: self.size(state, key) for key in MANAGED_FRAMES if key in state}
+
+    @property
+    def total_bytes(self):
+        """Bytes of the frames measured at the last use() (cheap; no state access)."""
+        return sum(size for _, size in self._sizes.values())
+
+    def spill(self, state, key):
+        """Moves a frame from session state to disk."""
+        value = state.get(key)
+        if value is None:
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f'{key}.pkl'
+        pd.to_pickle(value, path)
+        self.spilled[key] = path
+        del state[key]
+        self._sizes.pop(key, None)
+        for derived in DERIVED_KEYS.get(key, ()):
+            state.pop(derived, None)
+
+    def restore(self, state, key):
+        """Loads a spilled frame back into session state."""
+        path = self.spilled.pop(key)
+        state[key] = pd.read_pickle(path)
+        path.unlink(missing_ok=True)
+
+    def discard(self, key):
+        """Forgets a spilled copy (the key was replaced or removed)."""
+        path = self.spilled.pop(key, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def use(self, state, keys):
+        """
+        Makes the given frames available in session state and enforces the budget.
+
+        Frames that are in memory replace any older spilled copy; frames
+        that are only on disk are loaded back, unless they were released.
+        """
+        now = time.monotonic()
+        for key in keys:
+            if key in state:
+                self.discard(key)
+                self.released.discard(key)
+            elif key in self.spilled and key not in self.released:
+                self.restore(state, key)
+            if key in state:
+                self._last_used[key] = now
+        self.enforce(state, pinned=keys)
+
+    def enforce(self, state, pinned=()):
+        """Spills least recently used frames, other than ``pinned``, until the budget is met."""
+        for key in MANAGED_FRAMES:
+            if key not in state:
+                self._sizes.pop(key, None)
+        usage = self.usage(state)
+        total = sum(usage.values())
+        candidates = sorted(
+            (key for key in usage if key not in pinned),
+            key=lambda key: self._last_used.get(key, 0)
+        )
+        for key in candidates:
+            if total <= self.budget_bytes:
+                break
+            total -= usage[key]
+            self.spill(state, key)
+        return total
+
+
+def server_bytes():
+    """(total bytes, number of sessions) over all live session managers."""
+    managers = list(_managers)
+    return sum(manager.total_bytes for manager in managers), len(managers)
+
+
+def get_memory_manager():
+    if 'memory_manager' not in st.session_state:
+        st.session_state.memory_manager = SessionMemory()
+    return st.session_state.memory_manager
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
+
+
+def use_frames(*keys):
+    """
+    Loads the session frames a page needs (call near the top of the page)
+    and shows the session's memory use in the sidebar.
+    """
+    manager = get_memory_manager()
+    manager.use(st.session_state, keys)
+
+    total = sum(manager.usage(st.session_state).values())
+    caption = f"🧠 Session memory: {_format_bytes(total)} of {_format_bytes(manager.budget_bytes)}"
+    if manager.spilled:
+        caption += f" · {len(manager.spilled)} frame(s) on disk"
+    server_total, sessions = server_bytes()
+    if sessions > 1:
+        caption += f" · server: {_format_bytes(server_total)} in {sessions} sessions"
+    st.sidebar.caption(caption)
+
+
+def release_frame(key):
+    """
+    Moves a frame the session no longer works with (e.g. raw_data after
+    mapping) to disk. use_frames() leaves it there until restore_frame().
+    """
+    manager = get_memory_manager()
+    manager.spill(st.session_state, key)
+    manager.released.add(key)
+
+
+def restore_frame(key):
+    """Loads a released or spilled frame back into session state."""
+    manager = get_memory_manager()
+    manager.released.discard(key)
+    manager.use(st.session_state, [key])
+
+
+def has_spilled(key):
+    return key in get_memory_manager().spilled
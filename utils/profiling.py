@@ -0,0 +1,180 @@
+import cProfile
+import marshal
+import os
+import pstats
+import runpy
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+PROFILE_ENV_VAR = 'EVM_PROFILE'
+PROFILE_QUERY_PARAM = 'profile'
+TOP_HOTSPOTS = 15
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_TRUTHY = ('1', 'true', 'yes', 'on')
+
+# cProfile hooks the whole interpreter: one profile at a time per server process
+_PROFILER_LOCK = threading.Lock()
+# Set on the script thread while profile_page() runs a page under the profiler
+_profiled_run = threading.local()
+
+
+def profiling_enabled():
+    """
+    True when page profiling is switched on, either for the whole server with
+    EVM_PROFILE=1 or for one browser session by opening a page with ?profile=1.
+    The query parameter is remembered for the rest of the session.
+    """
+    if os.environ.get(PROFILE_ENV_VAR, '').lower() in _TRUTHY:
+        return True
+    value = st.query_params.get(PROFILE_QUERY_PARAM)
+    if value is not None:
+        st.session_state.profiling = value.lower() in _TRUTHY
+    return st.session_state.get('profiling', False)
+
+
+def profile_page(page):
+    """
+    Profiles the calling page when profiling is on (call once near the top
+    of the page, after its imports).
+
+    The page file is run again from here under the profiler, inside a
+    try/finally that stops the profiler however the run ends (also with
+    st.stop() or st.rerun()), and the outer run is then stopped. Hotspots
+    are shown in the sidebar; a run that ended early can no longer draw
+    anything, so its profile is shown on the next rerun. Only one session
+    is profiled at a time; others run unprofiled with a notice meanwhile.
+    """
+    if getattr(_profiled_run, 'active', False):
+        return
+
+    # Streamlit raises again on any st call (session state included) once
+    # the run is stopping, so the profile is recorded into this dict
+    profiles = st.session_state.setdefault('page_profiles', {})
+    for profile in profiles.values():
+        if not profile['shown']:
+            render_profile(profile)
+            profile['shown'] = True
+
+    profiler = _start_profiler(page) if profiling_enabled() else None
+    if profiler is None:
+        return
+    path = sys._getframe(1).f_globals['__file__']
+    started = time.perf_counter()
+    completed = False
+    _profiled_run.active = True
+    try:
+        runpy.run_path(path, run_name='__main__')
+        completed = True
+    finally:
+        profiler.disable()
+        _PROFILER_LOCK.release()
+        _profiled_run.active = False
+        profiles[page] = _record_profile(page, profiler, started, completed)
+        if completed:
+            render_profile(profiles[page])
+            profiles[page]['shown'] = True
+    # The page has run in full; skip the rest of the unprofiled run
+    st.stop()
+
+
+def _start_profiler(page):
+    """An enabled profiler holding the profiling lock, or None (with a notice) if profiling is busy."""
+    if not _PROFILER_LOCK.acquire(blocking=False):
+        st.sidebar.info(f"⏱️ {page} not profiled: another page is being profiled right now")
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+: "Another profiling tool is already active"
+        _PROFILER_LOCK.release()
+        st.sidebar.info(f"⏱️ {page} not profiled: another profiling tool is active")
+        return None
+    return profiler
+
+
+def _record_profile(page, profiler, started, completed):
+    """Page profile with its hotspot table and the raw stats for download."""
+    seconds = time.perf_counter() - started
+    stats = pstats.Stats(profiler)
+    return {
+        'page': page,
+        'seconds': seconds,
+        'completed': completed,
+        'table': hotspot_table(stats),
+        'data': marshal.dumps(stats.stats),
+        'shown': False,
+    }
+
+
+def hotspot_table(stats):
+    """
+    One row per profiled function: calls, own time and cumulative time in ms.
+
+    App code is everything under the repository plus the library functions
+    it calls directly (chart building, DataFrame operations), which are
+    marked "← app" so the page's own hotspots show up next to the app's
+    functions.
+    """
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, callers) in stats.stats.items():
+        path = Path(filename)
+        if path.name == 'profiling.py' and path.parent.name == 'utils' or path.name == 'runpy.py':
+            # The profiler's own frames and the runpy call that runs the page
+            continue
+        in_repo = _in_repo(filename)
+        called_from_app = not in_repo and any(_in_repo(caller[0]) for caller in callers)
+        location = f"{path.relative_to(REPO_ROOT) if in_repo else path.name}:{line}"
+        rows.append({
+            'function': function,
+            'location': location + (" ← app" if called_from_app else ""),
+            'calls': calls,
+            'own_ms': own * 1000,
+            'cumulative_ms': cumulative * 1000,
+            'app_code': in_repo or called_from_app,
+        })
+    return pd.DataFrame(rows, columns=['function', 'location', 'calls', 'own_ms', 'cumulative_ms', 'app_code'])
+
+
+def _in_repo(filename):
+    return REPO_ROOT in Path(filename).parents
+
+
+def render_profile(profile):
+    """Sidebar summary of one page profile with a download of the full stats."""
+    page = profile['page']
+    key = f"profile_{page}_{'done' if profile['completed'] else 'stopped'}"
+    label = f"⏱️ {page}: {profile['seconds'] * 1000:,.0f} ms"
+    if not profile['completed']:
+        label += " (stopped early)"
+
+    with st.sidebar.expander(label, expanded=True):
+        app_only = st.checkbox("Only app code", value=True, key=f"{key}_app_only")
+        sort_by = st.radio("Sort by", ["Cumulative", "Own time"], horizontal=True, key=f"{key}_sort")
+
+        table = profile['table']
+        if app_only:
+            table = table[table['app_code']]
+        column = 'own_ms' if sort_by == "Own time" else 'cumulative_ms'
+        st.dataframe(
+            table.nlargest(TOP_HOTSPOTS, column).drop(columns='app_code'),
+            hide_index=True,
+            column_config={
+                'own_ms': st.column_config.NumberColumn('own ms', format='%.1f'),
+                'cumulative_ms': st.column_config.NumberColumn('cum. ms', format='%.1f'),
+            }
+        )
+        st.download_button(
+            "📥 Download profile (.prof)",
+            data=profile['data'],
+            file_name=f"{page.lower().replace(' ', '_')}.prof",
+            mime="application/octet-stream",
+            key=f"{key}_download"
+        )
+        st.caption("Open with `python -m pstats` or snakeviz")
@@ -0,0 +1,160 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250, 500]
+# Upper bound on cells sent to the browser per render; wide tables get fewer rows
+MAX_PAGE_CELLS = 10000
+# String columns with at most this many distinct values are filtered with a multiselect
+MAX_FILTER_CHOICES = 50
+
+
+def filter_mask(df, search='', filters=None):
+    """
+    Boolean mask of the rows matching a search text and column filters.
+
+    Args:
+        df (pd.DataFrame): Data to filter.
+        search (str): Case-insensitive text looked for in every text column.
+        filters (dict): Column -> filter. A (low, high) tuple keeps values in
+            the inclusive range (either end may be None), a list keeps the
+            listed values, and a string keeps text containing it.
+
+    Returns:
+        np.ndarray: One boolean per row.
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    for column, condition in (filters or {}).items():
+        values = df[column]
+        if isinstance(condition, tuple):
+            low, high = condition
+            if low is not None:
+                mask &= (values >= low).to_numpy(dtype=bool, na_value=False)
+            if high is not None:
+                mask &= (values <= high).to_numpy(dtype=bool, na_value=False)
+        elif isinstance(condition, list):
+            mask &= values.astype(str).isin(condition).to_numpy()
+        elif condition:
+            mask &= values.astype(str).str.contains(condition, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+
+    if search:
+        matches = np.zeros(len(df), dtype=bool)
+        for column in df.columns:
+            if pd.api.types.is_string_dtype(df[column]) or df[column].dtype == object:
+                matches |= df[column].astype(str).str.contains(search, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+        mask &= matches
+
+    return mask
+
+
+def query_positions(df, search='', filters=None, sort_by=None, ascending=True):
+    """Row positions matching the search and filters, in sort order (missing values last)."""
+    positions = np.flatnonzero(filter_mask(df, search, filters))
+
+    if sort_by is not None and len(positions):
+        values = pd.Series(df[sort_by].to_numpy()[positions])
+        order = values.sort_values(ascending=ascending, na_position='last', kind='stable').index.to_numpy()
+        positions = positions[order]
+
+    return positions
+
+
+def _filter_widget(df, column, key):
+    """Renders the filter input for one column and returns its condition."""
+    values = df[column]
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        low_col, high_col = st.columns(2)
+        with low_col:
+            low = st.number_input(f"{column} from", value=None, key=f"{key}_min_{column}")
+        with high_col:
+            high = st.number_input(f"{column} to", value=None, key=f"{key}_max_{column}")
+        return (low, high)
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        low_col, high_col = st.columns(2)
+        with low_col:
+            low = st.date_input(f"{column} from", value=None, key=f"{key}_min_{column}")
+        with high_col:
+            high = st.date_input(f"{column} to", value=None, key=f"{key}_max_{column}")
+        return (
+            pd.Timestamp(low) if low is not None else None,
+            pd.Timestamp(high) if high is not None else None,
+        )
+
+    choices = values.dropna().unique()
+    if len(choices) <= MAX_FILTER_CHOICES:
+        return st.multiselect(column, sorted(map(str, choices)), key=f"{key}_in_{column}") or None
+    return st.text_input(f"{column} contains", key=f"{key}_contains_{column}")
+
+
+def results_grid(df, key, columns=None, height=400):
+    """
+    Paginated table whose data stays on the server.
+
+    Search, column filters and sorting are evaluated in Python, and only the
+    current page is sent to the browser. The page size is capped so a page
+    never holds more than MAX_PAGE_CELLS cells.
+
+    Args:
+        df (pd.DataFrame): Data to show.
+        key (str): Unique prefix for the widget keys.
+        columns (list, optional): Columns to show (default: all).
+        height (int): Table height in pixels.
+    """
+    columns = list(columns) if columns is not None else df.columns.tolist()
+
+    search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    with search_col:
+        search = st.text_input("Search", key=f"{key}_search", placeholder="Search text columns")
+    with sort_col:
+        sort_by = st.selectbox("Sort by", ['(none)'] + columns, key=f"{key}_sort")
+    with order_col:
+        descending = st.toggle("Descending", key=f"{key}_descending")
+    with size_col:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=2, key=f"{key}_page_size")
+
+    filters = {}
+    with st.expander("Filter columns", expanded=False):
+        filter_columns = st.multiselect("Columns to filter", columns, key=f"{key}_filter_columns")
+        for column in filter_columns:
+            condition = _filter_widget(df, column, key)
+            if condition not in (None, '', (None, None)):
+                filters[column] = condition
+
+    page_size = max(1, min(page_size, MAX_PAGE_CELLS // max(1, len(columns))))
+
+    # Go back to the first page whenever the query changes
+    query = (search, sort_by, descending, page_size, repr(filters), tuple(columns))
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_page"] = 1
+
+    positions = query_positions(
+        df, search, filters,
+        sort_by=None if sort_by == '(none)' else sort_by,
+        ascending=not descending
+    )
+    matching = len(positions)
+    pages = max(1, math.ceil(matching / page_size))
+
+    # The page widget is drawn after the table, but its value is needed first
+    page = st.session_state.get(f"{key}_page", 1)
+    if page > pages:
+        page = st.session_state[f"{key}_page"] = 1
+
+    start = (page - 1) * page_size
+    page_df = df.iloc[positions[start:start + page_size]][columns]
+
+    st.dataframe(page_df, width='stretch', height=height)
+
+    info_col, page_col = st.columns([3, 1])
+    with page_col:
+        st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+    with info_col:
+        first = (page - 1) * page_size + 1 if matching else 0
+        last = min(page * page_size, matching)
+        filtered = f" (filtered from {len(df):,})" if matching != len(df) else ""
+        st.caption(f"Rows {first:,}–{last:,} of {matching:,}{filtered} · page {page} of {pages}")
@@ -0,0 +1,140 @@
+import hashlib
+import importlib.util
+import os
+import threading
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from utils.file_utils import read_csv
+
+# Bump when read_csv's output changes so stale entries are not reused
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'evm_app' / 'uploads'
+DEFAULT_MAX_MB = 1024
+
+
+def content_hash(file, chunk_size=1 << 20):
+    """BLAKE2b digest of a file's bytes (path or file-like object)."""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(file, (str, Path)):
+        with open(file, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b''):
+                digest.update(chunk)
+    elif hasattr(file, 'getvalue'):
+        digest.update(file.getvalue())
+    else:
+        position = file.tell()
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+        file.seek(position)
+    return digest.hexdigest()
+
+
+class ParsedFileCache:
+    """
+    Disk cache of parsed CSV files, shared by every session on the machine.
+
+    Entries are keyed by a hash of the file's bytes (plus the read options),
+    so the same file uploaded under any name by anyone is parsed once.
+    Frames are stored as Feather (Arrow IPC) files when pyarrow is available,
+    which load without any parsing, and as pickles otherwise. The total size
+    is capped; the least recently used entries are removed first.
+
+    Args:
+        directory: Cache directory (default: EVM_UPLOAD_CACHE_DIR or
+            ~/.cache/evm_app/uploads).
+        max_mb: Size cap in megabytes (default: EVM_UPLOAD_CACHE_MB or 1024).
+    """
+
+    def __init__(self, directory=None, max_mb=None):
+        self.directory = Path(directory or os.environ.get('EVM_UPLOAD_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.max_bytes = int(float(max_mb or os.environ.get('EVM_UPLOAD_CACHE_MB') or DEFAULT_MAX_MB) * 1024 ** 2)
+        self.suffix = '.feather' if importlib.util.find_spec('pyarrow') else '.pkl'
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, file, usecols=None):
+        columns = ','.join(sorted(usecols)) if usecols is not None else '*'
+        return f"v{CACHE_VERSION}-{content_hash(file)}-{hashlib.blake2b(columns.encode(), digest_size=6).hexdigest()}"
+
+    def _path(self, key):
+        return self.directory / f'{key}{self.suffix}'
+
+    def get(self, key):
+        """The cached frame for a key, or None."""
+        path = self._path(key)
+        try:
+            df = pd.read_feather(path) if self.suffix == '.feather' else pd.read_pickle(path)
+        except (FileNotFoundError, OSError, ValueError, EOFError):
+            return None
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key, df):
+        """Stores a frame and evicts old entries beyond the size cap."""
+        path = self._path(key)
+        # Write to a temporary name first so other sessions never read a partial file
+        temp = path.with_name(f'.{uuid.uuid4().hex}.tmp')
+        try:
+            if self.suffix == '.feather':
+                df.reset_index(drop=True).to_feather(temp)
+            else:
+                df.to_pickle(temp)
+            os.replace(temp, path)
+        finally:
+            temp.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits its size cap."""
+        entries = []
+        for path in self.directory.glob(f'*{self.suffix}'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def size_bytes(self):
+        return sum(path.stat().st_size for path in self.directory.glob(f'*{self.suffix}'))
+
+    def clear(self):
+        for path in self.directory.glob(f'*{self.suffix}'):
+            path.unlink(missing_ok=True)
+
+    def read_csv(self, file, usecols=None):
+        """read_csv through the cache: repeat files skip parsing entirely."""
+        key = self.key(file, usecols)
+        df = self.get(key)
+        with self._lock:
+            if df is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if df is not None:
+            return df
+
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        df = read_csv(file, usecols=usecols)
+        try:
+            self.put(key, df)
+        except OSError:
+            # A full or read-only disk only costs the cache, not the upload
+            pass
+        return df